@@ -462,6 +462,12 @@
                     return;
                 }
 
+                if (retObj.status == '10003') {
+                    // session被并发请求修改，本次处理已放弃，重新执行
+                    $.AjaxSearchAnswer(question, collection, std_question_id, std_question_tag);
+                    return;
+                }
+
                 alert("获取问题答案失败[" + retObj.status + "]: " + retObj.msg);
             }
 
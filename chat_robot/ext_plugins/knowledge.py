@@ -31,6 +31,7 @@ sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
 from chat_robot.lib.qa import QA
 from chat_robot.lib.data_manager import QAManager
+from chat_robot.lib.excel_tool import ExcelTool
 from chat_robot.lib.answer_db import BaseModel, AnswerDao, NlpPurposConfigDict, StdQuestion, Answer
 
 
@@ -332,7 +333,7 @@ class InitDataTool(object):
         @param {Logger} logger - 日志对象
         """
         # 开始导入数据
-        with pd.io.excel.ExcelFile(data_file) as _excel_io:
+        with pd.io.excel.ExcelFile(data_file, engine=qa_manager.excel_engine) as _excel_io:
             # 处理KnowledgImages
             _images_id_mapping = cls._import_knowledge_images(_excel_io, qa_manager, logger)
 
@@ -358,17 +359,8 @@ class InitDataTool(object):
         @returns {dict} - 导入的图片id映射
         """
         _images_id_mapping = dict()  # 图片excel上的id和真实id的映射关系
-        try:
-            # 读取标题行
-            _df_header = pd.read_excel(
-                excel_io, sheet_name='KnowledgImages', nrows=0, engine=qa_manager.excel_engine
-            )
-        except:
-            _df_header = None  # 没有获取到指定的页
-
-        if _df_header is not None:
-            _skiprows = 1  # 跳过的记录数
-            _columns = {i: col for i, col in enumerate(_df_header.columns.tolist())}
+        if ExcelTool.has_sheet(excel_io, 'KnowledgImages'):
+            _skiprows = 1  # 已读取到的行数
             _data_path = os.path.join(
                 os.path.dirname(__file__), KNOWLEDGE_DATA_PATH
             )
@@ -377,20 +369,11 @@ class InitDataTool(object):
             )
             FileTool.create_dir(_upload_image_path, exist_ok=True)  # 先创建目录
             _web_image_url = WEB_IMAGE_URL
-            while True:
-                # 循环处理
-                _df = pd.read_excel(
-                    excel_io, sheet_name='KnowledgImages', nrows=qa_manager.excel_batch_num,
-                    header=None, skiprows=_skiprows, engine=qa_manager.excel_engine
-                )
-                _skiprows += qa_manager.excel_batch_num
-
-                if not _df.shape[0]:
-                    # 获取不到数据
-                    break
-
-                # 变更标题
-                _df.rename(columns=_columns, inplace=True)
+            for _df in ExcelTool.read_sheet_by_batch(
+                excel_io, 'KnowledgImages', qa_manager.excel_batch_num, engine=qa_manager.excel_engine
+            ):
+                # 循环处理, 每批数据的index从0开始
+                _skiprows += _df.shape[0]
 
                 for _index, _row in _df.iterrows():
                     # 逐行添加标准问题, _index为行，_row为数据集
@@ -462,31 +445,13 @@ class InitDataTool(object):
         @returns {dict} - 导入的书本id映射
         """
         _books_id_mapping = dict()  # 图片excel上的id和真实id的映射关系
-        try:
-            # 读取标题行
-            _df_header = pd.read_excel(
-                excel_io, sheet_name='KnowledgeBooks', nrows=0, engine=qa_manager.excel_engine
-            )
-        except:
-            _df_header = None  # 没有获取到指定的页
-
-        if _df_header is not None:
-            _skiprows = 1  # 跳过的记录数
-            _columns = {i: col for i, col in enumerate(_df_header.columns.tolist())}
-            while True:
-                # 循环处理
-                _df = pd.read_excel(
-                    excel_io, sheet_name='KnowledgeBooks', nrows=qa_manager.excel_batch_num,
-                    header=None, skiprows=_skiprows, engine=qa_manager.excel_engine
-                )
-                _skiprows += qa_manager.excel_batch_num
-
-                if not _df.shape[0]:
-                    # 获取不到数据
-                    break
-
-                # 变更标题
-                _df.rename(columns=_columns, inplace=True)
+        if ExcelTool.has_sheet(excel_io, 'KnowledgeBooks'):
+            _skiprows = 1  # 已读取到的行数
+            for _df in ExcelTool.read_sheet_by_batch(
+                excel_io, 'KnowledgeBooks', qa_manager.excel_batch_num, engine=qa_manager.excel_engine
+            ):
+                # 循环处理, 每批数据的index从0开始
+                _skiprows += _df.shape[0]
 
                 for _index, _row in _df.iterrows():
                     # 逐行添加标准问题, _index为行，_row为数据集
@@ -531,31 +496,13 @@ class InitDataTool(object):
         _chapters_tree = dict()
         _catalogs = list()  # 按顺序登记所有的目录id
         _cache_chapter_id = 0  # 上一节点id
-        try:
-            # 读取标题行
-            _df_header = pd.read_excel(
-                excel_io, sheet_name='KnowledgeChapters', nrows=0, engine=qa_manager.excel_engine
-            )
-        except:
-            _df_header = None  # 没有获取到指定的页
-
-        if _df_header is not None:
-            _skiprows = 1  # 跳过的记录数
-            _columns = {i: col for i, col in enumerate(_df_header.columns.tolist())}
-            while True:
-                # 循环处理
-                _df = pd.read_excel(
-                    excel_io, sheet_name='KnowledgeChapters', nrows=qa_manager.excel_batch_num,
-                    header=None, skiprows=_skiprows, engine=qa_manager.excel_engine
-                )
-                _skiprows += qa_manager.excel_batch_num
-
-                if not _df.shape[0]:
-                    # 获取不到数据
-                    break
-
-                # 变更标题
-                _df.rename(columns=_columns, inplace=True)
+        if ExcelTool.has_sheet(excel_io, 'KnowledgeChapters'):
+            _skiprows = 1  # 已读取到的行数
+            for _df in ExcelTool.read_sheet_by_batch(
+                excel_io, 'KnowledgeChapters', qa_manager.excel_batch_num, engine=qa_manager.excel_engine
+            ):
+                # 循环处理, 每批数据的index从0开始
+                _skiprows += _df.shape[0]
 
                 for _index, _row in _df.iterrows():
                     # 逐行添加标准问题, _index为行，_row为数据集
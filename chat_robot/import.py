@@ -51,6 +51,13 @@ if __name__ == '__main__':
     _config_xml = SimpleXml(_config, encoding=_encoding)
     _server_config = _config_xml.to_dict()['server']
 
+    # 进程内向量检索库的持久化目录
+    if _server_config['milvus'].get('embedded_path', '').startswith('.'):
+        # 相对路径
+        _server_config['milvus']['embedded_path'] = os.path.join(
+            _execute_path, _server_config['milvus']['embedded_path']
+        )
+
     # 日志对象
     _logger: Logger = None
     if 'logger' in _server_config.keys():
@@ -60,7 +67,9 @@ if __name__ == '__main__':
     _qa_manager = QAManager(
         _server_config['answerdb'], _server_config['milvus'], _server_config['bert_client'],
         logger=_logger, excel_batch_num=_server_config['excel_batch_num'],
-        excel_engine=_server_config['excel_engine'], load_para=False
+        excel_engine=_server_config['excel_engine'], load_para=False,
+        excel_bulk_insert=_server_config.get('excel_bulk_insert', False),
+        import_pipeline_para=_server_config.get('import_pipeline', None)
     )
 
     # 执行操作
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+标准问题及答案的内存目录
+@module answer_catalog
+@file answer_catalog.py
+"""
+
+import os
+import sys
+import threading
+import traceback
+import collections as cs
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from chat_robot.lib.answer_db import StdQuestion, Answer, ExtQuestion
+from chat_robot.lib.answer_template import AnswerTemplate
+
+
+__MOUDLE__ = 'answer_catalog'  # 模块名
+__DESCRIPT__ = u'标准问题及答案的内存目录'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+# 标准问题的只读记录，字段与StdQuestion一致
+StdQuestionRecord = cs.namedtuple(
+    'StdQuestionRecord', ['id', 'tag', 'q_type', 'milvus_id', 'collection', 'partition', 'question']
+)
+
+# 答案的只读记录，字段与Answer一致，并增加预先解析的对象
+#   type_param_obj : 解析后的type_param(options/job/ask类型)，解析失败为None
+#   answer_obj : 解析后的json答案(json类型且无需替换预定义值)，否则为None
+#   注：对象为缓存共享的数据，如需修改必须先复制
+AnswerRecord = cs.namedtuple(
+    'AnswerRecord', [
+        'std_question_id', 'a_type', 'type_param', 'replace_pre_def', 'answer',
+        'type_param_obj', 'answer_obj'
+    ]
+)
+
+
+class AnswerCatalog(object):
+    """
+    标准问题及答案的内存目录(读穿透缓存)
+    以(collection, partition, milvus_id)为索引缓存不可变的标准问题及答案记录，
+    向量检索命中后无需再访问数据库
+    """
+
+    def __init__(self, enabled: bool = True, logger=None):
+        """
+        标准问题及答案的内存目录
+
+        @param {bool} enabled=True - 是否启用内存缓存，不启用时所有查询直接访问数据库
+        @param {Logger} logger=None - 日志对象
+        """
+        self.enabled = enabled
+        self.logger = logger
+        self._lock = threading.RLock()
+
+        # 缓存字典
+        self._stdq_dict = dict()  # 标准问题字典, key为std_question_id, value为StdQuestionRecord
+        self._answer_dict = dict()  # 答案字典, key为std_question_id, value为AnswerRecord
+        self._milvus_index = dict()  # 向量索引, key为(collection, partition, milvus_id), value为std_question_id
+        self._tag_index = dict()  # 标识索引, key为(collection, tag), value为std_question_id
+        self._template_dict = dict()  # 预先编译的答案模板(不限数量), key为答案或选项文本, value为AnswerTemplate
+
+    #############################
+    # 公共函数
+    #############################
+    def load(self):
+        """
+        从数据库批量装载所有标准问题及答案
+        """
+        if not self.enabled:
+            return
+
+        _stdq_dict = dict()
+        _answer_dict = dict()
+        _milvus_index = dict()
+        _tag_index = dict()
+        _template_dict = dict()
+
+        _query = StdQuestion.select().order_by(StdQuestion.id.asc())
+        for _row in _query:
+            _stdq = self.to_stdq_record(_row)
+            _stdq_dict[_stdq.id] = _stdq
+            _milvus_index.setdefault((_stdq.collection, _stdq.partition, _stdq.milvus_id), _stdq.id)
+            if _stdq.tag != '':
+                _tag_index.setdefault((_stdq.collection, _stdq.tag), _stdq.id)
+
+        for _row in Answer.select():
+            _answer = self.to_answer_record(_row)
+            _answer_dict[_row.std_question_id] = _answer
+            if _answer.replace_pre_def == 'Y':
+                self._compile_answer_template(_answer, _template_dict)
+
+        # 扩展问题只登记索引，不能覆盖标准问题自身的索引
+        _query = ExtQuestion.select(
+            ExtQuestion.milvus_id, ExtQuestion.std_question_id
+        ).order_by(ExtQuestion.id.asc())
+        for _row in _query:
+            _stdq = _stdq_dict.get(_row.std_question_id, None)
+            if _stdq is not None:
+                _milvus_index.setdefault(
+                    (_stdq.collection, _stdq.partition, _row.milvus_id), _stdq.id
+                )
+
+        # 一次性替换，避免查询时看到装载了一半的数据
+        with self._lock:
+            self._stdq_dict = _stdq_dict
+            self._answer_dict = _answer_dict
+            self._milvus_index = _milvus_index
+            self._tag_index = _tag_index
+            self._template_dict = _template_dict
+
+        self._log_debug('Load answer catalog success: std_question[%d], answer[%d], milvus index[%d], template[%d]' % (
+            len(_stdq_dict), len(_answer_dict), len(_milvus_index), len(_template_dict)
+        ))
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._stdq_dict = dict()
+            self._answer_dict = dict()
+            self._milvus_index = dict()
+            self._tag_index = dict()
+            self._template_dict = dict()
+
+    def get_template(self, text: str) -> AnswerTemplate:
+        """
+        获取答案文本对应的预定义值模板
+
+        @param {str} text - 答案或选项文本
+
+        @returns {AnswerTemplate} - 模板对象，目录中没有预先编译的文本使用AnswerTemplate.compile获取
+        """
+        _template = self._template_dict.get(text, None)
+        if _template is None:
+            _template = AnswerTemplate.compile(text)
+
+        return _template
+
+    def get_by_milvus_id(self, milvus_id: int, collection: str, partition: str = None) -> tuple:
+        """
+        通过milvus_id获取标准问题及答案
+
+        @param {int} milvus_id - 向量id(标准问题或扩展问题)
+        @param {str} collection - 问题分类
+        @param {str} partition=None - 场景
+
+        @returns {tuple} - 返回(StdQuestionRecord, AnswerRecord), 如果查询不到返回None
+            注意：有可能查到有StdQuestion，Answer为None的情况
+        """
+        _partition = '' if partition is None else partition
+        _std_question_id = self._milvus_index.get((collection, _partition, milvus_id), None)
+        if _std_question_id is not None:
+            return self.get_by_std_question_id(_std_question_id)
+
+        # 缓存中没有，从数据库查询
+        _stdq = StdQuestion.get_or_none(
+            (StdQuestion.milvus_id == milvus_id) & (StdQuestion.collection == collection) & (
+                StdQuestion.partition == _partition)
+        )
+        if _stdq is None:
+            # 查询问题扩展
+            _sub_query = (ExtQuestion.select(ExtQuestion.std_question_id)
+                          .where(ExtQuestion.milvus_id == milvus_id))
+            _stdq = (StdQuestion.select()
+                     .where(StdQuestion.id.in_(_sub_query) & (StdQuestion.collection == collection) & (
+                         StdQuestion.partition == _partition))
+                     .get_or_none())
+            if _stdq is None:
+                # 扩展问题也找不到
+                return None
+
+        _stdq_and_answer = self._load_std_question(_stdq)
+        if self.enabled:
+            with self._lock:
+                self._milvus_index[(collection, _partition, milvus_id)] = _stdq.id
+
+        return _stdq_and_answer
+
+    def get_by_std_question_id(self, std_question_id: int) -> tuple:
+        """
+        通过标准问题id获取标准问题及答案
+
+        @param {int} std_question_id - 标准问题id
+
+        @returns {tuple} - 返回(StdQuestionRecord, AnswerRecord), 如果查询不到返回None
+        """
+        _stdq = self._stdq_dict.get(std_question_id, None)
+        if _stdq is not None:
+            return (_stdq, self._answer_dict.get(std_question_id, None))
+
+        # 缓存中没有，从数据库查询
+        _stdq = StdQuestion.get_or_none(StdQuestion.id == std_question_id)
+        if _stdq is None:
+            return None
+
+        return self._load_std_question(_stdq)
+
+    def get_by_tag(self, tag: str, collection: str) -> tuple:
+        """
+        通过标准问题tag获取标准问题及答案
+
+        @param {str} tag - 标准问题tag
+        @param {str} collection - 问题分类
+
+        @returns {tuple} - 返回(StdQuestionRecord, AnswerRecord), 如果查询不到返回None
+        """
+        _std_question_id = self._tag_index.get((collection, tag), None)
+        if _std_question_id is not None:
+            return self.get_by_std_question_id(_std_question_id)
+
+        # 缓存中没有，从数据库查询
+        _stdq = StdQuestion.get_or_none(
+            (StdQuestion.tag == tag) & (StdQuestion.collection == collection)
+        )
+        if _stdq is None:
+            return None
+
+        _stdq_and_answer = self._load_std_question(_stdq)
+        if self.enabled:
+            with self._lock:
+                self._tag_index[(collection, tag)] = _stdq.id
+
+        return _stdq_and_answer
+
+    def add_std_question(self, std_question: StdQuestion, answer: Answer = None):
+        """
+        将新增的标准问题登记到缓存
+
+        @param {StdQuestion} std_question - 标准问题数据库对象
+        @param {Answer} answer=None - 答案数据库对象
+        """
+        if not self.enabled:
+            return
+
+        _stdq = self.to_stdq_record(std_question)
+        with self._lock:
+            self._stdq_dict[_stdq.id] = _stdq
+            if answer is not None:
+                _answer = self.to_answer_record(answer)
+                self._answer_dict[_stdq.id] = _answer
+                if _answer.replace_pre_def == 'Y':
+                    self._compile_answer_template(_answer, self._template_dict)
+            else:
+                self._answer_dict.pop(_stdq.id, None)
+
+            self._milvus_index.setdefault((_stdq.collection, _stdq.partition, _stdq.milvus_id), _stdq.id)
+            if _stdq.tag != '':
+                self._tag_index.setdefault((_stdq.collection, _stdq.tag), _stdq.id)
+
+    def add_ext_question(self, ext_question: ExtQuestion, std_question: StdQuestion):
+        """
+        将新增的扩展问题登记到缓存索引
+
+        @param {ExtQuestion} ext_question - 扩展问题数据库对象
+        @param {StdQuestion} std_question - 扩展问题对应的标准问题数据库对象
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._milvus_index.setdefault(
+                (std_question.collection, std_question.partition, ext_question.milvus_id),
+                std_question.id
+            )
+
+    #############################
+    # 工具函数
+    #############################
+    @classmethod
+    def to_stdq_record(cls, std_question: StdQuestion) -> StdQuestionRecord:
+        """
+        将标准问题数据库对象转换为只读记录
+
+        @param {StdQuestion} std_question - 标准问题数据库对象
+
+        @returns {StdQuestionRecord} - 只读记录
+        """
+        return StdQuestionRecord(
+            id=std_question.id, tag=std_question.tag, q_type=std_question.q_type,
+            milvus_id=std_question.milvus_id, collection=std_question.collection,
+            partition=std_question.partition, question=std_question.question
+        )
+
+    @classmethod
+    def to_answer_record(cls, answer: Answer) -> AnswerRecord:
+        """
+        将答案数据库对象转换为只读记录
+
+        @param {Answer} answer - 答案数据库对象
+
+        @returns {AnswerRecord} - 只读记录
+        """
+        _answer_obj = None
+        if answer.a_type == 'json' and (
+            answer.replace_pre_def != 'Y' or not AnswerTemplate.compile(answer.answer).has_var
+        ):
+            try:
+                _answer_obj = eval(answer.answer)
+            except:
+                # 解析失败在使用时再处理
+                _answer_obj = None
+
+        return AnswerRecord(
+            std_question_id=answer.std_question_id, a_type=answer.a_type,
+            type_param=answer.type_param, replace_pre_def=answer.replace_pre_def,
+            answer=answer.answer,
+            type_param_obj=cls.parse_type_param(answer.a_type, answer.type_param),
+            answer_obj=_answer_obj
+        )
+
+    @classmethod
+    def parse_type_param(cls, a_type: str, type_param: str):
+        """
+        解析并检查答案的type_param
+
+        @param {str} a_type - 答案类型
+        @param {str} type_param - 答案类型参数字符串
+
+        @returns {list} - 解析后的参数对象，不需要解析或解析失败返回None
+            options : [[std_question_id, 'option_str'], ...]
+            job : [class_name, fun_name, {para_dict}]
+            ask : [class_name, fun_name, collection, partition, {para_dict}, True]
+        """
+        if a_type not in ('options', 'job', 'ask'):
+            return None
+
+        try:
+            _type_param = eval(type_param)
+            if a_type == 'options':
+                for _option in _type_param:
+                    if len(_option) < 2:
+                        raise ValueError('option format error')
+            elif a_type == 'job':
+                if len(_type_param) < 3 or type(_type_param[2]) != dict:
+                    raise ValueError('job type_param format error')
+            elif len(_type_param) < 5 or type(_type_param[4]) != dict:
+                raise ValueError('ask type_param format error')
+
+            return _type_param
+        except:
+            # 解析失败在使用时再处理
+            return None
+
+    #############################
+    # 内部函数
+    #############################
+    def _load_std_question(self, std_question: StdQuestion) -> tuple:
+        """
+        装载标准问题对应的答案并登记到缓存
+
+        @param {StdQuestion} std_question - 标准问题数据库对象
+
+        @returns {tuple} - 返回(StdQuestionRecord, AnswerRecord)
+        """
+        _answer = Answer.get_or_none(Answer.std_question_id == std_question.id)
+        self.add_std_question(std_question, _answer)
+        return (
+            self.to_stdq_record(std_question),
+            None if _answer is None else self.to_answer_record(_answer)
+        )
+
+    def _compile_answer_template(self, answer: AnswerRecord, template_dict: dict):
+        """
+        预先编译答案的预定义值模板(包括选项类答案的选项文本)
+
+        @param {AnswerRecord} answer - 答案记录
+        @param {dict} template_dict - 登记编译结果的模板字典, key为文本, value为AnswerTemplate
+        """
+        try:
+            _texts = [answer.answer]
+            if answer.a_type == 'options' and answer.type_param_obj is not None:
+                _texts.extend([_option[1] for _option in answer.type_param_obj])
+
+            for _text in _texts:
+                if _text not in template_dict:
+                    template_dict[_text] = AnswerTemplate(_text)
+        except:
+            self._log_debug('compile answer [%s] template error: %s' % (
+                str(answer.std_question_id), traceback.format_exc()
+            ))
+
+    def _log_debug(self, msg: str, *args, **kwargs):
+        """
+        输出debug日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.debug(msg, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -362,7 +362,7 @@ class AnswerDao(object):
         初始化数据库访问类
 
         @param {dict} connect_para - 连接参数，传入server.xml的answerdb节点字典
-            db_type {str} - 数据库类型，默认MySQL
+            db_type {str} - 数据库类型，可以为MySQL或SQLite，默认MySQL
             database {str} - 要使用的数据库实例名
             max_connections {int} - 连接池最大连接数量，默认20
             stale_timeout {float} - 允许使用连接的时间(秒)
@@ -376,6 +376,9 @@ class AnswerDao(object):
                 connect_timeout {float} - 连接超时时间(秒)
                 charset {str} - 字符集，默认utf8
 
+            SQLite的连接参数(database为数据库文件路径，主要用于测试)：
+                pragmas {dict} - 数据库的pragma设置，默认{'journal_mode': 'wal'}
+
         @returns {PooledDatabase} - 返回生成的连接池数据库对象
         """
         # 从参数中获取关键要素
@@ -396,6 +399,11 @@ class AnswerDao(object):
                     'port': 3306,
                 }
             )
+        elif _db_type == 'SQLite':
+            _db_driver = RetryPooledSqliteDatabase
+            _connect_para['pragmas'] = {'journal_mode': 'wal'}
+            # 连接池的连接归还后可能被其他线程取出使用
+            _connect_para['check_same_thread'] = False
         else:
             raise NotImplementedError('not support db type: %s!' % _db_type)
 
@@ -446,7 +454,7 @@ class AnswerDao(object):
         装载答案库
 
         @param {dict} connect_para - 连接参数，传入server.xml的answerdb节点字典
-            db_type {str} - 数据库类型，默认MySQL
+            db_type {str} - 数据库类型，可以为MySQL或SQLite，默认MySQL
             database {str} - 要使用的数据库实例名
             max_connections {int} - 连接池最大连接数量，默认20
             stale_timeout {float} - 允许使用连接的时间(秒)
@@ -460,6 +468,9 @@ class AnswerDao(object):
                 connect_timeout {float} - 连接超时时间(秒)
                 charset {str} - 字符集，默认utf8
 
+            SQLite的连接参数(database为数据库文件路径，主要用于测试)：
+                pragmas {dict} - 数据库的pragma设置，默认{'journal_mode': 'wal'}
+
         @returns {DataBase} - 数据库对象
         """
         # 连接数据库
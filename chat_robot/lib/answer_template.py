@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+答案预定义值模板
+@module answer_template
+@file answer_template.py
+"""
+
+import os
+import sys
+import re
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from chat_robot.lib.lru_cache import LRUCache
+
+
+__MOUDLE__ = 'answer_template'  # 模块名
+__DESCRIPT__ = u'答案预定义值模板'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class AnswerTemplate(object):
+    """
+    答案预定义值模板
+    将答案文本一次性解析为文本段和占位符段，渲染时无需再进行正则匹配
+    支持的占位符：{$info=key$}、{$cache=key$}、{$config=key$}、{$para=key$}
+    """
+
+    VAR_PATTERN = re.compile(r'\{\$.+?\$\}')  # 占位符匹配规则
+    VAR_TYPES = ('info', 'cache', 'config', 'para')  # 支持的占位符类型
+
+    # 编译后的模板缓存, key为答案文本
+    _cache = LRUCache(max_size=10000)
+
+    def __init__(self, text: str):
+        """
+        答案预定义值模板
+
+        @param {str} text - 答案文本
+        """
+        self.text = text
+        self.segments = list()  # 模板段清单, 文本段为str, 占位符段为(var_type, key, var_str)
+        self.keys = {_type: list() for _type in self.VAR_TYPES}  # 各类型占位符的key清单
+
+        _pos = 0
+        for _match in self.VAR_PATTERN.finditer(text):
+            if _match.start() > _pos:
+                self.segments.append(text[_pos: _match.start()])
+
+            _var_str = _match.group(0)
+            _index = _var_str.find('=')
+            _var_type = _var_str[2: _index] if _index > 0 else ''
+            if _var_type in self.VAR_TYPES:
+                _key = _var_str[_index + 1: -2]
+                self.segments.append((_var_type, _key, _var_str))
+                if _key not in self.keys[_var_type]:
+                    self.keys[_var_type].append(_key)
+            else:
+                # 不支持的占位符，按文本处理
+                self.segments.append(_var_str)
+
+            _pos = _match.end()
+
+        if _pos < len(text):
+            self.segments.append(text[_pos:])
+
+        # 是否有需要替换的占位符
+        self.has_var = len([_seg for _seg in self.segments if type(_seg) == tuple]) > 0
+
+    #############################
+    # 公共函数
+    #############################
+    @classmethod
+    def compile(cls, text: str):
+        """
+        获取答案文本对应的模板(编译结果将缓存)
+
+        @param {str} text - 答案文本
+
+        @returns {AnswerTemplate} - 模板对象
+        """
+        _template = cls._cache.get(text)
+        if _template is None:
+            _template = AnswerTemplate(text)
+            cls._cache.set(text, _template)
+
+        return _template
+
+    def render(self, values: dict) -> str:
+        """
+        渲染模板
+
+        @param {dict} values - 占位符的值字典, key为var_type, value为该类型的{key: value}字典
+            注：取不到值(或值为None)的占位符保留原样
+
+        @returns {str} - 渲染后的文本
+        """
+        if not self.has_var:
+            return self.text
+
+        _strs = list()
+        for _seg in self.segments:
+            if type(_seg) == str:
+                _strs.append(_seg)
+                continue
+
+            _value = values.get(_seg[0], {}).get(_seg[1], None)
+            _strs.append(_seg[2] if _value is None else str(_value))
+
+        return ''.join(_strs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
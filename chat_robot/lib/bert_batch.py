@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+BERT批量编码服务
+@module bert_batch
+@file bert_batch.py
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+import numpy as np
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from chat_robot.lib.metrics import Metrics
+
+
+__MOUDLE__ = 'bert_batch'  # 模块名
+__DESCRIPT__ = u'BERT批量编码服务'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class BertBatchEncoder(object):
+    """
+    BERT批量编码服务
+    将并发请求的问题在一个时间窗口内收集起来，通过一次encode调用获取向量后再分发给各个调用方
+    """
+
+    def __init__(self, get_bert_client_fun, max_batch_size: int = 32, max_wait: float = 0.003,
+                 queue_size: int = 1024, put_timeout: float = 1.0, logger=None):
+        """
+        BERT批量编码服务
+
+        @param {function} get_bert_client_fun - 获取BertClient对象的函数，无入参，返回BertClient的上下文管理器
+        @param {int} max_batch_size=32 - 每批编码的最大问题数
+        @param {float} max_wait=0.003 - 收集一批问题的最大等待时间(秒)
+        @param {int} queue_size=1024 - 待编码队列的最大深度
+        @param {float} put_timeout=1.0 - 队列满时放入问题的等待超时时间(秒)
+        @param {Logger} logger=None - 日志对象
+        """
+        self.get_bert_client_fun = get_bert_client_fun
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self.logger = logger
+
+        # 待编码队列，元素为(question, Future)
+        self._queue = queue.Queue(maxsize=queue_size)
+
+        # 统计信息
+        self._stat_lock = threading.Lock()
+        self._batch_count = 0  # 已执行的批次数
+        self._item_count = 0  # 已编码的问题数
+        self._error_count = 0  # 编码失败的批次数
+
+        # 编码处理线程
+        self._stop = False
+        self._thread = threading.Thread(
+            target=self._encode_thread_fun,
+            name='Thread-Bert-Batch-Encode',
+            daemon=True
+        )
+        self._thread.start()
+
+    def __del__(self):
+        """
+        析构函数
+        """
+        self._stop = True
+
+    #############################
+    # 公共函数
+    #############################
+    def submit(self, question: str) -> Future:
+        """
+        提交要编码的问题
+
+        @param {str} question - 要编码的问题
+
+        @returns {Future} - 异步结果对象，result为问题的向量(np.ndarray)
+        """
+        _future = Future()
+        try:
+            self._queue.put((question, _future), timeout=self.put_timeout)
+        except queue.Full:
+            raise RuntimeError('bert batch encode queue is full [%d]!' % self.queue_size)
+
+        return _future
+
+    def encode(self, questions: list, timeout: float = None) -> np.ndarray:
+        """
+        对问题清单进行编码(与BertClient.encode的返回一致)
+
+        @param {list} questions - 要编码的问题清单
+        @param {float} timeout=None - 等待编码结果的超时时间(秒)，None代表一直等待
+
+        @returns {np.ndarray} - 问题对应的向量矩阵
+        """
+        _futures = [self.submit(_question) for _question in questions]
+        return np.array([_future.result(timeout=timeout) for _future in _futures])
+
+    def get_stats(self) -> dict:
+        """
+        获取编码统计信息
+
+        @returns {dict} - 统计信息字典
+            batch_count : 已执行的批次数
+            item_count : 已编码的问题数
+            error_count : 编码失败的批次数
+            avg_batch_size : 平均每批问题数
+            fill_ratio : 批次填充率(平均每批问题数 / 每批最大问题数)
+            queue_depth : 当前队列中等待的问题数
+        """
+        with self._stat_lock:
+            _batch_count = self._batch_count
+            _item_count = self._item_count
+            _error_count = self._error_count
+
+        _avg_batch_size = 0.0 if _batch_count == 0 else _item_count / _batch_count
+        return {
+            'batch_count': _batch_count,
+            'item_count': _item_count,
+            'error_count': _error_count,
+            'avg_batch_size': _avg_batch_size,
+            'fill_ratio': _avg_batch_size / self.max_batch_size,
+            'queue_depth': self._queue.qsize()
+        }
+
+    def stop(self):
+        """
+        停止编码服务
+        """
+        self._stop = True
+
+    #############################
+    # 内部函数
+    #############################
+    def _get_batch(self) -> list:
+        """
+        从队列中收集一批待编码的问题
+
+        @returns {list} - [(question, Future), ...]，如果超时没有数据返回空数组
+        """
+        try:
+            _batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return list()
+
+        # 在等待窗口内继续收集
+        _deadline = time.perf_counter() + self.max_wait
+        while len(_batch) < self.max_batch_size:
+            _wait = _deadline - time.perf_counter()
+            try:
+                if _wait > 0:
+                    _batch.append(self._queue.get(timeout=_wait))
+                else:
+                    # 窗口已过，只取已在队列中的数据
+                    _batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return _batch
+
+    def _encode_thread_fun(self):
+        """
+        编码处理线程
+        """
+        while not self._stop:
+            _batch = self._get_batch()
+            if len(_batch) == 0:
+                continue
+
+            # 跳过调用方已取消的请求
+            _batch = [_item for _item in _batch if _item[1].set_running_or_notify_cancel()]
+            if len(_batch) == 0:
+                continue
+
+            # 登记批次大小、填充率及剩余的队列深度
+            Metrics.observe('chat_robot_bert_batch_size', len(_batch))
+            Metrics.observe('chat_robot_bert_batch_fill_ratio', len(_batch) / self.max_batch_size)
+            Metrics.set('chat_robot_bert_batch_queue_depth', self._queue.qsize())
+            try:
+                with self.get_bert_client_fun() as _bert:
+                    _vectors = _bert.encode([_item[0] for _item in _batch])
+
+                for _i in range(len(_batch)):
+                    _batch[_i][1].set_result(_vectors[_i])
+
+                with self._stat_lock:
+                    self._batch_count += 1
+                    self._item_count += len(_batch)
+
+                Metrics.inc('chat_robot_bert_batch_total', result='ok')
+            except Exception as e:
+                self._log_error('bert batch encode error: %s' % traceback.format_exc())
+                for _item in _batch:
+                    _item[1].set_exception(e)
+
+                with self._stat_lock:
+                    self._error_count += 1
+
+                Metrics.inc('chat_robot_bert_batch_total', result='error')
+
+    def _log_error(self, msg: str, *args, **kwargs):
+        """
+        输出error日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.error(msg, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+通用连接池
+@module conn_pool
+@file conn_pool.py
+"""
+
+import os
+import sys
+import time
+import threading
+import traceback
+import collections as cs
+from contextlib import contextmanager
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'conn_pool'  # 模块名
+__DESCRIPT__ = u'通用连接池'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class ConnectionPool(object):
+    """
+    通用连接池(线程安全)
+    1、连接数有上限，超过上限的获取请求将等待其他线程归还连接
+    2、同一线程嵌套获取连接时复用该线程已取出的连接
+    3、连接空闲超过指定时间将被关闭回收
+    4、连接在空闲一段时间后再次使用前会进行健康检查，检查失败将重建连接
+    """
+
+    def __init__(self, create_fun, close_fun=None, check_fun=None, pool_size: int = 10,
+                 idle_timeout: float = 600.0, check_interval: float = 30.0,
+                 wait_timeout: float = None, name: str = 'pool', logger=None):
+        """
+        通用连接池
+
+        @param {function} create_fun - 创建连接的函数，无入参，返回连接对象
+        @param {function} close_fun=None - 关闭连接的函数，入参为连接对象
+        @param {function} check_fun=None - 检查连接是否可用的函数，入参为连接对象，返回bool
+        @param {int} pool_size=10 - 连接池最大连接数
+        @param {float} idle_timeout=600.0 - 连接空闲超时时间(秒)，超过该时间的连接将被关闭，0代表不超时
+        @param {float} check_interval=30.0 - 连接空闲超过该时间(秒)后再次使用前需进行健康检查
+        @param {float} wait_timeout=None - 获取连接的等待超时时间(秒)，None代表一直等待
+        @param {str} name='pool' - 连接池名称，用于日志输出
+        @param {Logger} logger=None - 日志对象
+        """
+        self.create_fun = create_fun
+        self.close_fun = close_fun
+        self.check_fun = check_fun
+        self.pool_size = max(1, pool_size)
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.wait_timeout = wait_timeout
+        self.name = name
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(self.pool_size)  # 控制最大连接数
+        self._idle = cs.deque()  # 空闲连接队列，元素为[conn, last_use_time]
+        self._local = threading.local()  # 线程已取出的连接, conn及引用次数ref
+
+    #############################
+    # 公共函数
+    #############################
+    @contextmanager
+    def connection(self):
+        """
+        获取连接(with语法使用)
+        """
+        _conn = self._local.__dict__.get('conn', None)
+        if _conn is not None:
+            # 当前线程已取出连接，直接复用
+            self._local.ref += 1
+            try:
+                yield _conn
+            finally:
+                self._local.ref -= 1
+            return
+
+        _conn = self._acquire()
+        self._local.conn = _conn
+        self._local.ref = 1
+        _is_ok = True
+        try:
+            yield _conn
+        except:
+            _is_ok = False
+            raise
+        finally:
+            self._local.conn = None
+            self._local.ref = 0
+            self._release(_conn, _is_ok)
+
+    def clear(self):
+        """
+        关闭所有空闲连接
+        """
+        with self._lock:
+            _idle_list = list(self._idle)
+            self._idle.clear()
+
+        for _item in _idle_list:
+            self._close(_item[0])
+
+    def prefill(self, num: int = 1) -> int:
+        """
+        预先建立连接并放入空闲队列(启动时使用，避免第一个请求等待建立连接)
+
+        @param {int} num=1 - 要建立的连接数，不超过连接池最大连接数
+
+        @returns {int} - 当前的空闲连接数
+        """
+        _conn_list = list()
+        try:
+            for _i in range(min(num, self.pool_size)):
+                _conn_list.append(self._acquire())
+        finally:
+            for _conn in _conn_list:
+                self._release(_conn)
+
+        return self.get_stats()['idle']
+
+    def get_stats(self) -> dict:
+        """
+        获取连接池状态
+
+        @returns {dict} - 状态字典
+            pool_size : 最大连接数
+            idle : 空闲连接数
+        """
+        with self._lock:
+            return {'pool_size': self.pool_size, 'idle': len(self._idle)}
+
+    #############################
+    # 内部函数
+    #############################
+    def _acquire(self):
+        """
+        从连接池取出连接
+
+        @returns {object} - 连接对象
+        """
+        if self.wait_timeout is None:
+            self._semaphore.acquire()
+        elif not self._semaphore.acquire(timeout=self.wait_timeout):
+            raise TimeoutError('get connection from [%s] overtime!' % self.name)
+
+        try:
+            self._evict_idle()
+            while True:
+                with self._lock:
+                    _item = self._idle.pop() if len(self._idle) > 0 else None
+
+                if _item is None:
+                    # 没有空闲连接，新建
+                    return self.create_fun()
+
+                _conn, _last_use = _item
+                if self.check_fun is None or time.time() - _last_use < self.check_interval:
+                    return _conn
+
+                # 进行健康检查
+                _is_ok = False
+                try:
+                    _is_ok = self.check_fun(_conn)
+                except:
+                    self._log_debug('check [%s] connection error: %s' % (self.name, traceback.format_exc()))
+
+                if _is_ok:
+                    return _conn
+
+                self._close(_conn)
+        except:
+            self._semaphore.release()
+            raise
+
+    def _release(self, conn, is_ok: bool = True):
+        """
+        将连接放回连接池
+
+        @param {object} conn - 连接对象
+        @param {bool} is_ok=True - 使用过程是否正常，出现异常的连接下次使用前将进行健康检查
+        """
+        with self._lock:
+            # 异常的连接将使用时间置为0，下次取出时强制检查
+            self._idle.append([conn, time.time() if is_ok else 0])
+
+        self._semaphore.release()
+
+    def _evict_idle(self):
+        """
+        关闭空闲超时的连接
+        """
+        if self.idle_timeout <= 0:
+            return
+
+        _evict_list = list()
+        _now = time.time()
+        with self._lock:
+            # 最近使用的连接在队列尾部，从头部开始清理
+            while len(self._idle) > 0 and self._idle[0][1] > 0 and _now - self._idle[0][1] > self.idle_timeout:
+                _evict_list.append(self._idle.popleft()[0])
+
+        for _conn in _evict_list:
+            self._close(_conn)
+
+        if len(_evict_list) > 0:
+            self._log_debug('evict [%s] idle connections: %d' % (self.name, len(_evict_list)))
+
+    def _close(self, conn):
+        """
+        关闭连接
+
+        @param {object} conn - 连接对象
+        """
+        if self.close_fun is None:
+            return
+
+        try:
+            self.close_fun(conn)
+        except:
+            self._log_debug('close [%s] connection error: %s' % (self.name, traceback.format_exc()))
+
+    def _log_debug(self, msg: str, *args, **kwargs):
+        """
+        输出debug日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.debug(msg, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -16,18 +16,27 @@ import os
 import sys
 import copy
 import math
+import contextlib
 import time
 import collections as cs
 import re
+import threading
 import traceback
-from functools import reduce
 import numpy as np
+import peewee as pw
 import milvus as mv
 import pandas as pd
 from bert_serving.client import BertClient
 # 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from chat_robot.lib.answer_catalog import AnswerCatalog
+from chat_robot.lib.bert_batch import BertBatchEncoder
+from chat_robot.lib.conn_pool import ConnectionPool
+from chat_robot.lib.excel_tool import ExcelTool
+from chat_robot.lib.import_pipeline import ImportPipeline
+from chat_robot.lib.metrics import Metrics
+from chat_robot.lib.vector_store import EmbeddedVectorStore
 from chat_robot.lib.answer_db import AnswerDao, CollectionOrder, StdQuestion, Answer, ExtQuestion, NoMatchAnswers, CommonPara, NlpSureJudgeDict, NlpPurposConfigDict, RestfulApiUser, UploadFileConfig, SendMessageQueue, SendMessageHis
 
 
@@ -55,7 +64,9 @@ class QAManager(object):
     """
 
     def __init__(self, answer_db_para: dict, milvus_para: dict, bert_para: dict,
-                 logger=None, excel_batch_num=100, excel_engine='xlrd', load_para: bool = True):
+                 logger=None, excel_batch_num=100, excel_engine='xlrd', load_para: bool = True,
+                 use_answer_catalog: bool = False, bert_batch_para: dict = None,
+                 excel_bulk_insert: bool = False, import_pipeline_para: dict = None):
         """
         问答数据管理
 
@@ -66,11 +77,18 @@ class QAManager(object):
         @param {int} excel_batch_num=100 - excel导入数据时每批处理的数据记录数
         @param {string} excel_engine='xlrd' - excel导入数据使用的引擎，可以是xlrd或者openpyxl
         @param {bool} load_para=True - 初始化时是否装载信息到内存
+        @param {bool} use_answer_catalog=False - 是否将标准问题及答案缓存到内存(匹配时无需访问数据库)
+        @param {dict} bert_batch_para=None - BERT批量编码服务参数，server.xml的bert_batch配置
+        @param {bool} excel_bulk_insert=False - excel导入数据时是否按批量模式写入Milvus和数据库
+        @param {dict} import_pipeline_para=None - excel导入流水线参数，server.xml的import_pipeline配置
         """
         # 基础参数
         self.logger = logger
         self.excel_batch_num = excel_batch_num  # 处理excel时一次处理的数据量
         self.excel_engine = excel_engine  # 使用读引擎，可以是xlrd或者openpyxl
+        self.excel_bulk_insert = excel_bulk_insert  # 导入时是否按批写入
+        self.import_pipeline_para = {} if import_pipeline_para is None else copy.deepcopy(import_pipeline_para)
+        self._collection_lock = threading.RLock()  # 并发导入时创建问题分类和场景的锁
         self.load_para = load_para
 
         # 装载数据库连接
@@ -90,8 +108,53 @@ class QAManager(object):
         self.metric_type = eval('mv.MetricType.%s' % self.milvus_para.get('metric_type', 'IP'))
         self.nlist = self.milvus_para.get('nlist', 16384)
 
-        # bert连接参数
+        # 向量检索库, milvus-使用Milvus服务, embedded-使用进程内的向量检索库
+        self.vector_store = None
+        if self.milvus_para.get('backend', 'milvus') == 'embedded':
+            _path = self.milvus_para.get('embedded_path', '')
+            self.vector_store = EmbeddedVectorStore(
+                path=None if _path == '' else _path,
+                ivf_threshold=self.milvus_para.get('ivf_threshold', 0),
+                ivf_nlist=self.milvus_para.get('ivf_nlist', 0),
+                logger=self.logger
+            )
+
+        self.milvus_pool = ConnectionPool(
+            self._create_milvus, close_fun=self._close_connection, check_fun=self._check_milvus,
+            pool_size=self.milvus_para.get('pool_size', 10),
+            idle_timeout=self.milvus_para.get('pool_idle_timeout', 600.0),
+            check_interval=self.milvus_para.get('pool_check_interval', 30.0),
+            wait_timeout=self.milvus_para.get('pool_wait_timeout', None),
+            name='milvus', logger=self.logger
+        )
+
+        # bert连接参数, 连接池参数不能送入BertClient
         self.bert_para = copy.deepcopy(bert_para)
+        _bert_pool_para = {
+            'pool_size': self.bert_para.pop('pool_size', 10),
+            'idle_timeout': self.bert_para.pop('pool_idle_timeout', 600.0),
+            'check_interval': self.bert_para.pop('pool_check_interval', 30.0),
+            'wait_timeout': self.bert_para.pop('pool_wait_timeout', None)
+        }
+        self.bert_check_timeout = self.bert_para.pop('pool_check_timeout', 5.0)  # 健康检查的超时时间(秒)
+        self.bert_pool = ConnectionPool(
+            self._create_bert_client, close_fun=self._close_connection,
+            check_fun=self._check_bert_client, name='bert_client', logger=self.logger,
+            **_bert_pool_para
+        )
+
+        # bert批量编码服务，将并发的单个问题合并为一次编码请求
+        self.bert_batch_para = copy.deepcopy(bert_batch_para) if bert_batch_para is not None else {}
+        self.bert_batch_encoder = None
+        if self.bert_batch_para.get('enable', False):
+            self.bert_batch_encoder = BertBatchEncoder(
+                self.get_bert_client,
+                max_batch_size=self.bert_batch_para.get('max_batch_size', 32),
+                max_wait=self.bert_batch_para.get('max_wait', 0.003),
+                queue_size=self.bert_batch_para.get('queue_size', 1024),
+                put_timeout=self.bert_batch_para.get('put_timeout', 1.0),
+                logger=self.logger
+            )
 
         # 获取CollectionOrder到内存
         self.sorted_collection = self._get_sorted_collection_list()
@@ -103,10 +166,28 @@ class QAManager(object):
         self.load_nlp_sure_judge_dict()
         self.load_nlp_purpos_config_dict()
 
+        # 数据变更监听函数清单，问题数据变更时通知使用方(例如清除缓存)
+        self._data_change_listeners = list()
+
+        # 标准问题及答案的内存目录
+        self.answer_catalog = AnswerCatalog(
+            enabled=(load_para and use_answer_catalog), logger=self.logger
+        )
+        self.load_answer_catalog()
+
     #############################
     # 工具函数
     #############################
 
+    def add_data_change_listener(self, fun):
+        """
+        添加问题数据变更的监听函数
+
+        @param {function} fun - 监听函数，格式为fun(action)
+            action为变更操作名，例如import_questions_by_xls
+        """
+        self._data_change_listeners.append(fun)
+
     def confirm_milvus_status(self, status: mv.Status, fun_name: str):
         """
         确认milvus执行结果，如果失败抛出异常
@@ -117,41 +198,74 @@ class QAManager(object):
         if status.code != 0:
             raise RuntimeError('execute milvus.%s error: %s' % (fun_name, str(status)))
 
-    def get_milvus(self) -> mv.Milvus:
+    def get_milvus(self):
         """
-        获取可用的milvus连接对象
+        从连接池获取可用的milvus连接对象(with语法使用)
+        例如: with qa_manager.get_milvus() as _milvus:
 
-        @returns {Milvus} - 返回要使用的Milvus对象
+        @returns {contextmanager} - 返回Milvus对象的上下文管理器
         """
-        return mv.Milvus(
-            host=self.milvus_para['host'], port=self.milvus_para['port'],
-            pool=self.milvus_para.get('pool', 'SingletonThread')
-        )
+        return self.milvus_pool.connection()
 
-    def get_bert_client(self) -> BertClient:
+    def get_bert_client(self):
         """
-        获取可用的bert客户端
+        从连接池获取可用的bert客户端(with语法使用)
+        例如: with qa_manager.get_bert_client() as _bert:
 
-        @returns {BertClient} - 返回要使用的bert客户端
+        @returns {contextmanager} - 返回BertClient对象的上下文管理器
         """
-        return BertClient(**self.bert_para)
+        return self.bert_pool.connection()
 
-    def normaliz_vec(self, vec_list):
+    def encode_questions(self, questions: list) -> list:
         """
-        标准化向量列表
+        获取问题清单的标准化向量
 
-        @param {list} vec_list - 通过bert产生的变量列表
+        @param {list} questions - 问题清单
 
-        @returns {list} - 标准化后的向量列表
+        @returns {np.ndarray} - 标准化后的向量矩阵，每行对应一个问题
         """
-        for i in range(len(vec_list)):
-            vec = vec_list[i]
-            square_sum = reduce(lambda x, y: x + y, map(lambda x: x * x, vec))
-            sqrt_square_sum = np.sqrt(square_sum)
-            coef = 1 / sqrt_square_sum
-            vec = list(map(lambda x: x * coef, vec))
-            vec_list[i] = vec
-        return vec_list
+        with Metrics.timer('chat_robot_stage_seconds', stage='bert_encode'):
+            if self.bert_batch_encoder is not None:
+                # 通过批量编码服务合并处理
+                _vectors = self.bert_batch_encoder.encode(
+                    questions, timeout=self.bert_batch_para.get('timeout', None)
+                )
+            else:
+                with self.get_bert_client() as _bert:
+                    _vectors = _bert.encode(questions)
+
+        return self.normaliz_vec(_vectors)
+
+    def normaliz_vec(self, vec_list) -> np.ndarray:
+        """
+        标准化向量列表(整批矩阵运算)
+
+        @param {np.ndarray|list} vec_list - 通过bert产生的向量矩阵，每行为一个向量
+
+        @returns {np.ndarray} - 标准化后的向量矩阵
+        """
+        _vectors = np.asarray(vec_list, dtype=np.float32)
+        if _vectors.ndim == 1:
+            _vectors = _vectors.reshape(1, -1)
+
+        _norms = np.linalg.norm(_vectors, axis=1, keepdims=True)
+        _norms[_norms == 0] = 1.0  # 避免零向量除零
+        return _vectors / _norms
+
+    def to_milvus_records(self, vectors) -> list:
+        """
+        将向量转换为Milvus接口要求的记录格式
+
+        @param {np.ndarray} vectors - 向量矩阵，或单个向量
+
+        @returns {list} - [[float, ...], ...]
+        """
+        # pymilvus只接受python的list对象，仅在调用Milvus时进行转换
+        _vectors = np.asarray(vectors)
+        if _vectors.ndim == 1:
+            _vectors = _vectors.reshape(1, -1)
+
+        return _vectors.tolist()
 
     #############################
     # 公共函数
@@ -178,16 +292,29 @@ class QAManager(object):
         """
         if self.load_para:
             _judge_dict = dict()
+            _judge_map = dict()  # 判断表, key为(word, word_class), value为True-肯定, False-否定
             _query = NlpSureJudgeDict.select()
             for _row in _query:
                 _judge_dict.setdefault(_row.sign, {})
                 _judge_dict[_row.sign].setdefault(_row.word_class, [])
                 _judge_dict[_row.sign][_row.word_class].append(_row.word)
+                if _row.sign == 'negative':
+                    # 同时存在肯定和否定的词以否定为准
+                    _judge_map[(_row.word, _row.word_class)] = False
+                elif _row.sign == 'sure':
+                    _judge_map.setdefault((_row.word, _row.word_class), True)
 
             # 添加到内存
             self.DATA_MANAGER_PARA['nlp_sure_judge_dict'] = _judge_dict
+            self.DATA_MANAGER_PARA['nlp_sure_judge_map'] = _judge_map
             self._log_debug('Load nlp_sure_judge_dict success:\n%s' % str(_judge_dict))
 
+    def load_answer_catalog(self):
+        """
+        装载标准问题及答案到内存目录
+        """
+        self.answer_catalog.load()
+
     def load_nlp_purpos_config_dict(self):
         """
         加载意图匹配字典
@@ -242,10 +369,45 @@ class QAManager(object):
                         str(_row.collection), str(_row.partition), _row.action, traceback.format_exc()
                     ))
 
+            # 生成匹配索引
+            for _collection_dict in _pupos_config.values():
+                for _partition_dict in _collection_dict.values():
+                    self._build_purpos_match_index(_partition_dict)
+
             # 添加到内存
             self.DATA_MANAGER_PARA['nlp_purpos_config_dict'] = _pupos_config
             self._log_debug('Load nlp_purpos_config_dict success:\n%s' % str(_pupos_config))
 
+    def _build_purpos_match_index(self, partition_dict: dict):
+        """
+        生成意图匹配的词索引(由词直接找到意图，无需逐个意图遍历词清单)
+
+        @param {dict} partition_dict - 场景的意图配置字典，生成的索引将放入该字典
+            exact_match_index : 精确匹配索引，{'case': {问句: [(顺序, action), ...]}, 'ignorecase': {...}}
+            match_index : 分词匹配索引，{'case': {词: [(顺序, action, word_scale), ...]}, 'ignorecase': {...}}
+            注：顺序为意图在配置有序字典中的位置，匹配到多个意图时按该顺序返回
+        """
+        _exact_match_index = {'case': dict(), 'ignorecase': dict()}
+        _pos = 0
+        for _action, _config in partition_dict['exact_match'].items():
+            _index = _exact_match_index['ignorecase' if _config[1] else 'case']
+            for _word in set(_config[0]):
+                _index.setdefault(_word, list()).append((_pos, _action))
+
+            _pos += 1
+
+        _match_index = {'case': dict(), 'ignorecase': dict()}
+        _pos = 0
+        for _action, _config in partition_dict['match'].items():
+            _index = _match_index['ignorecase' if _config[1] else 'case']
+            for _word in set(_config[0]):
+                _index.setdefault(_word, list()).append((_pos, _action, _config[2]))
+
+            _pos += 1
+
+        partition_dict['exact_match_index'] = _exact_match_index
+        partition_dict['match_index'] = _match_index
+
     def add_collection(self, collection: str, order_num: int = 0, remark: str = ''):
         """
         新增问题分类
@@ -294,6 +456,11 @@ class QAManager(object):
                 'Delete std_question with collection [%s] success: %s' % (collection, str(_ret))
             )
 
+            # 重新装载内存目录
+            self.load_answer_catalog()
+
+        self._notify_data_change('delete_collection')
+
     def switch_collection_order(self, collection_a: str, collection_b: str):
         """
         交换两个问题分类的顺序位置
@@ -408,7 +575,7 @@ class QAManager(object):
         # 获取问题的向量值
         with self.get_bert_client() as _bert, self.get_milvus() as _milvus:
             _vectors = _bert.encode([question, ])
-            _question_vectors = self.normaliz_vec(_vectors.tolist())
+            _question_vectors = self.normaliz_vec(_vectors)
             self._log_debug('get question vectors: %s' % str(len(_question_vectors)))
 
             # 存入Milvus服务, 先创建分类
@@ -443,6 +610,12 @@ class QAManager(object):
             # 提交事务
             _txn.commit()
 
+        # 登记到内存目录
+        self.answer_catalog.add_std_question(
+            _std_q, Answer.get_or_none(Answer.std_question_id == _std_q.id)
+        )
+        self._notify_data_change('add_std_question')
+
         # 返回结果
         self._log_debug('insert question: %s' % str(_std_q))
         return _std_q.id
@@ -465,7 +638,7 @@ class QAManager(object):
         # 获取问题的向量值
         with self.get_bert_client() as _bert:
             _vectors = _bert.encode([question, ])
-            _question_vectors = self.normaliz_vec(_vectors.tolist())
+            _question_vectors = self.normaliz_vec(_vectors)
             self._log_debug('get question vectors: %s' % str(len(_question_vectors)))
 
         # 存入Milvus服务
@@ -482,6 +655,10 @@ class QAManager(object):
             question=question
         )
 
+        # 登记到内存目录
+        self.answer_catalog.add_ext_question(_ext_q, _std_q)
+        self._notify_data_change('add_ext_question')
+
         # 返回结果
         self._log_debug('insert question: %s' % str(_ext_q))
         return _ext_q.id
@@ -493,7 +670,13 @@ class QAManager(object):
         @param {str} file_path - 文件路径
         @param {bool} reset_questions=False - 是否重置问题库（删除所有问题数据）
         """
-        with pd.io.excel.ExcelFile(file_path) as _excel_io, self.get_milvus() as _milvus, self.get_bert_client() as _bert:
+        with pd.io.excel.ExcelFile(file_path, engine=self.excel_engine) as _excel_io, contextlib.ExitStack() as _stack:
+            _milvus, _bert = None, None
+            if not self.import_pipeline_para.get('enable', False):
+                # 顺序导入时整个过程复用同一组连接，流水线模式由各阶段线程自行获取连接
+                _milvus = _stack.enter_context(self.get_milvus())
+                _bert = _stack.enter_context(self.get_bert_client())
+
             # 重置数据库
             if reset_questions:
                 self.truncate_all_questions()
@@ -525,6 +708,10 @@ class QAManager(object):
             self._import_upload_file_config_by_xls(
                 _excel_io, _milvus, _bert, _std_question_id_mapping)
 
+        # 重新装载内存目录
+        self.load_answer_catalog()
+        self._notify_data_change('import_questions_by_xls')
+
     def truncate_all_questions(self):
         """
         清空所有问题组(慎用)
@@ -539,8 +726,9 @@ class QAManager(object):
                         _milvus.drop_collection(_collection), 'drop_collection'
                     )
 
-        # 等待5秒删除
-        time.sleep(5)
+        # 等待5秒删除(进程内向量检索库无需等待)
+        if self.vector_store is None:
+            time.sleep(5)
 
         # 重建所有数据表（相当于清除数据）
         AnswerDao.drop_tables(ANSWERDB_TABLES)
@@ -548,6 +736,8 @@ class QAManager(object):
 
         # 清空清单
         self.sorted_collection = list()
+        self.answer_catalog.clear()
+        self._notify_data_change('truncate_all_questions')
         self._log_info('truncate_all_questions suceess!')
 
     def delete_milvus_collection(self, collections: list = [], truncate: bool = False):
@@ -591,11 +781,84 @@ class QAManager(object):
         AnswerDao.drop_tables(SECURITY_TABLES)
         AnswerDao.create_tables(ANSWERDB_TABLES)
         AnswerDao.create_tables(SECURITY_TABLES)
+        self.answer_catalog.clear()
+        self._notify_data_change('reset_db')
         self._log_info('reset database suceess!')
 
     #############################
     # 内部函数
     #############################
+    def _notify_data_change(self, action: str):
+        """
+        通知问题数据已变更
+
+        @param {str} action - 变更操作名
+        """
+        for _fun in self._data_change_listeners:
+            try:
+                _fun(action)
+            except:
+                self._log_error('notify data change [%s] error: %s' % (action, traceback.format_exc()))
+
+    def _create_milvus(self) -> mv.Milvus:
+        """
+        创建milvus连接对象
+
+        @returns {Milvus} - 返回Milvus对象(使用进程内向量检索库时返回接口一致的访问对象)
+        """
+        if self.vector_store is not None:
+            return self.vector_store.get_client()
+
+        return mv.Milvus(
+            host=self.milvus_para['host'], port=self.milvus_para['port'],
+            pool=self.milvus_para.get('pool', 'SingletonThread')
+        )
+
+    def _check_milvus(self, milvus: mv.Milvus) -> bool:
+        """
+        检查milvus连接是否可用
+
+        @param {Milvus} milvus - Milvus对象
+
+        @returns {bool} - 是否可用
+        """
+        _status, _ = milvus.server_status()
+        return _status.OK()
+
+    def _create_bert_client(self) -> BertClient:
+        """
+        创建bert客户端
+
+        @returns {BertClient} - 返回bert客户端
+        """
+        return BertClient(**self.bert_para)
+
+    def _check_bert_client(self, bert: BertClient) -> bool:
+        """
+        检查bert客户端是否可用
+
+        @param {BertClient} bert - bert客户端
+
+        @returns {bool} - 是否可用
+        """
+        # 客户端默认的timeout为-1(一直等待)，检查时临时使用有限的超时时间，服务端无响应将抛出TimeoutError
+        _timeout = bert.timeout
+        bert.timeout = int(self.bert_check_timeout * 1000)
+        try:
+            bert.server_status
+        finally:
+            bert.timeout = _timeout
+
+        return True
+
+    def _close_connection(self, conn):
+        """
+        关闭milvus或bert的连接
+
+        @param {Milvus|BertClient} conn - 连接对象
+        """
+        conn.close()
+
     def _get_sorted_collection_list(self) -> list:
         """
         获取已排序的问题分类清单
@@ -620,55 +883,56 @@ class QAManager(object):
         @param {int} order_num=0 - 顺序号, 越大越优先
         @param {str} remark='' - 备注信息
         """
-        if collection in self.sorted_collection:
-            # 无需再添加
-            self._log_debug('collection is exists: %s' % collection)
-            return
-
-        # 添加Milvus服务中的分类
-        _status, _exists = milvus.has_collection(collection)
-        self.confirm_milvus_status(_status, 'has_collection')
-
-        if not _exists:
-            # 创建分类
-            _param = {
-                'collection_name': collection,
-                'dimension': self.dimension,
-                'index_file_size': self.index_file_size,
-                'metric_type': self.metric_type,
-            }
-            self.confirm_milvus_status(
-                milvus.create_collection(_param), 'create_collection'
-            )
+        with self._collection_lock:
+            if collection in self.sorted_collection:
+                # 无需再添加
+                self._log_debug('collection is exists: %s' % collection)
+                return
+
+            # 添加Milvus服务中的分类
+            _status, _exists = milvus.has_collection(collection)
+            self.confirm_milvus_status(_status, 'has_collection')
+
+            if not _exists:
+                # 创建分类
+                _param = {
+                    'collection_name': collection,
+                    'dimension': self.dimension,
+                    'index_file_size': self.index_file_size,
+                    'metric_type': self.metric_type,
+                }
+                self.confirm_milvus_status(
+                    milvus.create_collection(_param), 'create_collection'
+                )
 
-            self._log_debug('added Milvus collection [%s]' % collection)
+                self._log_debug('added Milvus collection [%s]' % collection)
 
-            # 创建索引
-            _index_param = {'nlist': self.nlist}
-            self.confirm_milvus_status(
-                milvus.create_index(collection, mv.IndexType.IVF_SQ8, _index_param),
-                'create_index'
-            )
+                # 创建索引
+                _index_param = {'nlist': self.nlist}
+                self.confirm_milvus_status(
+                    milvus.create_index(collection, mv.IndexType.IVF_SQ8, _index_param),
+                    'create_index'
+                )
 
-            self._log_debug('added Milvus collection [%s] index' % collection)
+                self._log_debug('added Milvus collection [%s] index' % collection)
 
-        # 添加AnswerDB数据
-        _order_num_match = (CollectionOrder.select()
-                            .where(CollectionOrder.order_num == order_num)
-                            .count())
-        if _order_num_match > 0:
-            # 如果顺序号有被占用的情况原来的记录大于当前序号的都要加1
-            (CollectionOrder
-             .update(order_num=CollectionOrder.order_num + 1)
-             .where(CollectionOrder.order_num >= order_num)
-             .execute())
+            # 添加AnswerDB数据
+            _order_num_match = (CollectionOrder.select()
+                                .where(CollectionOrder.order_num == order_num)
+                                .count())
+            if _order_num_match > 0:
+                # 如果顺序号有被占用的情况原来的记录大于当前序号的都要加1
+                (CollectionOrder
+                 .update(order_num=CollectionOrder.order_num + 1)
+                 .where(CollectionOrder.order_num >= order_num)
+                 .execute())
 
-        CollectionOrder.create(collection=collection, order_num=order_num, remark=remark)
+            CollectionOrder.create(collection=collection, order_num=order_num, remark=remark)
 
-        self._log_debug('insert collection [%s] to AnswerDB' % collection)
+            self._log_debug('insert collection [%s] to AnswerDB' % collection)
 
-        # 将分类加入到内存排序队列中
-        self.sorted_collection.append(collection)
+            # 将分类加入到内存排序队列中
+            self.sorted_collection.append(collection)
 
     def _add_partition(self, collection: str, partition: str, milvus: mv.Milvus) -> None:
         """
@@ -678,20 +942,21 @@ class QAManager(object):
         @param {str} partition - 场景类
         @param {mv.Milvus} milvus - Milvus连接对象
         """
-        _status, _exists = milvus.has_partition(collection, partition)
-        self.confirm_milvus_status(_status, 'has_partition')
-        if not _exists:
-            # 创建场景
-            self.confirm_milvus_status(
-                milvus.create_partition(collection, partition), 'create_partition'
-            )
+        with self._collection_lock:
+            _status, _exists = milvus.has_partition(collection, partition)
+            self.confirm_milvus_status(_status, 'has_partition')
+            if not _exists:
+                # 创建场景
+                self.confirm_milvus_status(
+                    milvus.create_partition(collection, partition), 'create_partition'
+                )
 
     def _add_milvus_question(self, question_vector, collection: str, partition: str,
                              milvus: mv.Milvus) -> int:
         """
         添加标准问题
 
-        @param {object} question_vector - 问题向量
+        @param {np.ndarray} question_vector - 问题向量
         @param {str} collection - 问题分类
         @param {str} partition - 场景
         @param {mv.Milvus} milvus - Milvus服务连接对象
@@ -699,12 +964,31 @@ class QAManager(object):
         @returns {int} - 返回milvus_id
         """
         _status, _milvus_ids = milvus.insert(
-            collection, [question_vector, ], partition_tag=partition)
+            collection, self.to_milvus_records(question_vector), partition_tag=partition)
         self.confirm_milvus_status(_status, 'insert')
         self._log_debug('insert _milvus_ids: %s' % str(_milvus_ids))
 
         return _milvus_ids[0]
 
+    def _add_milvus_questions(self, question_vectors: np.ndarray, collection: str, partition: str,
+                              milvus: mv.Milvus) -> list:
+        """
+        批量添加问题向量
+
+        @param {np.ndarray} question_vectors - 问题向量矩阵
+        @param {str} collection - 问题分类
+        @param {str} partition - 场景
+        @param {mv.Milvus} milvus - Milvus服务连接对象
+
+        @returns {list} - 返回与向量顺序对应的milvus_id清单
+        """
+        _status, _milvus_ids = milvus.insert(
+            collection, self.to_milvus_records(question_vectors), partition_tag=partition)
+        self.confirm_milvus_status(_status, 'insert')
+        self._log_debug('insert _milvus_ids: %s' % str(_milvus_ids))
+
+        return _milvus_ids
+
     #############################
     # 数据导入处理相关函数
     #############################
@@ -728,17 +1012,18 @@ class QAManager(object):
             _df = None  # 没有获取到指定的页
 
         if _df is not None:
-            for _index, _row in _df.iterrows():
-                # 逐行添加分类集, _index为行，_row为数据集
-                try:
-                    self._add_collection(
-                        _row['collection'], milvus,
-                        order_num=_row['order_num'], remark=_row['remark']
-                    )
-                except:
-                    self._log_error('import collection [%s] [%s] error: %s' % (
-                        _row['collection'], _row['remark'], traceback.format_exc()
-                    ))
+            with self.get_milvus() as milvus:
+                for _index, _row in _df.iterrows():
+                    # 逐行添加分类集, _index为行，_row为数据集
+                    try:
+                        self._add_collection(
+                            _row['collection'], milvus,
+                            order_num=_row['order_num'], remark=_row['remark']
+                        )
+                    except:
+                        self._log_error('import collection [%s] [%s] error: %s' % (
+                            _row['collection'], _row['remark'], traceback.format_exc()
+                        ))
 
             self._log_debug('imported collection: %s' % str(_df))
 
@@ -753,82 +1038,68 @@ class QAManager(object):
         @ return {dict} - 标准问题id映射字典
         """
         _std_question_id_mapping = dict()  # 标准问题excel上的id和真实id的映射关系
-        try:
-            # 读取标题行
-            _df_header = pd.read_excel(
-                excel_io, sheet_name='StdQuestions', nrows=0, engine=self.excel_engine
-            )
-        except:
-            _df_header = None  # 没有获取到指定的页
-
-        if _df_header is not None:
-            _skiprows = 1  # 跳过的记录数
-            _columns = {i: col for i, col in enumerate(_df_header.columns.tolist())}
-            while True:
-                # 循环处理
-                _df = pd.read_excel(
-                    excel_io, sheet_name='StdQuestions', nrows=self.excel_batch_num,
-                    header=None, skiprows=_skiprows, engine=self.excel_engine
-                )
-                _skiprows += self.excel_batch_num
-
-                if not _df.shape[0]:
-                    # 获取不到数据
-                    break
-
-                # 变更标题
-                _df.rename(columns=_columns, inplace=True)
-
-                # 批量处理问题分类
-                _array_collection = np.unique(_df['collection'].values).tolist()
-                for _collection in _array_collection:
-                    self._add_collection(_collection, milvus)
-
-                # 批量处理场景, 去除nan的值
-                _array_partition = [
-                    x for x in _df[['collection', 'partition']].values if str(x[1]) != 'nan'
-                ]
-                _array_partition = list(set([tuple(t) for t in _array_partition]))  # 二维去重
-                for _partition in _array_partition:
-                    self._add_partition(_partition[0], _partition[1], milvus)
-
-                # 批量生成向量
-                _vectors = bert.encode(_df['question'].values.tolist())
-                _question_vectors = self.normaliz_vec(_vectors.tolist())
-                self._log_debug('get std_questions[%d] bert vectors, count: %s' % (
-                    _skiprows, str(len(_question_vectors))))
+        if ExcelTool.has_sheet(excel_io, 'StdQuestions'):
+            def persist_fun(item):
+                # 写入一批数据
+                _skiprows, _df, _question_vectors = item
+                with self.get_milvus() as milvus:
+                    # 批量处理问题分类
+                    _array_collection = np.unique(_df['collection'].values).tolist()
+                    for _collection in _array_collection:
+                        self._add_collection(_collection, milvus)
+
+                    # 批量处理场景, 去除nan的值
+                    _array_partition = [
+                        x for x in _df[['collection', 'partition']].values if str(x[1]) != 'nan'
+                    ]
+                    _array_partition = list(set([tuple(t) for t in _array_partition]))  # 二维去重
+                    for _partition in _array_partition:
+                        self._add_partition(_partition[0], _partition[1], milvus)
+
+                    if self.excel_bulk_insert:
+                        # 批量写入
+                        self._bulk_import_std_questions(
+                            _df, _question_vectors, milvus, _std_question_id_mapping
+                        )
+                        self._log_debug('imported std_question[%d]: %s' % (_skiprows, str(_df)))
+                        return _df.shape[0]
+
+                    for _index, _row in _df.iterrows():
+                        # 逐行添加标准问题, _index为行，_row为数据集
+                        try:
+                            _partition = _row['partition'] if str(
+                                _row['partition']) != 'nan' and _row['partition'] != '' else None
+
+                            if str(_row['milvus_id']) == 'nan':
+                                _milvus_id = self._add_milvus_question(
+                                    _question_vectors[_index], _row['collection'],
+                                    _partition, milvus
+                                )
+                            else:
+                                _milvus_id = int(_row['milvus_id'])
+
+                            # 插入标准问题
+                            _std_q = StdQuestion.create(
+                                tag=_row['partition'] if str(_row['partition']) != 'nan' else '',
+                                q_type=_row['q_type'], milvus_id=_milvus_id, collection=_row['collection'],
+                                partition=('' if _partition is None else _partition),
+                                question=_row['question']
+                            )
 
-                for _index, _row in _df.iterrows():
-                    # 逐行添加标准问题, _index为行，_row为数据集
-                    try:
-                        _partition = _row['partition'] if str(
-                            _row['partition']) != 'nan' and _row['partition'] != '' else None
+                            # 插入映射关系
+                            if str(_row['id']) != 'nan':
+                                _std_question_id_mapping[_row['id']] = _std_q.id
+                        except:
+                            self._log_error('imported std_question [id: %s] [%s] error: %s' % (
+                                str(_row['id']), _row['question'], traceback.format_exc()
+                            ))
 
-                        if str(_row['milvus_id']) == 'nan':
-                            _milvus_id = self._add_milvus_question(
-                                _question_vectors[_index], _row['collection'],
-                                _partition, milvus
-                            )
-                        else:
-                            _milvus_id = int(_row['milvus_id'])
-
-                        # 插入标准问题
-                        _std_q = StdQuestion.create(
-                            tag=_row['partition'] if str(_row['partition']) != 'nan' else '',
-                            q_type=_row['q_type'], milvus_id=_milvus_id, collection=_row['collection'],
-                            partition=('' if _partition is None else _partition),
-                            question=_row['question']
-                        )
+                    self._log_debug('imported std_question[%d]: %s' % (_skiprows, str(_df)))
 
-                        # 插入映射关系
-                        if str(_row['id']) != 'nan':
-                            _std_question_id_mapping[_row['id']] = _std_q.id
-                    except:
-                        self._log_error('imported std_question [id: %s] [%s] error: %s' % (
-                            str(_row['id']), _row['question'], traceback.format_exc()
-                        ))
+                return _df.shape[0]
 
-                self._log_debug('imported std_question[%d]: %s' % (_skiprows, str(_df)))
+            # 通过流水线导入
+            self._run_import_pipeline('StdQuestions', excel_io, persist_fun, with_encode=True)
 
         # 返回映射
         return _std_question_id_mapping
@@ -843,15 +1114,7 @@ class QAManager(object):
         @param {BertClient} bert - bert服务连接对象
         @param {dict} std_question_id_mapping - 标准问题id映射字典
         """
-        try:
-            # 读取标题行
-            _df_header = pd.read_excel(
-                excel_io, sheet_name='Answers', nrows=0, engine=self.excel_engine
-            )
-        except:
-            _df_header = None  # 没有获取到指定的页
-
-        if _df_header is not None:
+        if ExcelTool.has_sheet(excel_io, 'Answers'):
             # 定义替换变量函数
             def replace_var_fun(m):
                 _match_str = m.group(0)
@@ -873,22 +1136,14 @@ class QAManager(object):
                 # 没有匹配到
                 return _match_str
 
-            _skiprows = 1  # 跳过的记录数
-            _columns = {i: col for i, col in enumerate(_df_header.columns.tolist())}
-            while True:
-                # 循环处理
-                _df = pd.read_excel(
-                    excel_io, sheet_name='Answers', nrows=self.excel_batch_num,
-                    header=None, skiprows=_skiprows, engine=self.excel_engine
-                )
-                _skiprows += self.excel_batch_num
-
-                if not _df.shape[0]:
-                    # 获取不到数据
-                    break
-
-                # 变更标题
-                _df.rename(columns=_columns, inplace=True)
+            def persist_fun(item):
+                # 写入一批数据
+                _skiprows, _df = item
+                if self.excel_bulk_insert:
+                    # 批量写入
+                    self._bulk_import_answers(_df, std_question_id_mapping, replace_var_fun)
+                    self._log_debug('imported answers[%d]: %s' % (_skiprows, str(_df)))
+                    return _df.shape[0]
 
                 for _index, _row in _df.iterrows():
                     # 逐行添加标准问题答案, _index为行，_row为数据集
@@ -911,6 +1166,11 @@ class QAManager(object):
 
                 self._log_debug('imported answers[%d]: %s' % (_skiprows, str(_df)))
 
+                return _df.shape[0]
+
+            # 通过流水线导入
+            self._run_import_pipeline('Answers', excel_io, persist_fun, with_encode=False)
+
     def _import_ext_questions_by_xls(self, excel_io, milvus: mv.Milvus, bert: BertClient,
                                      std_question_id_mapping: dict):
         """
@@ -921,62 +1181,322 @@ class QAManager(object):
         @param {BertClient} bert - bert服务连接对象
         @param {dict} std_question_id_mapping - 标准问题id映射字典
         """
-        try:
-            # 读取标题行
-            _df_header = pd.read_excel(
-                excel_io, sheet_name='ExtQuestions', nrows=0, engine=self.excel_engine
+        if ExcelTool.has_sheet(excel_io, 'ExtQuestions'):
+            def persist_fun(item):
+                # 写入一批数据
+                _skiprows, _df, _question_vectors = item
+                with self.get_milvus() as milvus:
+                    if self.excel_bulk_insert:
+                        # 批量写入
+                        self._bulk_import_ext_questions(
+                            _df, _question_vectors, milvus, std_question_id_mapping
+                        )
+                        self._log_debug('imported ext_questions[%d]: %s' % (_skiprows, str(_df)))
+                        return _df.shape[0]
+
+                    for _index, _row in _df.iterrows():
+                        # 逐行添加扩展问题, _index为行，_row为数据集
+                        try:
+                            _std_question_id = std_question_id_mapping.get(
+                                _row['std_question_id'], _row['std_question_id']
+                            )
+                            _std_q = StdQuestion.get_or_none(StdQuestion.id == _std_question_id)
+
+                            _milvus_id = self._add_milvus_question(
+                                _question_vectors[_index], _std_q.collection,
+                                None if _std_q.partition == '' else _std_q.partition,
+                                milvus
+                            )
+
+                            ExtQuestion.create(
+                                milvus_id=_milvus_id, std_question_id=_std_question_id,
+                                question=_row['question']
+                            )
+                        except:
+                            self._log_error('imported ext_question [id: %s] [%s] error: %s' % (
+                                str(_row['std_question_id']), _row['question'], traceback.format_exc()
+                            ))
+
+                    self._log_debug('imported ext_questions[%d]: %s' % (_skiprows, str(_df)))
+
+                return _df.shape[0]
+
+            # 通过流水线导入
+            self._run_import_pipeline('ExtQuestions', excel_io, persist_fun, with_encode=True)
+
+    def _run_import_pipeline(self, sheet_name: str, excel_io, persist_fun, with_encode: bool = True) -> dict:
+        """
+        通过流水线导入Excel页数据(解析 -> 编码 -> 写入)
+
+        @param {str} sheet_name - 页名
+        @param {object} excel_io - pd.io.excel.ExcelFile的IO文件
+        @param {function} persist_fun - 写入一批数据的函数，返回写入的记录数
+            with_encode为True时入参为(_skiprows, _df, _question_vectors)，否则为(_skiprows, _df)
+        @param {bool} with_encode=True - 是否需要对question列生成向量
+
+        @returns {dict} - 流水线统计信息
+        """
+        def parse_fun():
+            # 解析阶段，按批读取数据
+            _skiprows = 1  # 已读取到的行数
+            for _df in ExcelTool.read_sheet_by_batch(
+                excel_io, sheet_name, self.excel_batch_num, engine=self.excel_engine
+            ):
+                # 每批数据的index从0开始
+                _skiprows += _df.shape[0]
+                yield (_skiprows, _df)
+
+        def encode_fun(item):
+            # 编码阶段，批量生成向量
+            _skiprows, _df = item
+            with self.get_bert_client() as _bert:
+                _vectors = _bert.encode(_df['question'].values.tolist())
+
+            _question_vectors = self.normaliz_vec(_vectors)
+            self._log_debug('get %s[%d] bert vectors, count: %s' % (
+                sheet_name, _skiprows, str(len(_question_vectors))))
+            return (_skiprows, _df, _question_vectors)
+
+        _pipeline = ImportPipeline(
+            sheet_name, parse_fun, encode_fun if with_encode else None, persist_fun,
+            enable=self.import_pipeline_para.get('enable', False),
+            encode_thread_num=self.import_pipeline_para.get('encode_thread_num', 1),
+            persist_thread_num=self.import_pipeline_para.get('persist_thread_num', 1),
+            queue_size=self.import_pipeline_para.get('queue_size', 2),
+            database=self.database, logger=self.logger
+        )
+        return _pipeline.run()
+
+    def _bulk_import_std_questions(self, df: pd.DataFrame, question_vectors: np.ndarray,
+                                   milvus: mv.Milvus, std_question_id_mapping: dict):
+        """
+        批量导入一批标准问题
+
+        @param {pd.DataFrame} df - 要导入的数据
+        @param {np.ndarray} question_vectors - 问题向量矩阵，行与df的index对应
+        @param {Milvus} milvus - Milvus连接对象
+        @param {dict} std_question_id_mapping - 标准问题id映射字典，导入后将更新映射关系
+        """
+        def log_row_error(index, error):
+            self._log_error('imported std_question [id: %s] [%s] error: %s' % (
+                str(df.at[index, 'id']), df.at[index, 'question'], error
+            ))
+
+        # 整理数据
+        _rows = dict()  # key为df的index, value为要插入的数据字典
+        _milvus_groups = dict()  # 需要生成milvus_id的分组, key为(collection, partition), value为index清单
+        for _index, _row in df.iterrows():
+            try:
+                _partition = _row['partition'] if str(
+                    _row['partition']) != 'nan' and _row['partition'] != '' else None
+                _rows[_index] = {
+                    'tag': _row['partition'] if str(_row['partition']) != 'nan' else '',
+                    'q_type': _row['q_type'], 'milvus_id': None, 'collection': _row['collection'],
+                    'partition': ('' if _partition is None else _partition),
+                    'question': _row['question']
+                }
+                if str(_row['milvus_id']) == 'nan':
+                    _milvus_groups.setdefault((_row['collection'], _partition), list()).append(_index)
+                else:
+                    _rows[_index]['milvus_id'] = int(_row['milvus_id'])
+            except:
+                _rows.pop(_index, None)
+                log_row_error(_index, traceback.format_exc())
+
+        # 按分类及场景批量插入向量
+        _bulk_index = list()  # 批量插入数据库的记录
+        for _key in list(_milvus_groups.keys()):
+            _index_list = _milvus_groups[_key]
+            try:
+                _milvus_ids = self._add_milvus_questions(
+                    question_vectors[_index_list], _key[0], _key[1], milvus
+                )
+            except:
+                _error = traceback.format_exc()
+                for _index in _index_list:
+                    _rows.pop(_index)
+                    log_row_error(_index, _error)
+
+                _milvus_groups.pop(_key)
+                continue
+
+            for _i in range(len(_index_list)):
+                _rows[_index_list[_i]]['milvus_id'] = _milvus_ids[_i]
+            _bulk_index.extend(_index_list)
+
+        # 指定了milvus_id的记录逐条插入(milvus_id可能重复，无法通过milvus_id反查记录id)
+        _std_question_ids = dict()  # key为df的index, value为标准问题id
+        for _index, _data in _rows.items():
+            if _data['milvus_id'] is None or _index in _bulk_index:
+                continue
+
+            try:
+                _std_question_ids[_index] = StdQuestion.create(**_data).id
+            except:
+                log_row_error(_index, traceback.format_exc())
+
+        # 批量插入数据库
+        _ids = self._bulk_create(
+            StdQuestion, [_rows[_index] for _index in _bulk_index],
+            lambda i, error: log_row_error(_bulk_index[i], error)
+        )
+        if _ids is None:
+            # 批量插入成功，通过milvus_id反查标准问题id
+            for _key, _index_list in _milvus_groups.items():
+                _milvus_id_index = {_rows[_index]['milvus_id']: _index for _index in _index_list}
+                _query = StdQuestion.select(StdQuestion.id, StdQuestion.milvus_id).where(
+                    (StdQuestion.collection == _key[0]) & (
+                        StdQuestion.partition == ('' if _key[1] is None else _key[1])) & (
+                        StdQuestion.milvus_id.in_(list(_milvus_id_index.keys())))
+                )
+                for _std_q in _query:
+                    _std_question_ids[_milvus_id_index[_std_q.milvus_id]] = _std_q.id
+        else:
+            for _i in range(len(_bulk_index)):
+                if _ids[_i] is not None:
+                    _std_question_ids[_bulk_index[_i]] = _ids[_i]
+
+        # 插入映射关系
+        for _index, _id in _std_question_ids.items():
+            if str(df.at[_index, 'id']) != 'nan':
+                std_question_id_mapping[df.at[_index, 'id']] = _id
+
+    def _bulk_import_answers(self, df: pd.DataFrame, std_question_id_mapping: dict, replace_var_fun):
+        """
+        批量导入一批标准问题答案
+
+        @param {pd.DataFrame} df - 要导入的数据
+        @param {dict} std_question_id_mapping - 标准问题id映射字典
+        @param {function} replace_var_fun - 替换type_param变量的函数
+        """
+        _rows = list()
+        for _index, _row in df.iterrows():
+            try:
+                _std_question_id = std_question_id_mapping.get(
+                    _row['std_question_id'], _row['std_question_id']
+                )
+                _type_param = re.sub(
+                    r'\{\$.+?\$\}', replace_var_fun, str(_row['type_param']), re.M
+                )
+                _rows.append({
+                    'std_question_id': _std_question_id, 'a_type': _row['a_type'],
+                    'type_param': _type_param, 'replace_pre_def': _row['replace_pre_def'],
+                    'answer': _row['answer']
+                })
+            except:
+                self._log_error('imported answer [id: %s] [%s] error: %s' % (
+                    str(_row['std_question_id']), _row['answer'], traceback.format_exc()
+                ))
+
+        self._bulk_create(
+            Answer, _rows,
+            lambda i, error: self._log_error('imported answer [id: %s] [%s] error: %s' % (
+                str(_rows[i]['std_question_id']), _rows[i]['answer'], error
+            ))
+        )
+
+    def _bulk_import_ext_questions(self, df: pd.DataFrame, question_vectors: np.ndarray,
+                                   milvus: mv.Milvus, std_question_id_mapping: dict):
+        """
+        批量导入一批扩展问题
+
+        @param {pd.DataFrame} df - 要导入的数据
+        @param {np.ndarray} question_vectors - 问题向量矩阵，行与df的index对应
+        @param {Milvus} milvus - Milvus连接对象
+        @param {dict} std_question_id_mapping - 标准问题id映射字典
+        """
+        def log_row_error(index, error):
+            self._log_error('imported ext_question [id: %s] [%s] error: %s' % (
+                str(df.at[index, 'std_question_id']), df.at[index, 'question'], error
+            ))
+
+        # 一次查出本批对应的所有标准问题
+        _std_question_ids = dict()  # key为df的index, value为标准问题id
+        for _index, _row in df.iterrows():
+            _std_question_ids[_index] = std_question_id_mapping.get(
+                _row['std_question_id'], _row['std_question_id']
             )
-        except:
-            _df_header = None  # 没有获取到指定的页
-
-        if _df_header is not None:
-            _skiprows = 1  # 跳过的记录数
-            _columns = {i: col for i, col in enumerate(_df_header.columns.tolist())}
-            while True:
-                # 循环处理
-                _df = pd.read_excel(
-                    excel_io, sheet_name='ExtQuestions', nrows=self.excel_batch_num,
-                    header=None, skiprows=_skiprows, engine=self.excel_engine
+
+        _std_q_dict = {
+            _std_q.id: _std_q for _std_q in StdQuestion.select().where(
+                StdQuestion.id.in_(list(set(_std_question_ids.values())))
+            )
+        }
+
+        # 按分类及场景分组
+        _milvus_groups = dict()  # key为(collection, partition), value为index清单
+        for _index, _std_question_id in _std_question_ids.items():
+            _std_q = _std_q_dict.get(_std_question_id, None)
+            if _std_q is None:
+                log_row_error(_index, 'StdQuestion has not id [%s]' % str(_std_question_id))
+                continue
+
+            _milvus_groups.setdefault(
+                (_std_q.collection, None if _std_q.partition == '' else _std_q.partition), list()
+            ).append(_index)
+
+        # 批量插入向量
+        _rows = list()
+        _row_index = list()
+        for _key, _index_list in _milvus_groups.items():
+            try:
+                _milvus_ids = self._add_milvus_questions(
+                    question_vectors[_index_list], _key[0], _key[1], milvus
                 )
-                _skiprows += self.excel_batch_num
+            except:
+                _error = traceback.format_exc()
+                for _index in _index_list:
+                    log_row_error(_index, _error)
+                continue
+
+            for _i in range(len(_index_list)):
+                _rows.append({
+                    'milvus_id': _milvus_ids[_i], 'std_question_id': _std_question_ids[_index_list[_i]],
+                    'question': df.at[_index_list[_i], 'question']
+                })
+                _row_index.append(_index_list[_i])
+
+        # 批量插入数据库
+        self._bulk_create(
+            ExtQuestion, _rows,
+            lambda i, error: log_row_error(_row_index[i], error)
+        )
 
-                if not _df.shape[0]:
-                    # 获取不到数据
-                    break
+    def _bulk_create(self, model, rows: list, error_fun, chunk_size: int = 100):
+        """
+        在一个事务中批量插入数据库记录，失败时改为逐条插入
 
-                # 变更标题
-                _df.rename(columns=_columns, inplace=True)
+        @param {BaseModel} model - 数据表模型
+        @param {list} rows - 要插入的数据字典清单
+        @param {function} error_fun - 逐条插入失败的处理函数，格式为fun(i, error)
+            i为失败记录在rows中的位置，error为异常信息
+        @param {int} chunk_size=100 - 每条insert语句插入的记录数
 
-                # 批量生成向量
-                _vectors = bert.encode(_df['question'].values.tolist())
-                _question_vectors = self.normaliz_vec(_vectors.tolist())
-                self._log_debug('get ext_questions[%d] bert vectors count: %s' % (
-                    _skiprows, str(len(_question_vectors))))
+        @returns {list} - 批量插入成功返回None；改为逐条插入时返回与rows对应的记录id清单，失败的记录为None
+        """
+        if len(rows) == 0:
+            return None
 
-                for _index, _row in _df.iterrows():
-                    # 逐行添加扩展问题, _index为行，_row为数据集
-                    try:
-                        _std_question_id = std_question_id_mapping.get(
-                            _row['std_question_id'], _row['std_question_id']
-                        )
-                        _std_q = StdQuestion.get_or_none(StdQuestion.id == _std_question_id)
+        try:
+            with self.database.atomic():
+                for _chunk in pw.chunked(rows, chunk_size):
+                    model.insert_many(_chunk).execute()
 
-                        _milvus_id = self._add_milvus_question(
-                            _question_vectors[_index], _std_q.collection,
-                            None if _std_q.partition == '' else _std_q.partition,
-                            milvus
-                        )
+            return None
+        except:
+            self._log_debug('bulk insert [%s] error, change to insert one by one: %s' % (
+                model.__name__, traceback.format_exc()
+            ))
 
-                        ExtQuestion.create(
-                            milvus_id=_milvus_id, std_question_id=_std_question_id,
-                            question=_row['question']
-                        )
-                    except:
-                        self._log_error('imported ext_question [id: %s] [%s] error: %s' % (
-                            str(_row['std_question_id']), _row['question'], traceback.format_exc()
-                        ))
+        _ids = list()
+        for _i in range(len(rows)):
+            try:
+                _ids.append(model.create(**rows[_i]).get_id())
+            except:
+                _ids.append(None)
+                error_fun(_i, traceback.format_exc())
 
-                self._log_debug('imported ext_questions[%d]: %s' % (_skiprows, str(_df)))
+        return _ids
 
     def _import_common_para_by_xls(self, excel_io, milvus: mv.Milvus, bert: BertClient):
         """
@@ -1059,15 +1579,7 @@ class QAManager(object):
         @param {BertClient} bert - bert服务连接对象
         @param {dict} std_question_id_mapping - 标准问题id映射字典
         """
-        try:
-            # 读取标题行
-            _df_header = pd.read_excel(
-                excel_io, sheet_name='NlpPurposConfigDict', nrows=0, engine=self.excel_engine
-            )
-        except:
-            _df_header = None  # 没有获取到指定的页
-
-        if _df_header is not None:
+        if ExcelTool.has_sheet(excel_io, 'NlpPurposConfigDict'):
             # 定义替换变量函数
             def replace_var_fun(m):
                 _match_str = m.group(0)
@@ -1089,22 +1601,12 @@ class QAManager(object):
                 # 没有匹配到
                 return _match_str
 
-            _skiprows = 1  # 跳过的记录数
-            _columns = {i: col for i, col in enumerate(_df_header.columns.tolist())}
-            while True:
-                # 循环处理
-                _df = pd.read_excel(
-                    excel_io, sheet_name='NlpPurposConfigDict', nrows=self.excel_batch_num,
-                    header=None, skiprows=_skiprows, engine=self.excel_engine
-                )
-                _skiprows += self.excel_batch_num
-
-                if not _df.shape[0]:
-                    # 获取不到数据
-                    break
-
-                # 变更标题
-                _df.rename(columns=_columns, inplace=True)
+            _skiprows = 1  # 已读取到的行数
+            for _df in ExcelTool.read_sheet_by_batch(
+                excel_io, 'NlpPurposConfigDict', self.excel_batch_num, engine=self.excel_engine
+            ):
+                # 循环处理, 每批数据的index从0开始
+                _skiprows += _df.shape[0]
 
                 for _index, _row in _df.iterrows():
                     # 逐行添加标准问题答案, _index为行，_row为数据集
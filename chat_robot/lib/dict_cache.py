@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+分词词典缓存
+@module dict_cache
+@file dict_cache.py
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import pickle
+import hashlib
+import tempfile
+import traceback
+import jieba
+import jieba.finalseg
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'dict_cache'  # 模块名
+__DESCRIPT__ = u'分词词典缓存'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class JiebaDictCache(object):
+    """
+    Jieba分词词典缓存
+    将装载用户词典后的前缀词典序列化到文件，下次启动直接装载，无需重新解析默认词典及逐个添加用户词
+    注：缓存文件以(jieba版本, 词典文件路径/修改时间/大小)生成版本号，词典文件变更后自动重建
+    """
+
+    CACHE_FILE_PREFIX = 'jieba_dict.'  # 缓存文件名前缀
+    CACHE_FILE_SUFFIX = '.cache'  # 缓存文件名后缀
+
+    def __init__(self, cache_path: str, logger=None):
+        """
+        Jieba分词词典缓存
+
+        @param {str} cache_path - 缓存文件存放目录
+        @param {Logger} logger=None - 日志对象
+        """
+        self.cache_path = cache_path
+        self.logger = logger
+
+    #############################
+    # 公共函数
+    #############################
+    def load(self, set_dictionary: str = None, user_dicts: list = None) -> bool:
+        """
+        装载分词词典(优先从缓存装载，缓存不存在或版本不一致时重新生成并保存缓存)
+
+        @param {str} set_dictionary=None - 默认词典地址，不传代表使用jieba自带词典
+        @param {list} user_dicts=None - 用户词典地址清单
+
+        @returns {bool} - 是否从缓存装载
+        """
+        _user_dicts = list() if user_dicts is None else list(user_dicts)
+        if set_dictionary is not None:
+            jieba.set_dictionary(set_dictionary)
+
+        _start = time.perf_counter()
+        _cache_file = os.path.join(
+            self.cache_path, '%s%s%s' % (
+                self.CACHE_FILE_PREFIX, self.get_version(set_dictionary, _user_dicts),
+                self.CACHE_FILE_SUFFIX
+            )
+        )
+
+        if os.path.isfile(_cache_file):
+            try:
+                with open(_cache_file, 'rb') as _file:
+                    _freq, _total, _tag_tab, _force_split = pickle.load(_file)
+
+                with jieba.dt.lock:
+                    jieba.dt.FREQ = _freq
+                    jieba.dt.total = _total
+                    jieba.dt.user_word_tag_tab = _tag_tab
+                    jieba.dt.initialized = True
+                jieba.finalseg.Force_Split_Words.update(_force_split)
+
+                self._log_info('load jieba dict from cache [%s]: %.3fs' % (
+                    _cache_file, time.perf_counter() - _start))
+                return True
+            except:
+                self._log_error('load jieba dict cache [%s] error, rebuild: %s' % (
+                    _cache_file, traceback.format_exc()))
+
+        # 重新生成词典
+        jieba.initialize()
+        _force_split_before = set(jieba.finalseg.Force_Split_Words)
+        for _user_dict in _user_dicts:
+            jieba.load_userdict(_user_dict)
+
+        self._save(
+            _cache_file, (
+                jieba.dt.FREQ, jieba.dt.total, dict(jieba.dt.user_word_tag_tab),
+                set(jieba.finalseg.Force_Split_Words) - _force_split_before
+            )
+        )
+        self._log_info('build jieba dict cache [%s]: %.3fs' % (_cache_file, time.perf_counter() - _start))
+        return False
+
+    def get_version(self, set_dictionary: str = None, user_dicts: list = None) -> str:
+        """
+        获取词典版本号
+
+        @param {str} set_dictionary=None - 默认词典地址，不传代表使用jieba自带词典
+        @param {list} user_dicts=None - 用户词典地址清单
+
+        @returns {str} - 版本号(md5)
+        """
+        _files = [
+            os.path.join(os.path.dirname(jieba.__file__), jieba.DEFAULT_DICT_NAME)
+            if set_dictionary is None else set_dictionary
+        ]
+        _files.extend([] if user_dicts is None else user_dicts)
+
+        _info = [jieba.__version__]
+        for _file in _files:
+            _path = os.path.abspath(_file)
+            _stat = os.stat(_path)
+            _info.append([_path, _stat.st_mtime, _stat.st_size])
+
+        return hashlib.md5(json.dumps(_info, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    #############################
+    # 内部函数
+    #############################
+    def _save(self, cache_file: str, data: tuple):
+        """
+        保存缓存文件(先写临时文件再替换，并清除旧版本的缓存文件)
+
+        @param {str} cache_file - 缓存文件
+        @param {tuple} data - 要保存的词典数据
+        """
+        try:
+            if not os.path.exists(self.cache_path):
+                os.makedirs(self.cache_path, exist_ok=True)
+
+            _fd, _temp_file = tempfile.mkstemp(dir=self.cache_path)
+            with os.fdopen(_fd, 'wb') as _file:
+                pickle.dump(data, _file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(_temp_file, cache_file)
+
+            for _file in glob.glob(os.path.join(
+                self.cache_path, '%s*%s' % (self.CACHE_FILE_PREFIX, self.CACHE_FILE_SUFFIX)
+            )):
+                if _file != cache_file:
+                    os.remove(_file)
+        except:
+            self._log_error('save jieba dict cache [%s] error: %s' % (cache_file, traceback.format_exc()))
+
+    def _log_info(self, msg: str, *args, **kwargs):
+        """
+        输出info日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.info(msg, *args, **kwargs)
+
+    def _log_error(self, msg: str, *args, **kwargs):
+        """
+        输出error日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.error(msg, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Excel流式读取工具
+@module excel_tool
+@file excel_tool.py
+"""
+
+import os
+import sys
+import datetime
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'excel_tool'  # 模块名
+__DESCRIPT__ = u'Excel流式读取工具'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class ExcelTool(object):
+    """
+    Excel流式读取工具
+    每个页只顺序解析一次，按批返回DataFrame，避免使用pd.read_excel(skiprows)分批读取时每批都从头解析
+    注：只有xlrd及openpyxl引擎支持流式读取，其他引擎(例如odf)一次性解析整页后分批返回
+    """
+
+    STREAM_ENGINES = ('openpyxl', 'xlrd')  # 支持流式读取的引擎
+
+    @classmethod
+    def has_sheet(cls, excel_io, sheet_name: str) -> bool:
+        """
+        判断Excel文件是否有指定的页
+
+        @param {object} excel_io - pd.io.excel.ExcelFile的IO文件
+        @param {str} sheet_name - 页名
+
+        @returns {bool} - 是否存在
+        """
+        return sheet_name in excel_io.sheet_names
+
+    @classmethod
+    def read_sheet_by_batch(cls, excel_io, sheet_name: str, batch_num: int = 100, engine: str = None):
+        """
+        按批读取Excel页数据(生成器)
+
+        @param {object} excel_io - pd.io.excel.ExcelFile的IO文件
+        @param {str} sheet_name - 页名, 页的第一行为标题行
+        @param {int} batch_num=100 - 每批返回的记录数
+        @param {str} engine=None - 读取引擎，必须与打开excel_io的引擎一致，不传代表使用excel_io的引擎
+
+        @returns {pd.DataFrame} - 逐批返回数据，列名为标题行，index从0开始
+            注：数据的转换规则(空值为nan、整数的浮点数转为int等)与pd.read_excel一致
+
+        @throws {ValueError} - 指定的引擎与excel_io的引擎不一致时抛出异常
+        """
+        # 页对象由打开文件时的引擎创建，无法使用其他引擎读取
+        if engine is not None and engine != excel_io.engine:
+            raise ValueError('engine [%s] is not the engine [%s] which opened the excel file!' % (
+                engine, excel_io.engine))
+
+        if not cls.has_sheet(excel_io, sheet_name):
+            return
+
+        if excel_io.engine not in cls.STREAM_ENGINES:
+            # 其他引擎不支持流式读取，一次性解析后分批返回
+            _rows = cls._iter_dataframe_rows(
+                pd.read_excel(excel_io, sheet_name=sheet_name, header=None)
+            )
+        elif excel_io.engine == 'openpyxl':
+            _rows = cls._iter_openpyxl_rows(excel_io.book[sheet_name])
+        else:
+            _rows = cls._iter_xlrd_rows(excel_io.book, excel_io.book.sheet_by_name(sheet_name))
+
+        _header = next(_rows, None)
+        if _header is None:
+            # 空页
+            return
+
+        # 去掉标题行末尾的空列
+        _header = list(_header)
+        while len(_header) > 0 and _header[-1] == '':
+            _header.pop()
+
+        _col_num = len(_header)
+        _batch = list()
+        for _row in _rows:
+            # 补齐或截断列数，与标题行保持一致
+            if len(_row) < _col_num:
+                _row = list(_row) + [''] * (_col_num - len(_row))
+            elif len(_row) > _col_num:
+                _row = _row[0: _col_num]
+
+            _batch.append(_row)
+            if len(_batch) >= batch_num:
+                _df = cls._rows_to_dataframe(_header, _batch)
+                _batch = list()
+                if _df.shape[0] > 0:
+                    yield _df
+
+        if len(_batch) > 0:
+            _df = cls._rows_to_dataframe(_header, _batch)
+            if _df.shape[0] > 0:
+                yield _df
+
+    #############################
+    # 内部函数
+    #############################
+    @classmethod
+    def _rows_to_dataframe(cls, header: list, rows: list) -> pd.DataFrame:
+        """
+        将行数据转换为DataFrame(使用pandas解析Excel相同的处理方式)
+
+        @param {list} header - 标题行
+        @param {list} rows - 数据行清单
+
+        @returns {pd.DataFrame} - 转换后的数据
+        """
+        _parser = TextParser([header, ] + rows, header=0)
+        return _parser.read()
+
+    @classmethod
+    def _iter_openpyxl_rows(cls, sheet):
+        """
+        逐行获取openpyxl页的数据
+
+        @param {Worksheet} sheet - 页对象
+
+        @returns {list} - 逐行返回数据
+        """
+        for _row in sheet.iter_rows(values_only=True):
+            _values = list()
+            for _value in _row:
+                if _value is None:
+                    _value = ''
+                elif type(_value) == float and _value.is_integer():
+                    _value = int(_value)
+
+                _values.append(_value)
+
+            yield _values
+
+    @classmethod
+    def _iter_xlrd_rows(cls, book, sheet):
+        """
+        逐行获取xlrd页的数据
+
+        @param {xlrd.Book} book - Excel文件对象
+        @param {xlrd.Sheet} sheet - 页对象
+
+        @returns {list} - 逐行返回数据
+        """
+        import xlrd
+        for _row in sheet.get_rows():
+            _values = list()
+            for _cell in _row:
+                _value = _cell.value
+                if _cell.ctype == xlrd.XL_CELL_DATE:
+                    try:
+                        _value = xlrd.xldate.xldate_as_datetime(_value, book.datemode)
+                        if _value.date() == datetime.date(1899, 12, 31) or (
+                            _value.date() == datetime.date(1900, 1, 1)
+                        ):
+                            # 只有时间的情况
+                            _value = _value.time()
+                    except:
+                        pass
+                elif _cell.ctype == xlrd.XL_CELL_ERROR:
+                    _value = np.nan
+                elif _cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    _value = bool(_value)
+                elif _cell.ctype == xlrd.XL_CELL_NUMBER and float(_value).is_integer():
+                    _value = int(_value)
+
+                _values.append(_value)
+
+            yield _values
+
+    @classmethod
+    def _iter_dataframe_rows(cls, df: pd.DataFrame):
+        """
+        逐行获取DataFrame的数据
+
+        @param {pd.DataFrame} df - 没有标题的DataFrame
+
+        @returns {list} - 逐行返回数据
+        """
+        for _row in df.itertuples(index=False, name=None):
+            yield ['' if (type(_value) == float and np.isnan(_value)) else _value for _value in _row]
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
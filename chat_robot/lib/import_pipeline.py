@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+数据导入流水线
+@module import_pipeline
+@file import_pipeline.py
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import traceback
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'import_pipeline'  # 模块名
+__DESCRIPT__ = u'数据导入流水线'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+# 流水线结束标志
+_PIPELINE_END = object()
+
+
+class ImportPipeline(object):
+    """
+    数据导入流水线
+    将导入处理分为解析(parse)、编码(encode)、写入(persist)三个阶段，阶段之间通过有界队列连接，
+    各阶段并行处理不同批次的数据：写入第k批的同时编码第k+1批，并解析第k+2批
+    """
+
+    def __init__(self, name: str, parse_fun, encode_fun, persist_fun, enable: bool = True,
+                 encode_thread_num: int = 1, persist_thread_num: int = 1, queue_size: int = 2,
+                 database=None, logger=None):
+        """
+        数据导入流水线
+
+        @param {str} name - 流水线名称，用于日志输出
+        @param {function} parse_fun - 解析函数，无入参，返回逐批数据的迭代器
+        @param {function} encode_fun - 编码函数，入参为解析阶段的一批数据，返回编码后的数据；传None代表无需编码
+        @param {function} persist_fun - 写入函数，入参为编码阶段返回的一批数据，返回写入的记录数
+        @param {bool} enable=True - 是否启用流水线，不启用则在当前线程按顺序逐批处理
+        @param {int} encode_thread_num=1 - 编码阶段的并发线程数
+        @param {int} persist_thread_num=1 - 写入阶段的并发线程数
+        @param {int} queue_size=2 - 阶段之间队列的最大批次数，队列满时上游阶段将等待(背压)
+        @param {peewee.Database} database=None - 数据库对象，传入后编码及写入线程将在connection_context中执行，
+            线程结束时归还数据库连接(连接池模式下避免连接泄漏)
+        @param {Logger} logger=None - 日志对象
+        """
+        self.name = name
+        self.parse_fun = parse_fun
+        self.encode_fun = encode_fun
+        self.persist_fun = persist_fun
+        self.enable = enable
+        self.encode_thread_num = max(1, encode_thread_num)
+        self.persist_thread_num = max(1, persist_thread_num)
+        self.queue_size = max(1, queue_size)
+        self.database = database
+        self.logger = logger
+
+        # 统计信息
+        self._stat_lock = threading.Lock()
+        self._stats = {
+            'batch_count': 0,  # 完成写入的批次数
+            'row_count': 0,  # 完成写入的记录数
+            'parse_time': 0.0,  # 解析阶段累计耗时
+            'encode_time': 0.0,  # 编码阶段累计耗时
+            'persist_time': 0.0,  # 写入阶段累计耗时
+            'total_time': 0.0,  # 总耗时
+        }
+
+        # 出现异常时的处理
+        self._stop = False
+        self._exception = None
+
+    #############################
+    # 公共函数
+    #############################
+    def run(self) -> dict:
+        """
+        执行导入(处理完成后返回)
+
+        @returns {dict} - 统计信息字典
+            batch_count : 完成写入的批次数
+            row_count : 完成写入的记录数
+            parse_time : 解析阶段累计耗时(秒)
+            encode_time : 编码阶段累计耗时(秒)
+            persist_time : 写入阶段累计耗时(秒)
+            total_time : 总耗时(秒)
+            rows_per_second : 每秒写入记录数
+        """
+        _start = time.time()
+        if self.enable:
+            self._run_pipeline()
+        else:
+            self._run_sequence()
+
+        self._stats['total_time'] = time.time() - _start
+        self._stats['rows_per_second'] = (
+            0.0 if self._stats['total_time'] == 0 else self._stats['row_count'] / self._stats['total_time']
+        )
+        self._log_info(
+            'import pipeline [%s] finished: batch[%d] rows[%d] total[%.3fs] parse[%.3fs] encode[%.3fs] persist[%.3fs] rows/s[%.1f]' % (
+                self.name, self._stats['batch_count'], self._stats['row_count'], self._stats['total_time'],
+                self._stats['parse_time'], self._stats['encode_time'], self._stats['persist_time'],
+                self._stats['rows_per_second']
+            )
+        )
+
+        if self._exception is not None:
+            raise self._exception
+
+        return self._stats
+
+    #############################
+    # 内部函数
+    #############################
+    def _run_sequence(self):
+        """
+        在当前线程按顺序逐批处理
+        """
+        _iter = iter(self.parse_fun())
+        while True:
+            _item = self._stage_call('parse_time', next, _iter, _PIPELINE_END)
+            if _item is _PIPELINE_END:
+                break
+
+            if self.encode_fun is not None:
+                _item = self._stage_call('encode_time', self.encode_fun, _item)
+
+            self._persist(_item)
+
+    def _run_pipeline(self):
+        """
+        通过多线程流水线处理
+        """
+        _encode_queue = queue.Queue(maxsize=self.queue_size)
+        _persist_queue = queue.Queue(maxsize=self.queue_size)
+
+        # 启动写入线程
+        _persist_threads = self._start_threads(
+            'persist', self.persist_thread_num, self._persist_thread_fun, _persist_queue
+        )
+
+        # 启动编码线程
+        _encode_threads = list()
+        if self.encode_fun is not None:
+            _encode_threads = self._start_threads(
+                'encode', self.encode_thread_num, self._encode_thread_fun, _encode_queue, _persist_queue
+            )
+        else:
+            # 不需要编码，解析结果直接送入写入队列
+            _encode_queue = _persist_queue
+
+        # 在当前线程解析
+        try:
+            _iter = iter(self.parse_fun())
+            while not self._stop:
+                _item = self._stage_call('parse_time', next, _iter, _PIPELINE_END)
+                if _item is _PIPELINE_END:
+                    break
+
+                self._put(_encode_queue, _item)
+        except Exception as e:
+            self._set_exception(e)
+
+        # 通知下游结束
+        if self.encode_fun is not None:
+            self._finish_stage(_encode_queue, _encode_threads)
+
+        self._finish_stage(_persist_queue, _persist_threads)
+
+    def _start_threads(self, stage: str, thread_num: int, target, *args) -> list:
+        """
+        启动阶段处理线程
+
+        @param {str} stage - 阶段名
+        @param {int} thread_num - 线程数
+        @param {function} target - 线程函数
+        @param {tuple} args - 线程函数参数
+
+        @returns {list} - 线程清单
+        """
+        _threads = list()
+        for _i in range(thread_num):
+            _thread = threading.Thread(
+                target=self._thread_run, args=(target, ) + args, name='Thread-Import-%s-%s-%d' % (self.name, stage, _i),
+                daemon=True
+            )
+            _thread.start()
+            _threads.append(_thread)
+
+        return _threads
+
+    def _thread_run(self, target, *args):
+        """
+        阶段线程的执行入口(有数据库对象时在connection_context中执行)
+
+        @param {function} target - 线程函数
+        @param {tuple} args - 线程函数参数
+        """
+        if self.database is None:
+            target(*args)
+            return
+
+        with self.database.connection_context():
+            target(*args)
+
+    def _finish_stage(self, in_queue: queue.Queue, threads: list):
+        """
+        通知阶段结束并等待线程完成
+
+        @param {queue.Queue} in_queue - 阶段的输入队列
+        @param {list} threads - 阶段的线程清单
+        """
+        for _i in range(len(threads)):
+            in_queue.put(_PIPELINE_END)
+
+        for _thread in threads:
+            _thread.join()
+
+    def _encode_thread_fun(self, in_queue: queue.Queue, out_queue: queue.Queue):
+        """
+        编码阶段线程
+
+        @param {queue.Queue} in_queue - 输入队列
+        @param {queue.Queue} out_queue - 输出队列
+        """
+        while True:
+            _item = in_queue.get()
+            if _item is _PIPELINE_END:
+                break
+
+            if self._stop:
+                # 出现异常，只消费队列不处理
+                continue
+
+            try:
+                self._put(out_queue, self._stage_call('encode_time', self.encode_fun, _item))
+            except Exception as e:
+                self._set_exception(e)
+
+    def _persist_thread_fun(self, in_queue: queue.Queue):
+        """
+        写入阶段线程
+
+        @param {queue.Queue} in_queue - 输入队列
+        """
+        while True:
+            _item = in_queue.get()
+            if _item is _PIPELINE_END:
+                break
+
+            if self._stop:
+                continue
+
+            try:
+                self._persist(_item)
+            except Exception as e:
+                self._set_exception(e)
+
+    def _persist(self, item):
+        """
+        写入一批数据并登记统计信息
+
+        @param {object} item - 要写入的数据
+        """
+        _rows = self._stage_call('persist_time', self.persist_fun, item)
+        with self._stat_lock:
+            self._stats['batch_count'] += 1
+            self._stats['row_count'] += (0 if _rows is None else _rows)
+
+    def _put(self, out_queue: queue.Queue, item):
+        """
+        放入下游队列，队列满时等待(出现异常时放弃)
+
+        @param {queue.Queue} out_queue - 下游队列
+        @param {object} item - 数据
+        """
+        while not self._stop:
+            try:
+                out_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _stage_call(self, stat_key: str, fun, *args):
+        """
+        执行阶段函数并登记耗时
+
+        @param {str} stat_key - 统计耗时的key
+        @param {function} fun - 要执行的函数
+        @param {tuple} args - 函数参数
+
+        @returns {object} - 函数返回值
+        """
+        _start = time.time()
+        try:
+            return fun(*args)
+        finally:
+            with self._stat_lock:
+                self._stats[stat_key] += time.time() - _start
+
+    def _set_exception(self, e: Exception):
+        """
+        登记异常并停止流水线
+
+        @param {Exception} e - 异常对象
+        """
+        self._log_error('import pipeline [%s] error: %s' % (self.name, traceback.format_exc()))
+        with self._stat_lock:
+            if self._exception is None:
+                self._exception = e
+
+        self._stop = True
+
+    def _log_info(self, msg: str, *args, **kwargs):
+        """
+        输出info日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.info(msg, *args, **kwargs)
+
+    def _log_error(self, msg: str, *args, **kwargs):
+        """
+        输出error日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.error(msg, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
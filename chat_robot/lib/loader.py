@@ -17,9 +17,11 @@ import sys
 import inspect
 import datetime
 import math
+import time
+import traceback
 import redis
 from flask_cors import CORS
-from flask import Flask, request, send_file, jsonify
+from flask import Flask, Response, request, send_file, jsonify
 from flask_restful import reqparse
 from werkzeug.routing import Rule, Map
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -35,6 +37,7 @@ from chat_robot.lib.answer_db import RestfulApiUser
 from chat_robot.lib.data_manager import QAManager
 from chat_robot.lib.qa import QA
 from chat_robot.lib.nlp import NLP
+from chat_robot.lib.metrics import Metrics
 
 
 __MOUDLE__ = 'loader'  # 模块名
@@ -58,6 +61,7 @@ class QAServerLoader(object):
         """
         self.debug = server_config.get('debug', True)
         self.execute_path = server_config['execute_path']
+        self.startup_timings = dict()  # 启动各阶段耗时(秒), key为阶段名
 
         # 日志处理
         self.logger: Logger = None
@@ -93,13 +97,25 @@ class QAServerLoader(object):
         self.extend_plugin_path = self.server_config.get('extend_plugin_path', '')
         self.plugins = dict()
 
+        # 进程内向量检索库的持久化目录
+        _milvus_config = self.server_config['milvus']
+        if _milvus_config.get('embedded_path', '').startswith('.'):
+            # 相对路径
+            _milvus_config['embedded_path'] = os.path.join(self.execute_path, _milvus_config['embedded_path'])
+
         # 装载数据管理模块
+        _start = time.perf_counter()
         self.qa_manager = QAManager(
             self.server_config['answerdb'], self.server_config['milvus'],
             self.server_config['bert_client'], logger=self.logger,
             excel_batch_num=self.server_config['excel_batch_num'],
-            excel_engine=self.server_config['excel_engine']
+            excel_engine=self.server_config['excel_engine'],
+            use_answer_catalog=self.server_config.get('use_answer_catalog', False),
+            bert_batch_para=self.server_config.get('bert_batch', None),
+            excel_bulk_insert=self.server_config.get('excel_bulk_insert', False),
+            import_pipeline_para=self.server_config.get('import_pipeline', None)
         )
+        self._record_startup_phase('qa_manager', _start)
 
         # 装载NLP
         _nlp_config = self.server_config['nlp_config']
@@ -115,27 +131,43 @@ class QAServerLoader(object):
             if _set_dictionary.startswith('.'):
                 # 相对路径
                 _set_dictionary = os.path.join(self.execute_path, _set_dictionary)
+        _dict_cache_path = _nlp_config.get('dict_cache_path', '')
+        if _dict_cache_path == '':
+            _dict_cache_path = None
+        elif _dict_cache_path.startswith('.'):
+            # 相对路径
+            _dict_cache_path = os.path.join(self.execute_path, _dict_cache_path)
+
+        _start = time.perf_counter()
         self.nlp = NLP(
             plugins=self.plugins, data_manager_para=self.qa_manager.DATA_MANAGER_PARA,
-            set_dictionary=None if _nlp_config['set_dictionary'] == '' else _nlp_config['set_dictionary'],
+            set_dictionary=_set_dictionary,
             user_dict=_user_dict,
             enable_paddle=_nlp_config['enable_paddle'],
             parallel_num=_nlp_config.get('parallel_num', None),
+            cut_cache_size=_nlp_config.get('cut_cache_size', 10000),
+            worker_num=_nlp_config.get('worker_num', 0),
+            worker_timeout=_nlp_config.get('worker_timeout', 5.0),
+            dict_cache_path=_dict_cache_path,
             logger=self.logger
         )
+        self._record_startup_phase('nlp', _start)
 
         # 初始化QA模块
+        _start = time.perf_counter()
         self.qa = QA(
             self.qa_manager, self.nlp, self.server_config['execute_path'], plugins=self.plugins,
             qa_config=self.server_config['qa_config'], redis_config=self.server_config['redis'],
             logger=self.logger
         )
+        self._record_startup_phase('qa', _start)
 
         # 动态加载路由
         self.api_class = [Qa, QaDataManager]
 
         # 完成插件的加载
         # plugins函数字典，格式为{'type':{'class_name': {'fun_name': fun, }, },}
+        _start = time.perf_counter()
         self.load_plugins(os.path.join(self.execute_path, 'plugins'))
         if self.extend_plugin_path != '':
             if self.extend_plugin_path[0:1] == '.':
@@ -143,6 +175,7 @@ class QAServerLoader(object):
                 self.extend_plugin_path = os.path.join(self.execute_path, self.extend_plugin_path)
 
             self.load_plugins(self.extend_plugin_path)
+        self._record_startup_phase('plugins', _start)
 
         # 安全关联
         _security = self.server_config['security']
@@ -186,9 +219,28 @@ class QAServerLoader(object):
             )
             self.app.view_functions['client'] = self._client_view_function
 
+        # 增加性能指标路由(Prometheus文本格式)
+        Metrics.enable = self.server_config.get('enable_metrics', False)
+        if Metrics.enable:
+            self.app.url_map.add(
+                Rule('/metrics', endpoint='metrics', methods=['GET'])
+            )
+            self.app.view_functions['metrics'] = self._metrics_view_function
+
         FlaskTool.add_route_by_class(self.app, self.api_class)
         self._log_debug(str(self.app.url_map))
 
+        # 预热处理，建立连接及执行预热问题，避免重启后的请求耗时突增
+        _warmup_config = self.server_config.get('warmup', {})
+        if _warmup_config.get('enable', False):
+            self.warmup(
+                connection_num=_warmup_config.get('connection_num', 1),
+                questions=[
+                    _question.strip() for _question in _warmup_config.get('questions', '').split(',')
+                    if _question.strip() != ''
+                ]
+            )
+
     #############################
     # 公共函数
     #############################
@@ -199,6 +251,40 @@ class QAServerLoader(object):
         """
         self.app.run(**self.server_config['flask'])
 
+    def warmup(self, connection_num: int = 1, questions: list = None):
+        """
+        服务预热(出现异常只记录日志，不影响服务启动)
+
+        @param {int} connection_num=1 - 预先建立的Bert及Milvus连接数
+        @param {list} questions=None - 预热问题清单，将通过QA.quession_search执行
+        """
+        # 预先建立连接
+        _start = time.perf_counter()
+        for _pool in (self.qa_manager.bert_pool, self.qa_manager.milvus_pool):
+            try:
+                _pool.prefill(connection_num)
+            except:
+                self._log_error('warmup [%s] connection error: %s' % (_pool.name, traceback.format_exc()))
+        self._record_startup_phase('warmup_connections', _start)
+
+        # 执行预热问题，完成编码、检索、意图匹配及插件的首次调用
+        if questions is None or len(questions) == 0:
+            return
+
+        _start = time.perf_counter()
+        try:
+            _session_id = self.qa.generate_session({})
+            for _question in questions:
+                try:
+                    self.qa.quession_search(_question, session_id=_session_id)
+                except:
+                    self._log_error('warmup question [%s] error: %s' % (_question, traceback.format_exc()))
+
+            self.qa.delete_session(_session_id)
+        except:
+            self._log_error('warmup questions error: %s' % traceback.format_exc())
+        self._record_startup_phase('warmup_questions', _start)
+
     #############################
     # 安全认证相关处理
     #############################
@@ -353,6 +439,19 @@ class QAServerLoader(object):
     def _client_view_function(self):
         return self.app.send_static_file('index.html')  # index.html在static文件夹下
 
+    def _metrics_view_function(self):
+        return Response(Metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    def _record_startup_phase(self, phase: str, start: float):
+        """
+        登记启动阶段耗时并输出日志
+
+        @param {str} phase - 阶段名
+        @param {float} start - 阶段开始时间(time.perf_counter)
+        """
+        self.startup_timings[phase] = time.perf_counter() - start
+        self._log_info('startup phase [%s] cost: %.3fs' % (phase, self.startup_timings[phase]))
+
     def _log_info(self, msg: str, *args, **kwargs):
         """
         输出info日志
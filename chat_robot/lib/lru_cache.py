@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+带超时机制的LRU缓存
+@module lru_cache
+@file lru_cache.py
+"""
+
+import os
+import sys
+import time
+import threading
+import collections as cs
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'lru_cache'  # 模块名
+__DESCRIPT__ = u'带超时机制的LRU缓存'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class LRUCache(object):
+    """
+    带超时机制的LRU缓存(线程安全)
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 0):
+        """
+        带超时机制的LRU缓存
+
+        @param {int} max_size=10000 - 缓存的最大记录数，超过将淘汰最久未使用的记录
+        @param {float} ttl=0 - 缓存记录的有效时间(秒)，0代表不超时
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._cache = cs.OrderedDict()  # key为缓存key, value为[value, expire_time]
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        获取缓存值
+
+        @param {object} key - 缓存key
+        @param {object} default=None - 缓存不存在时返回的默认值
+
+        @returns {object} - 缓存值
+        """
+        with self._lock:
+            _item = self._cache.get(key, None)
+            if _item is not None and (_item[1] is None or _item[1] > time.time()):
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return _item[0]
+
+            if _item is not None:
+                # 已超时
+                del self._cache[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        设置缓存值
+
+        @param {object} key - 缓存key
+        @param {object} value - 缓存值
+        """
+        if self.max_size <= 0:
+            return
+
+        _expire = None if self.ttl <= 0 else time.time() + self.ttl
+        with self._lock:
+            self._cache[key] = [value, _expire]
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        @returns {dict} - 统计信息字典
+            size : 当前缓存记录数
+            hits : 命中次数
+            misses : 未命中次数
+        """
+        with self._lock:
+            return {'size': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._cache)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+处理性能指标统计
+@module metrics
+@file metrics.py
+"""
+
+import os
+import sys
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'metrics'  # 模块名
+__DESCRIPT__ = u'处理性能指标统计'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+# 耗时直方图的默认分桶(秒)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics(object):
+    """
+    处理性能指标统计(进程内全局)
+    支持计数器(counter)、仪表(gauge)和直方图(histogram)，可输出为Prometheus的文本格式
+    注：每次登记只是在内存中累加，可在生产环境常开
+    """
+
+    enable = False  # 是否启用统计，默认不启用，由服务装载时按enable_metrics配置开启
+
+    _lock = threading.Lock()
+    _help = dict()  # 指标说明, key为指标名, value为(type, help)
+    _counters = dict()  # 计数器, key为(指标名, labels), value为计数值
+    _gauges = dict()  # 仪表, key为(指标名, labels), value为当前值
+    _histograms = dict()  # 直方图, key为(指标名, labels), value为[分桶计数清单, 总和, 总数]
+    _buckets = dict()  # 直方图的分桶, key为指标名
+
+    #############################
+    # 公共函数
+    #############################
+    @classmethod
+    def register(cls, name: str, metric_type: str, help_str: str = '', buckets: tuple = None):
+        """
+        登记指标说明
+
+        @param {str} name - 指标名
+        @param {str} metric_type - 指标类型, counter、gauge或histogram
+        @param {str} help_str='' - 指标说明
+        @param {tuple} buckets=None - 直方图的分桶上限清单(升序)，不传使用默认分桶
+        """
+        with cls._lock:
+            cls._help[name] = (metric_type, help_str)
+            if metric_type == 'histogram':
+                cls._buckets[name] = tuple(DEFAULT_BUCKETS if buckets is None else buckets)
+
+    @classmethod
+    def inc(cls, name: str, value: float = 1, **labels):
+        """
+        计数器增加
+
+        @param {str} name - 指标名
+        @param {float} value=1 - 增加的值
+        @param {kwargs} labels - 指标标签
+        """
+        if not cls.enable:
+            return
+
+        _key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            cls._counters[_key] = cls._counters.get(_key, 0) + value
+
+    @classmethod
+    def set(cls, name: str, value: float, **labels):
+        """
+        设置仪表的当前值
+
+        @param {str} name - 指标名
+        @param {float} value - 当前值
+        @param {kwargs} labels - 指标标签
+        """
+        if not cls.enable:
+            return
+
+        _key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            cls._gauges[_key] = value
+
+    @classmethod
+    def observe(cls, name: str, value: float, **labels):
+        """
+        直方图登记观测值
+
+        @param {str} name - 指标名
+        @param {float} value - 观测值(耗时为秒)
+        @param {kwargs} labels - 指标标签
+        """
+        if not cls.enable:
+            return
+
+        _key = (name, tuple(sorted(labels.items())))
+        _buckets = cls._buckets.get(name, DEFAULT_BUCKETS)
+        _index = bisect.bisect_left(_buckets, value)
+        with cls._lock:
+            _item = cls._histograms.get(_key, None)
+            if _item is None:
+                _item = [[0] * (len(_buckets) + 1), 0.0, 0]
+                cls._histograms[_key] = _item
+
+            _item[0][_index] += 1
+            _item[1] += value
+            _item[2] += 1
+
+    @classmethod
+    @contextmanager
+    def timer(cls, name: str, **labels):
+        """
+        统计with语句内的执行耗时并登记到直方图(出现异常也登记)
+
+        @param {str} name - 指标名
+        @param {kwargs} labels - 指标标签
+        """
+        if not cls.enable:
+            yield
+            return
+
+        _start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.observe(name, time.perf_counter() - _start, **labels)
+
+    @classmethod
+    def clear(cls):
+        """
+        清空统计数据
+        """
+        with cls._lock:
+            cls._counters.clear()
+            cls._gauges.clear()
+            cls._histograms.clear()
+
+    @classmethod
+    def render(cls) -> str:
+        """
+        输出Prometheus文本格式的统计数据
+
+        @returns {str} - 统计数据文本
+        """
+        with cls._lock:
+            _counters = dict(cls._counters)
+            _counters.update(cls._gauges)  # 仪表与计数器的输出格式一致
+            _histograms = {_key: [list(_item[0]), _item[1], _item[2]]
+                           for _key, _item in cls._histograms.items()}
+
+        _lines = list()
+        _names = sorted(set([_key[0] for _key in _counters.keys()] + [_key[0] for _key in _histograms.keys()]))
+        for _name in _names:
+            _type, _help_str = cls._help.get(
+                _name, ('histogram' if _name in cls._buckets else 'counter', '')
+            )
+            if _help_str != '':
+                _lines.append('# HELP %s %s' % (_name, _help_str))
+            _lines.append('# TYPE %s %s' % (_name, _type))
+
+            for _key in sorted([_key for _key in _counters.keys() if _key[0] == _name]):
+                _lines.append('%s%s %s' % (_name, cls._format_labels(_key[1]), cls._format_value(_counters[_key])))
+
+            _buckets = cls._buckets.get(_name, DEFAULT_BUCKETS)
+            for _key in sorted([_key for _key in _histograms.keys() if _key[0] == _name]):
+                _counts, _sum, _count = _histograms[_key]
+                _cumulative = 0
+                for _i in range(len(_buckets)):
+                    _cumulative += _counts[_i]
+                    _lines.append('%s_bucket%s %d' % (
+                        _name, cls._format_labels(_key[1], le=cls._format_value(_buckets[_i])), _cumulative
+                    ))
+                _lines.append('%s_bucket%s %d' % (_name, cls._format_labels(_key[1], le='+Inf'), _count))
+                _lines.append('%s_sum%s %s' % (_name, cls._format_labels(_key[1]), cls._format_value(_sum)))
+                _lines.append('%s_count%s %d' % (_name, cls._format_labels(_key[1]), _count))
+
+        return '\n'.join(_lines) + '\n'
+
+    #############################
+    # 内部函数
+    #############################
+    @classmethod
+    def _format_labels(cls, labels: tuple, le: str = None) -> str:
+        """
+        格式化标签
+
+        @param {tuple} labels - 标签清单, ((name, value), ...)
+        @param {str} le=None - 直方图分桶标签
+
+        @returns {str} - 格式化后的标签字符串
+        """
+        _labels = list(labels)
+        if le is not None:
+            _labels.append(('le', le))
+
+        if len(_labels) == 0:
+            return ''
+
+        return '{%s}' % ','.join([
+            '%s="%s"' % (_name, str(_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for _name, _value in _labels
+        ])
+
+    @classmethod
+    def _format_value(cls, value) -> str:
+        """
+        格式化数值
+
+        @param {float} value - 数值
+
+        @returns {str} - 格式化后的字符串
+        """
+        if type(value) == int:
+            return str(value)
+
+        return repr(float(value))
+
+
+# 问答处理的指标说明
+Metrics.register('chat_robot_stage_seconds', 'histogram', 'QA pipeline stage latency in seconds')
+Metrics.register('chat_robot_milvus_search_seconds', 'histogram', 'Milvus search latency in seconds')
+Metrics.register('chat_robot_plugin_seconds', 'histogram', 'Plugin function latency in seconds')
+Metrics.register('chat_robot_match_cache_total', 'counter', 'Question match cache lookups')
+Metrics.register('chat_robot_match_result_total', 'counter', 'Question match outcomes')
+Metrics.register('chat_robot_redis_commands_total', 'counter', 'Redis round trips')
+Metrics.register('chat_robot_nlp_cut_cache_total', 'counter', 'Word segmentation cache lookups')
+Metrics.register('chat_robot_nlp_cut_saved_seconds_total', 'counter', 'Segmentation CPU seconds saved by the cache')
+Metrics.register(
+    'chat_robot_bert_batch_size', 'histogram', 'Questions per BERT batch encode call',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+Metrics.register(
+    'chat_robot_bert_batch_fill_ratio', 'histogram', 'BERT batch size divided by max_batch_size',
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+)
+Metrics.register('chat_robot_bert_batch_queue_depth', 'gauge', 'Questions waiting in the BERT batch queue')
+Metrics.register('chat_robot_bert_batch_total', 'counter', 'BERT batch encode calls')
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
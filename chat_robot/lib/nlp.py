@@ -60,6 +60,9 @@ un	未知词	不可识别词及用户自定义词组。取英文Unkonwn首两个
 import os
 import sys
 import re
+import time
+import traceback
+import itertools
 import collections as cs
 import jieba
 import jieba.posseg as pseg
@@ -67,6 +70,10 @@ from HiveNetLib.base_tools.run_tool import RunTool
 # 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from chat_robot.lib.metrics import Metrics
+from chat_robot.lib.lru_cache import LRUCache
+from chat_robot.lib.nlp_pool import NLPWorkerPool
+from chat_robot.lib.dict_cache import JiebaDictCache
 
 
 __MOUDLE__ = 'nlp'  # 模块名
@@ -83,7 +90,8 @@ class NLP(object):
 
     def __init__(self, plugins: dict = {}, data_manager_para: dict = {}, set_dictionary: str = None,
                  user_dict: str = None, enable_paddle=False,
-                 parallel_num: int = None, logger=None):
+                 parallel_num: int = None, cut_cache_size: int = 10000, worker_num: int = 0,
+                 worker_timeout: float = 5.0, dict_cache_path: str = None, logger=None):
         """
         构造函数
 
@@ -99,23 +107,54 @@ class NLP(object):
                 台中
         @param {bool} enable_paddle=False - 是否使用paddle模式训练模型进行分词
         @param {int} parallel_num=None - 并行分词模式(多行的情况下并行处理，不支持Windows)
+        @param {int} cut_cache_size=10000 - 分词结果缓存的最大记录数，0代表不缓存
+        @param {int} worker_num=0 - 分词及意图匹配的工作进程数，0代表在当前进程处理
+        @param {float} worker_timeout=5.0 - 等待工作进程处理结果的超时时间(秒)，超时将改为在当前进程处理
+        @param {str} dict_cache_path=None - 分词词典缓存目录，不传代表不使用缓存
         @param {Logger} logger=None - 日志对象
         """
         self.logger = logger
         self.plugins = plugins
         self.DATA_MANAGER_PARA = data_manager_para
 
-        if set_dictionary is not None:
-            jieba.set_dictionary(set_dictionary)
+        # 分词结果缓存, key为(语句, 词典版本, 币种标志清单), value为(分词结果, 分词耗时)
+        self.cut_cache = LRUCache(max_size=cut_cache_size)
+        self.dict_version = 0  # 词典版本，词典变更时增加
 
+        self.user_dicts = list()  # 已加载的用户词典清单
         if user_dict is not None:
-            jieba.load_userdict(user_dict)
+            self.user_dicts.append(user_dict)
+
+        # 装载词典，预先生成前缀词典，避免第一个问题等待
+        self.dict_cache_path = dict_cache_path
+        if dict_cache_path is not None:
+            JiebaDictCache(dict_cache_path, logger=self.logger).load(set_dictionary, self.user_dicts)
+        else:
+            if set_dictionary is not None:
+                jieba.set_dictionary(set_dictionary)
+
+            for _user_dict in self.user_dicts:
+                jieba.load_userdict(_user_dict)
+
+        jieba.initialize()
 
         self.enable_paddle = enable_paddle
         self.parallel_num = parallel_num
         if parallel_num is not None:
             jieba.enable_parallel(parallel_num)
 
+        # 工作进程池，在独立的进程中进行分词及意图匹配，不占用服务进程的GIL
+        self.worker_pool = None
+        if worker_num > 0:
+            self.worker_pool = NLPWorkerPool(
+                worker_num, {
+                    'set_dictionary': set_dictionary, 'user_dicts': self.user_dicts,
+                    'enable_paddle': enable_paddle, 'cut_cache_size': cut_cache_size,
+                    'dict_cache_path': dict_cache_path
+                },
+                self.DATA_MANAGER_PARA, timeout=worker_timeout, logger=self.logger
+            )
+
     #############################
     # 公共函数
     #############################
@@ -139,8 +178,6 @@ class NLP(object):
                 ...
             ]
         """
-        _purpose = list()
-        _question_len = len(question)
         _collection = collection
         _partition = partition
         if collection == '':
@@ -148,76 +185,121 @@ class NLP(object):
         if partition == '':
             _partition = None
 
-        if _question_len == 0:
+        if len(question) == 0:
             # 空语句不处理
-            return _purpose
+            return list()
+
+        # 分词及匹配意图
+        _purpose, _words_list = None, None
+        if self.worker_pool is not None:
+            try:
+                _purpose, _words_list = self.worker_pool.match_purposes(question, _collection, _partition)
+            except:
+                self._log_error('match purposes by worker pool error, use current process: %s' % traceback.format_exc())
+
+        if _purpose is None:
+            _purpose, _words_list = self.match_purposes(question, _collection, _partition)
 
-        _amount_sign_list = self.DATA_MANAGER_PARA.get(
-            'common_para', {}).get('amount_sign_list', ['$', '￥'])
+        _purpose_config_dict = self.DATA_MANAGER_PARA.get('nlp_purpos_config_dict', {})
+
+        # 进行意图的检查
+        _matched_purpose = []
+        for _pitem in _purpose:
+            _config = _purpose_config_dict[_collection
+                                           ][_partition]['actions'][_pitem['action']]
+            if len(_config['check']) > 0:
+                # 需要进行检查
+                _check_fun = self.plugins['nlpcheck'][_config['check'][0]][_config['check'][1]]
+                with Metrics.timer('chat_robot_plugin_seconds', plugin_type='nlpcheck',
+                                   plugin_class=_config['check'][0], plugin_fun=_config['check'][1]):
+                    _is_pass = _check_fun(
+                        question, _words_list,
+                        _pitem['action'], _pitem['match_word'], _pitem['match_type'],
+                        _pitem['collection'], _pitem['partition'],
+                        _config['std_question_id'], **_config['check'][2]
+                    )
+
+                if not _is_pass:
+                    # 检查未通过，继续检查下一个
+                    continue
+                else:
+                    _matched_purpose.append(_pitem)
+            else:
+                # 没有配置检查函数，视为检查通过
+                _matched_purpose.append(_pitem)
+
+            # 看看是否需要处理下一个
+            if not is_multiple and len(_matched_purpose) > 0:
+                # 只匹配第一个即可
+                break
+
+        # 获取意图特定信息
+        for _pitem in _matched_purpose:
+            _config = _purpose_config_dict[_collection
+                                           ][_partition]['actions'][_pitem['action']]
+
+            if len(_config['info']) > 0 and _pitem['match_type'] == 'nlp_match':
+                _get_info_fun = self.plugins['nlpinfo'][_config['info'][0]][_config['info'][1]]
+                with Metrics.timer('chat_robot_plugin_seconds', plugin_type='nlpinfo',
+                                   plugin_class=_config['info'][0], plugin_fun=_config['info'][1]):
+                    _info_dict = _get_info_fun(
+                        question, _words_list,
+                        _pitem['action'], _pitem['match_word'], _pitem['match_type'],
+                        _pitem['collection'], _pitem['partition'],
+                        _config['std_question_id'], **_config['info'][2]
+                    )
+                _pitem['info'].update(_info_dict)
+
+        self._log_debug('question: %s\n%s' % (question, str(_matched_purpose)))
+        return _matched_purpose
+
+    def match_purposes(self, question: str, collection: str = None, partition: str = None) -> tuple:
+        """
+        分词并匹配问题意图(不执行意图检查及获取意图信息的插件，可在工作进程中执行)
+
+        @param {str} question - 问题句子(不能为空)
+        @param {str} collection=None - 指定从特定的问题分类中分析
+        @param {str} partition=None - 指定从特定的问题场景中分析
+
+        @returns {list, tuple} - 按优先顺序排序的意图清单(格式参考analyse_purpose), 分词列表((word, flag), )
+        """
+        _purpose = list()
+        _question_len = len(question)
+        _collection = collection
+        _partition = partition
         _purpose_config_dict = self.DATA_MANAGER_PARA.get('nlp_purpos_config_dict', {})
 
         _matched_list = list()  # 匹配清单，用于控制不重复匹配
         _matched_in_s = list()  # 当前语句的匹配信息
 
-        # 精确匹配
-        _exact_match_dict = _purpose_config_dict[_collection][_partition]['exact_match']
-        for _temp_action in _exact_match_dict:
-            _temp_question = question.lower() if _exact_match_dict[_temp_action][1] else question
-            if _temp_question in _exact_match_dict[_temp_action][0]:
-                # 匹配到关键字
-                if _temp_action not in _matched_list:
-                    _matched_in_s.append([_temp_action, _temp_question, 'exact_match'])
-
-        # 分词匹配
-        _words = pseg.cut(question, use_paddle=self.enable_paddle)
-        _words_list = list()  # 完整的词典列表
-        _s_start = 0  # 当前语句开始
+        # 精确匹配, 通过索引直接找到匹配的意图
+        _exact_match_index = _purpose_config_dict[_collection][_partition]['exact_match_index']
+        _question_lower = question.lower()
+        _exact_matched = [
+            (_pos, _temp_action, question)
+            for _pos, _temp_action in _exact_match_index['case'].get(question, [])
+        ] + [
+            (_pos, _temp_action, _question_lower)
+            for _pos, _temp_action in _exact_match_index['ignorecase'].get(_question_lower, [])
+        ]
+        for _pos, _temp_action, _temp_question in sorted(_exact_matched):
+            # 匹配到关键字, 按意图的配置顺序处理
+            _matched_in_s.append([_temp_action, _temp_question, 'exact_match'])
+
+        # 分词匹配(分词结果通过缓存共享)
+        # 完整的词典列表, 是否语句结束标志, 用于匹配意图的词(合并前的词及合并过程中的词)
+        _words_list, _sentence_ends, _match_words = self._cut(question)
+        _sure_judge_map = self.DATA_MANAGER_PARA.get('nlp_sure_judge_map', {})
+        _is_sure = None  # 当前语句的肯定/否定判断
 
         # 循环分析句子
-        _word, _flag = _words.__next__()  # 当前词，作为开始
-        _last_word, _last_flag = '', ''  # 上一词
-        _next_word, _next_flag = '', ''  # 下一词
-        _stop_iter = False  # 是否结束循环
-        while True:
-            # 获取下一个词
-            try:
-                if not _stop_iter:
-                    _next_word, _next_flag = _words.__next__()
-                else:
-                    _next_word, _next_flag = '', ''
-            except StopIteration:
-                # 找不到, 打上退出循环的标记
-                _stop_iter = True
-                _next_word, _next_flag = '.', 'x'  # 增加一个句号，简化处理逻辑
-
-            # 处理_words_list
-            if _flag == 'm' and (_last_flag == 'm' or _last_word in _amount_sign_list):
-                # 上一个字是币种标志, 或者上一个字是数量, 合并到上一个词中
-                _word = _words_list[-1][0] + _word
-                _words_list[-1][0] = _word
-                _words_list[-1][1] = 'm'
-            elif _word == ',' and _last_flag == 'm' and _next_flag == 'm':
-                # m , m 的形式，统一合并到上一个词中
-                _word = _last_word + _word + _next_word
-                _flag = 'm'
-                _words_list[-1][0] = _word
-                _words_list[-1][1] = _flag
-                # 由于已经使用了next，再获取一次next
-                try:
-                    if not _stop_iter:
-                        _next_word, _next_flag = _words.__next__()
-                    else:
-                        _next_word, _next_flag = '', ''
-                except StopIteration:
-                    # 找不到, 打上退出循环的标记
-                    _stop_iter = True
-                    _next_word, _next_flag = '.', 'x'  # 增加一个句号，简化处理逻辑
-            else:
-                # 正常的新词, 添加到_words_list中
-                _words_list.append([_word, _flag])
+        for _index in range(len(_words_list)):
+            # 在同一次遍历中组合判断当前语句的肯定和否定
+            _is_sure = self._combine_is_sure(_is_sure, _sure_judge_map.get(_words_list[_index], None))
 
             # 匹配处理
-            if (_flag == 'x' and _word != ' ') or _word in ('.'):
+            if _sentence_ends[_index]:
+                _is_sure_str = self._is_sure_str(_is_sure)
                 for _action, _match_word, _match_type in _matched_in_s:
                     # 处理意图列表，注意这里也会有精确匹配的动作清单
                     _config = _purpose_config_dict[_collection][_partition]['actions'][_action]
@@ -227,17 +309,18 @@ class NLP(object):
                             'partition': _config['partition'],
                             'match_word': _match_word,
                             'match_type': _match_type,
-                            'is_sure': self._judge_is_sure(_words_list[_s_start: len(_words_list)]),
+                            'is_sure': _is_sure_str,
                             'order_num': _config['order_num'],
                             'std_question_id': _config['std_question_id'],
                             'info': {},
                         }
                     )
 
-                _s_start = len(_words_list)  # 指定下一句的开始位置
+                _is_sure = None  # 开始下一句的判断
                 _matched_in_s.clear()  # 清空当前语句的匹配数据
-            else:
-                # 使用词尝试匹配动作
+
+            # 使用词尝试匹配动作(合并前的词及合并过程中的每个词都进行匹配)
+            for _word in _match_words[_index]:
                 _temp_matched_list = self._match_purpose(
                     _word, _question_len, _collection, _partition)
                 for _action, _match_word in _temp_matched_list:
@@ -247,169 +330,207 @@ class NLP(object):
                             _matched_list.append(_action)  # 登记避免重复
                             _matched_in_s.append([_action, _match_word, 'nlp_match'])  # 标注是分词匹配模式的
 
-            # 进入下一轮循环
-            if _next_word == '':
-                break
-            else:
-                _last_word, _last_flag = _word, _flag
-                _word, _flag = _next_word, _next_flag
-                continue
-
         # 重新排序
         _purpose = sorted(_purpose, key=lambda x: x['order_num'], reverse=True)
+        return _purpose, _words_list
 
-        # 进行意图的检查
-        _matched_purpose = []
-        for _pitem in _purpose:
-            _config = _purpose_config_dict[_collection
-                                           ][_partition]['actions'][_pitem['action']]
-            if len(_config['check']) > 0:
-                # 需要进行检查
-                _check_fun = self.plugins['nlpcheck'][_config['check'][0]][_config['check'][1]]
-                if not _check_fun(
-                    question, _words_list,
-                    _pitem['action'], _pitem['match_word'], _pitem['match_type'],
-                    _pitem['collection'], _pitem['partition'],
-                    _config['std_question_id'], **_config['check'][2]
-                ):
-                    # 检查未通过，继续检查下一个
-                    continue
-                else:
-                    _matched_purpose.append(_pitem)
-            else:
-                # 没有配置检查函数，视为检查通过
-                _matched_purpose.append(_pitem)
+    def cut_sentence(self, sentence: str) -> list:
+        """
+        进行语句分词
 
-            # 看看是否需要处理下一个
-            if not is_multiple and len(_matched_purpose) > 0:
-                # 只匹配第一个即可
-                break
+        @param {str} sentence - 要分词的语句
 
-        # 获取意图特定信息
-        for _pitem in _matched_purpose:
-            _config = _purpose_config_dict[_collection
-                                           ][_partition]['actions'][_pitem['action']]
+        @returns {list} - 获取到的分词列表[[word, flag], ]
+        """
+        return [list(_item) for _item in self.cut_words(sentence)]
 
-            if len(_config['info']) > 0 and _pitem['match_type'] == 'nlp_match':
-                _get_info_fun = self.plugins['nlpinfo'][_config['info'][0]][_config['info'][1]]
-                _info_dict = _get_info_fun(
-                    question, _words_list,
-                    _pitem['action'], _pitem['match_word'], _pitem['match_type'],
-                    _pitem['collection'], _pitem['partition'],
-                    _config['std_question_id'], **_config['info'][2]
-                )
-                _pitem['info'].update(_info_dict)
+    def cut_words(self, sentence: str) -> tuple:
+        """
+        进行语句分词(合并数量及币种后的结果，结果将被缓存)
 
-        self._log_debug('question: %s\n%s' % (question, str(_matched_purpose)))
-        return _matched_purpose
+        @param {str} sentence - 要分词的语句
 
-    def cut_sentence(self, sentence: str) -> list:
+        @returns {tuple} - 获取到的分词列表((word, flag), ), 为共享的缓存对象，不可修改
         """
-        进行语句分词
+        return self._cut(sentence)[0]
+
+    def load_user_dict(self, user_dict: str):
+        """
+        添加用户自定义词典(将清除分词结果缓存)
+
+        @param {str} user_dict - 词典地址
+        """
+        jieba.load_userdict(user_dict)
+        self.user_dicts.append(user_dict)
+        self.dict_version += 1
+        self.cut_cache.clear()
+        self.refresh_worker_para()
+
+    def refresh_worker_para(self):
+        """
+        将内存参数及词典的变更推送到工作进程(数据变更后执行，工作进程使用的参数无变化时不处理)
+        """
+        if self.worker_pool is not None:
+            self.worker_pool.update_para(self.DATA_MANAGER_PARA, user_dicts=self.user_dicts)
+
+    #############################
+    # 内部函数
+    #############################
+
+    def _cut(self, sentence: str) -> tuple:
+        """
+        进行语句分词并标注语句结束位置(结果将被缓存)
 
         @param {str} sentence - 要分词的语句
 
-        @returns {list} - 获取到的分词列表[(word, flag), ]
+        @returns {tuple, tuple, tuple} - 分词列表((word, flag), ), 与分词列表对应的是否语句结束标志(bool, ),
+            与分词列表对应的用于匹配意图的词((word, ...), )
         """
+        if sentence == '':
+            return tuple(), tuple(), tuple()
+
         _amount_sign_list = self.DATA_MANAGER_PARA.get(
             'common_para', {}).get('amount_sign_list', ['$', '￥'])
-        _words = pseg.cut(sentence, use_paddle=self.enable_paddle)
-        _words_list = list()  # 完整的词典列表
+        _cache_key = (sentence, self.dict_version, tuple(_amount_sign_list))
+        _cache_value = self.cut_cache.get(_cache_key)
+        if _cache_value is not None:
+            Metrics.inc('chat_robot_nlp_cut_cache_total', result='hit')
+            Metrics.inc('chat_robot_nlp_cut_saved_seconds_total', _cache_value[3])
+            return _cache_value[0: 3]
+
+        Metrics.inc('chat_robot_nlp_cut_cache_total', result='miss')
+        _start = time.process_time()
+        _words = list()
+        _ends = list()
+        _match_words = list()
+        for _word, _flag, _is_end, _temp_match_words in self._tokenize(sentence, _amount_sign_list):
+            _words.append((_word, _flag))
+            _ends.append(_is_end)
+            _match_words.append(_temp_match_words)
+
+        _words = tuple(_words)
+        _ends = tuple(_ends)
+        _match_words = tuple(_match_words)
+        self.cut_cache.set(_cache_key, (_words, _ends, _match_words, time.process_time() - _start))
+        return _words, _ends, _match_words
+
+    def _tokenize(self, sentence: str, amount_sign_list: list):
+        """
+        单次遍历分词结果，合并数量及币种后逐个返回(生成器)
+        合并规则: 币种标志或数量后的数量合并到上一个词中; "数量 , 数量"的形式合并为一个数量
+        注：最后会增加一个句号('.', 'x')，简化语句结束的处理
+        注：语句结束按合并前的第一个词判断；意图匹配除合并后的词外，合并前的第一个词(非语句结束时)及合并过程中的词
+            也需要匹配，与逐个词处理时的匹配结果保持一致
 
-        # 循环分析句子
-        _word, _flag = _words.__next__()  # 当前词，作为开始
-        _last_word, _last_flag = '', ''  # 上一词
-        _next_word, _next_flag = '', ''  # 下一词
-        _stop_iter = False  # 是否结束循环
-        while True:
-            # 获取下一个词
-            try:
-                if not _stop_iter:
-                    _next_word, _next_flag = _words.__next__()
-                else:
-                    _next_word, _next_flag = '', ''
-            except StopIteration:
-                # 找不到, 打上退出循环的标记
-                _stop_iter = True
-                _next_word, _next_flag = '.', 'x'  # 增加一个句号，简化处理逻辑
-
-            # 处理_words_list
-            if _flag == 'm' and (_last_flag == 'm' or _last_word in _amount_sign_list):
-                # 上一个字是币种标志, 或者上一个字是数量, 合并到上一个词中
-                _word = _words_list[-1][0] + _word
-                _words_list[-1][0] = _word
-                _words_list[-1][1] = 'm'
-            elif _word == ',' and _last_flag == 'm' and _next_flag == 'm':
-                # m , m 的形式，统一合并到上一个词中
-                _word = _last_word + _word + _next_word
-                _flag = 'm'
-                _words_list[-1][0] = _word
-                _words_list[-1][1] = _flag
-                # 由于已经使用了next，再获取一次next
-                try:
-                    if not _stop_iter:
-                        _next_word, _next_flag = _words.__next__()
-                    else:
-                        _next_word, _next_flag = '', ''
-                except StopIteration:
-                    # 找不到, 打上退出循环的标记
-                    _stop_iter = True
-                    _next_word, _next_flag = '.', 'x'  # 增加一个句号，简化处理逻辑
-            else:
-                # 正常的新词, 添加到_words_list中
-                _words_list.append([_word, _flag])
+        @param {str} sentence - 要分词的语句
+        @param {list} amount_sign_list - 币种标志清单
 
-            # 进入下一轮循环
-            if _next_word == '':
-                break
+        @returns {generator} - 每次返回(word, flag, is_end, match_words), is_end为该词是否语句结束,
+            match_words为用于匹配意图的词元组(依次为合并前的第一个词及每次合并后的词)
+        """
+        # jieba返回的pair对象不支持下标访问，统一转换为(word, flag)
+        _words = itertools.chain(
+            ((_word, _flag) for _word, _flag in pseg.cut(sentence, use_paddle=self.enable_paddle)), [('.', 'x')]
+        )
+        _pending = None  # 待输出的词(可能与后面的词合并)
+        _next = next(_words, None)  # 预读的下一个词
+        while _next is not None:
+            _word, _flag = _next
+            _next = next(_words, None)
+            if _pending is None:
+                # 第一个词
+                _pending = self._new_token(_word, _flag)
+            elif _flag == 'm' and (_pending[1] == 'm' or _pending[0] in amount_sign_list):
+                # 上一个词是币种标志或数量, 合并到上一个词中
+                _merged = _pending[0] + _word
+                _pending = (_merged, 'm', _pending[2], _pending[3] + (_merged, ))
+            elif _word == ',' and _pending[1] == 'm' and _next is not None and _next[1] == 'm':
+                # m , m 的形式，统一合并到上一个词中, 并跳过已合并的下一个词
+                _merged = _pending[0] + _word + _next[0]
+                _pending = (_merged, 'm', _pending[2], _pending[3] + (_merged, ))
+                _next = next(_words, None)
             else:
-                _last_word, _last_flag = _word, _flag
-                _word, _flag = _next_word, _next_flag
-                continue
+                # 正常的新词, 输出上一个词
+                yield _pending
+                _pending = self._new_token(_word, _flag)
 
-        # 返回结果
-        return _words_list
+        if _pending is not None:
+            yield _pending
 
-    #############################
-    # 内部函数
-    #############################
+    def _new_token(self, word: str, flag: str) -> tuple:
+        """
+        生成合并前的分词信息
+
+        @param {str} word - 词
+        @param {str} flag - 词性
+
+        @returns {tuple} - (word, flag, is_end, match_words), 语句结束的词不用于匹配意图
+        """
+        _is_end = self._is_sentence_end(word, flag)
+        return (word, flag, _is_end, tuple() if _is_end else (word, ))
+
+    def _is_sentence_end(self, word: str, flag: str) -> bool:
+        """
+        判断词是否语句结束(标点符号)
+
+        @param {str} word - 词
+        @param {str} flag - 词性
+
+        @returns {bool} - 是否语句结束
+        """
+        return (flag == 'x' and word != ' ') or word in ('.')
 
-    def _judge_is_sure(self, words: list):
+    def _judge_is_sure(self, words: list, start: int = 0, end: int = None):
         """
         判断一组词的词义是否肯定
 
         @param {list} words - 词数组[[word, flag], ...]
+        @param {int} start=0 - 要判断的开始位置
+        @param {int} end=None - 要判断的结束位置(不含)，不传代表到最后
 
         @returns {str} - 'uncertain'-代表不确定，'sure'-肯定， 'negative'-否定
         """
-        _sure_judge_dict = self.DATA_MANAGER_PARA.get('nlp_sure_judge_dict', {
-            'sure': {}, 'negative': {}
-        })
+        _sure_judge_map = self.DATA_MANAGER_PARA.get('nlp_sure_judge_map', {})
         _is_sure = None
-        for _word, _flag in words:
-            _temp_judge = None
-            if _flag in _sure_judge_dict['negative'].keys() and _word in _sure_judge_dict['negative'][_flag]:
-                _temp_judge = False
-            elif _flag in _sure_judge_dict['sure'].keys() and _word in _sure_judge_dict['sure'][_flag]:
-                _temp_judge = True
-
-            # 组合判断肯定和否定
-            if _is_sure is None:
-                _is_sure = _temp_judge
-            elif _temp_judge is not None:
-                if _is_sure and not _temp_judge:
-                    # 一肯定一否定
-                    _is_sure = False
-                elif not _is_sure and not _temp_judge:
-                    # 两否定则为肯定，'不是不行'
-                    _is_sure = True
-
-        if _is_sure is not None:
-            _is_sure = 'sure' if _is_sure else 'negative'
-        else:
-            _is_sure = 'uncertain'
+        for _index in range(start, len(words) if end is None else end):
+            _is_sure = self._combine_is_sure(_is_sure, _sure_judge_map.get(tuple(words[_index]), None))
+
+        return self._is_sure_str(_is_sure)
+
+    def _combine_is_sure(self, is_sure: bool, judge: bool) -> bool:
+        """
+        组合判断肯定和否定
 
-        return _is_sure
+        @param {bool} is_sure - 之前的判断结果，None代表未判断
+        @param {bool} judge - 当前词的判断，True-肯定，False-否定，None-不涉及
+
+        @returns {bool} - 组合后的判断结果
+        """
+        if judge is None:
+            return is_sure
+        elif is_sure is None:
+            return judge
+        elif is_sure and not judge:
+            # 一肯定一否定
+            return False
+        elif not is_sure and not judge:
+            # 两否定则为肯定，'不是不行'
+            return True
+
+        return is_sure
+
+    def _is_sure_str(self, is_sure: bool) -> str:
+        """
+        将判断结果转换为字符串
+
+        @param {bool} is_sure - 判断结果，None代表未判断
+
+        @returns {str} - 'uncertain'-代表不确定，'sure'-肯定， 'negative'-否定
+        """
+        if is_sure is None:
+            return 'uncertain'
+
+        return 'sure' if is_sure else 'negative'
 
     def _match_purpose(self, word: str, question_len: int,
                        collection: str = None, partition: str = None):
@@ -427,16 +548,22 @@ class NLP(object):
         _purpose_config_dict = self.DATA_MANAGER_PARA.get('nlp_purpos_config_dict', {})
         _collection_dict = _purpose_config_dict.get(collection, {})
         _partition_dict = _collection_dict.get(partition, {})
-        _match_dict = _partition_dict.get('match', {})
+        _match_index = _partition_dict.get('match_index', None)
+        if _match_index is None:
+            return list()
+
+        # 通过索引找到匹配的意图, 大小写敏感和忽略大小写的结果合并后按意图的配置顺序返回
+        _matched = _match_index['case'].get(word, [])
+        _ignorecase_matched = _match_index['ignorecase'].get(word.lower(), [])
+        if len(_ignorecase_matched) > 0:
+            _matched = sorted(_matched + _ignorecase_matched)
 
         _matched_list = list()
-        for _action in _match_dict.keys():
-            _word = word.lower() if _match_dict[_action][1] else word
-            if _word in _match_dict[_action][0]:
-                if _match_dict[_action][2] <= 0.0 or (len(word) / question_len) >= _match_dict[_action][2]:
-                    _matched_list.append((_action, word))
+        _word_scale = len(word) / question_len
+        for _pos, _action, _scale in _matched:
+            if _scale <= 0.0 or _word_scale >= _scale:
+                _matched_list.append((_action, word))
 
-        # 没有找到
         return _matched_list
 
     #############################
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+NLP工作进程池
+@module nlp_pool
+@file nlp_pool.py
+"""
+
+import os
+import sys
+import copy
+import pickle
+import hashlib
+import threading
+import traceback
+import multiprocessing
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'nlp_pool'  # 模块名
+__DESCRIPT__ = u'NLP工作进程池'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+# 工作进程使用的内存参数
+WORKER_PARA_KEYS = ('common_para', 'nlp_sure_judge_map', 'nlp_purpos_config_dict')
+
+# 工作进程内的NLP对象
+_WORKER_NLP = None
+
+
+#############################
+# 工作进程函数
+#############################
+def _init_worker(nlp_para: dict, data_manager_para: dict):
+    """
+    工作进程初始化，预先加载词典
+
+    @param {dict} nlp_para - NLP初始化参数
+    @param {dict} data_manager_para - 内存参数快照
+    """
+    global _WORKER_NLP
+    import jieba
+    from chat_robot.lib.nlp import NLP
+    from chat_robot.lib.dict_cache import JiebaDictCache
+
+    _set_dictionary = nlp_para['set_dictionary']
+    if nlp_para.get('dict_cache_path', None) is not None:
+        # 从缓存装载词典(服务进程启动时已生成缓存)
+        JiebaDictCache(nlp_para['dict_cache_path']).load(_set_dictionary, nlp_para['user_dicts'])
+        _set_dictionary = None
+
+    _WORKER_NLP = NLP(
+        data_manager_para=data_manager_para, set_dictionary=_set_dictionary,
+        enable_paddle=nlp_para['enable_paddle'], cut_cache_size=nlp_para['cut_cache_size']
+    )
+    if nlp_para.get('dict_cache_path', None) is None:
+        for _user_dict in nlp_para['user_dicts']:
+            jieba.load_userdict(_user_dict)
+
+
+def _match_purposes(question: str, collection: str, partition: str) -> tuple:
+    """
+    在工作进程中分词并匹配问题意图
+
+    @param {str} question - 问题句子
+    @param {str} collection - 问题分类
+    @param {str} partition - 场景
+
+    @returns {list, tuple} - 意图清单, 分词列表
+    """
+    return _WORKER_NLP.match_purposes(question, collection, partition)
+
+
+class NLPWorkerPool(object):
+    """
+    NLP工作进程池
+    在独立的进程中进行分词及意图匹配，只传递问题和结果，意图检查等插件仍在服务进程中执行
+    注：工作进程使用的内存参数或词典变更时，将在后台线程使用新参数启动新的进程池，启动完成后替换旧的进程池
+    """
+
+    def __init__(self, worker_num: int, nlp_para: dict, data_manager_para: dict,
+                 timeout: float = 5.0, logger=None):
+        """
+        NLP工作进程池
+
+        @param {int} worker_num - 工作进程数
+        @param {dict} nlp_para - NLP初始化参数
+            set_dictionary {str} - 默认词典
+            user_dicts {list} - 用户词典清单
+            enable_paddle {bool} - 是否使用paddle模式
+            cut_cache_size {int} - 分词结果缓存的最大记录数
+            dict_cache_path {str} - 分词词典缓存目录
+        @param {dict} data_manager_para - 通过QAManager加载的内存参数字典
+        @param {float} timeout=5.0 - 等待处理结果的超时时间(秒)，工作进程异常退出时避免请求线程一直等待
+        @param {Logger} logger=None - 日志对象
+        """
+        self.worker_num = worker_num
+        self.nlp_para = copy.deepcopy(nlp_para)
+        self.timeout = timeout
+        self.logger = logger
+
+        # 使用spawn方式启动，避免复制服务进程的线程和连接
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._pending = None  # 等待更新到进程池的内存参数快照
+        self._updating = False  # 是否正在后台更新进程池
+
+        _snapshot = self._get_snapshot(data_manager_para)
+        self._signature = self._get_signature(_snapshot)  # 当前进程池参数的签名
+        self._pool = self._create_pool(_snapshot)
+
+    #############################
+    # 公共函数
+    #############################
+    def match_purposes(self, question: str, collection: str = None, partition: str = None) -> tuple:
+        """
+        分词并匹配问题意图
+
+        @param {str} question - 问题句子
+        @param {str} collection=None - 指定从特定的问题分类中分析
+        @param {str} partition=None - 指定从特定的问题场景中分析
+
+        @returns {list, tuple} - 按优先顺序排序的意图清单, 分词列表((word, flag), )
+        """
+        return self._pool.apply_async(
+            _match_purposes, (question, collection, partition)
+        ).get(self.timeout)
+
+    def update_para(self, data_manager_para: dict, user_dicts: list = None) -> bool:
+        """
+        更新工作进程的内存参数(参数有变化时在后台启动新的进程池替换旧的进程池)
+
+        @param {dict} data_manager_para - 内存参数字典
+        @param {list} user_dicts=None - 用户词典清单，不传代表不变
+
+        @returns {bool} - 是否需要更新进程池，参数无变化时返回False
+        """
+        with self._lock:
+            if user_dicts is not None:
+                self.nlp_para['user_dicts'] = list(user_dicts)
+
+            _snapshot = self._get_snapshot(data_manager_para)
+            _signature = self._get_signature(_snapshot)
+            if _signature == self._signature:
+                # 工作进程使用的参数无变化
+                return False
+
+            self._signature = _signature
+            self._pending = copy.deepcopy(_snapshot)
+            if self._updating:
+                # 正在更新的线程完成后将继续处理最新的参数
+                return True
+
+            self._updating = True
+
+        _thread = threading.Thread(target=self._update_thread_fun, name='Thread-NLP-Pool-Update', daemon=True)
+        _thread.start()
+        return True
+
+    def close(self):
+        """
+        关闭进程池
+        """
+        self._pool.close()
+        self._pool.join()
+
+    #############################
+    # 内部函数
+    #############################
+    def _update_thread_fun(self):
+        """
+        后台更新进程池的线程函数(连续的变更只使用最新的参数启动一次)
+        """
+        while True:
+            with self._lock:
+                _snapshot, self._pending = self._pending, None
+                if _snapshot is None:
+                    self._updating = False
+                    return
+
+                _nlp_para = copy.deepcopy(self.nlp_para)
+
+            try:
+                _pool = self._create_pool(_snapshot, nlp_para=_nlp_para)
+            except:
+                self._log_error('update nlp worker pool error: %s' % traceback.format_exc())
+                continue
+
+            with self._lock:
+                _old_pool, self._pool = self._pool, _pool
+
+            # 旧进程池处理完已提交的任务后退出
+            _old_pool.close()
+            self._log_info('nlp worker pool updated')
+
+    def _get_snapshot(self, data_manager_para: dict) -> dict:
+        """
+        获取工作进程使用的内存参数
+
+        @param {dict} data_manager_para - 内存参数字典
+
+        @returns {dict} - 内存参数快照
+        """
+        return {
+            _key: data_manager_para[_key] for _key in WORKER_PARA_KEYS if _key in data_manager_para.keys()
+        }
+
+    def _get_signature(self, snapshot: dict) -> str:
+        """
+        获取工作进程参数的签名，用于判断参数是否变化
+
+        @param {dict} snapshot - 内存参数快照
+
+        @returns {str} - 签名(md5)
+        """
+        return hashlib.md5(
+            pickle.dumps((snapshot, self.nlp_para['user_dicts']), protocol=pickle.HIGHEST_PROTOCOL)
+        ).hexdigest()
+
+    def _create_pool(self, snapshot: dict, nlp_para: dict = None):
+        """
+        创建进程池并等待所有进程完成初始化
+
+        @param {dict} snapshot - 内存参数快照
+        @param {dict} nlp_para=None - NLP初始化参数，不传代表使用当前参数
+
+        @returns {multiprocessing.pool.Pool} - 进程池
+        """
+        _pool = self._context.Pool(
+            processes=self.worker_num, initializer=_init_worker,
+            initargs=(self.nlp_para if nlp_para is None else nlp_para, snapshot)
+        )
+
+        # 提交空任务，确保进程已启动及完成词典装载
+        _pool.map(abs, range(self.worker_num))
+        self._log_info('nlp worker pool started: %d processes' % self.worker_num)
+        return _pool
+
+    def _log_info(self, msg: str, *args, **kwargs):
+        """
+        输出info日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.info(msg, *args, **kwargs)
+
+    def _log_error(self, msg: str, *args, **kwargs):
+        """
+        输出error日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.error(msg, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
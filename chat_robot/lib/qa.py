@@ -17,10 +17,12 @@ import sys
 import copy
 import uuid
 import time
-import re
+import heapq
 import datetime
 import threading
 import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import milvus as mv
 import redis
 # 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
@@ -28,6 +30,10 @@ sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
 from chat_robot.lib.data_manager import QAManager, Answer, StdQuestion, ExtQuestion, NoMatchAnswers, SendMessageQueue, SendMessageHis
 from chat_robot.lib.nlp import NLP
+from chat_robot.lib.lru_cache import LRUCache
+from chat_robot.lib.session_codec import SessionCodec
+from chat_robot.lib.session_unit import SessionUnit
+from chat_robot.lib.metrics import Metrics
 
 
 __MOUDLE__ = 'qa'  # 模块名
@@ -37,6 +43,20 @@ __AUTHOR__ = u'黎慧剑'  # 作者
 __PUBLISH__ = '2020.06.27'  # 发布日期
 
 
+class MetricsRedisConnection(redis.Connection):
+    """
+    可统计与Redis交互次数的连接对象
+    注：pipeline和事务的多个命令为一次发送，只统计为一次交互
+    """
+
+    def send_packed_command(self, command, *args, **kwargs):
+        """
+        发送打包后的命令
+        """
+        Metrics.inc('chat_robot_redis_commands_total')
+        return super().send_packed_command(command, *args, **kwargs)
+
+
 class QA(object):
     """
     问答处理类
@@ -49,6 +69,7 @@ class QA(object):
         self.qa_manager = qa_manager  # 问答数据管理
         self.nlp = nlp  # Nlp自然语言处理支持
         self.execute_path = execute_path  # 执行路径
+        self.qa_config = qa_config  # 问答处理配置, 答案中的{$config=key$}从该配置获取
         self.use_nlp = qa_config.get('use_nlp', True)  # 是否使用NLP辅助处理意图识别
         self.session_overtime = qa_config.get('session_overtime', 300.0)  # session超时时间(秒)
         self.session_checktime = qa_config.get('session_checktime', 1.0)  # 检查session超时的间隔时间
@@ -57,6 +78,10 @@ class QA(object):
         # 如果匹配不到最优，在同一个问题分类下最多匹配的标准问题数量
         self.multiple_in_collection = qa_config.get('multiple_in_collection', 3)
         self.nprobe = qa_config.get('nprobe', 64)  # 盘查的单元数量(cell number of probe)
+        # 多问题分类并发检索的线程数，0代表按顺序逐个分类检索
+        self.search_thread_num = qa_config.get('search_thread_num', 0)
+        # 批量搜寻问题时并发处理不同session的线程数，0代表按顺序处理
+        self.batch_thread_num = qa_config.get('batch_thread_num', 0)
         # 当找不到问题答案时搜寻标准问题的milvus id
         self.no_answer_milvus_id = qa_config.get('no_answer_milvus_id', -1)
         # 与no_answer_milvus_id配套使用，指定默认标准问题对应的collection
@@ -70,23 +95,60 @@ class QA(object):
             'select_options_out_index', u'请输入正确的问题序号(范围为: 1 - {$len$})，例如输入"1"'
         )
         self.query_send_message_num = qa_config.get('query_send_message_num', 2)
+        # 清除无效session时每批扫描的key数量, 以及每批之间的等待时间(秒)
+        self.session_sweep_batch = qa_config.get('session_sweep_batch', 500)
+        self.session_sweep_interval = qa_config.get('session_sweep_interval', 0.1)
 
         # 插件plugins函数字典，格式为{'type':{'class_name': {'fun_name': fun, }, },}
         self.plugins = plugins
 
+        # 向量匹配结果缓存, key为(标准化后的问题, collection, partition), value为match_list
+        # 注：只缓存向量检索的匹配结果，NLP意图匹配及答案仍按问题原文及session实时处理；问题数据变更时清空缓存
+        self.match_cache = LRUCache(
+            max_size=qa_config.get('match_cache_size', 0),
+            ttl=qa_config.get('match_cache_ttl', 0)
+        )
+        self.qa_manager.add_data_change_listener(self._on_data_change)
+
+        # 多问题分类并发检索的线程池
+        self._search_executor = None
+        if self.search_thread_num > 0:
+            self._search_executor = ThreadPoolExecutor(
+                max_workers=self.search_thread_num, thread_name_prefix='Thread-Milvus-Search'
+            )
+
+        # 批量搜寻问题的线程池
+        self._batch_executor = None
+        if self.batch_thread_num > 0:
+            self._batch_executor = ThreadPoolExecutor(
+                max_workers=self.batch_thread_num, thread_name_prefix='Thread-Batch-Search'
+            )
+
         # Redis缓存
         self.use_redis = qa_config.get('use_redis', False)
+        # Redis中session的存储格式, hash-每个字典一个hash; blob-每个部分(info、context等)序列化为一个值
+        self.redis_blob_session = self.use_redis and qa_config.get(
+            'redis_session_format', 'hash') == 'blob'
+        self._session_unit_local = threading.local()  # 当前线程的session工作单元
         if self.use_redis:
             # 创建连接池
             _redis_connect_para = redis_config.get('connection', {})
             _redis_connect_para['max_connections'] = redis_config.get('pool_size', None)
             _redis_connect_para['decode_responses'] = True  # 这个必须设置为True，确保取到的值是解码后的值
+            if 'connection_class' not in _redis_connect_para and 'path' not in _redis_connect_para:
+                # 使用可统计交互次数的连接对象
+                _redis_connect_para['connection_class'] = MetricsRedisConnection
             self.redis_pool = redis.ConnectionPool(
                 **_redis_connect_para
             )
 
-            # 删除无效的session
-            self.delete_unuse_sessions()
+            # 在后台将没有登记超时时间的session登记到超时队列，并删除无效的session, 无需等待完成
+            self._session_sweep_thread = threading.Thread(
+                target=self._session_sweep_thread_fun,
+                name='Thread-Session-Sweep',
+                daemon=True
+            )
+            self._session_sweep_thread.start()
 
         # 客户连接session管理, key为session_id，value也是一个dict:
         #   last_time : 最近访问时间，用于判断超时清理缓存
@@ -94,15 +156,18 @@ class QA(object):
         #   context : 上下文信息字典
         #   cache : 缓存信息(可以随意被覆盖，使用时需注意)
         self.sessions = dict()
+        # 内存模式的session超时堆, 元素为(最近访问时间, session_id), 超时处理时才按实际访问时间重新入堆
+        self._session_expire_heap = list()
+        self._session_lock = threading.RLock()
 
         # 处理session超时的线程
         self._session_overtime_thread_stop = False  # 超时停止标志
         self._session_overtime_thread = threading.Thread(
             target=self._session_overtime_thread_fun,
             args=(0, ),
-            name='Thread-Session-Overtime'
+            name='Thread-Session-Overtime',
+            daemon=True
         )
-        self._session_overtime_thread.setDaemon(True)
         self._session_overtime_thread.start()
 
     def __del__(self):
@@ -114,6 +179,41 @@ class QA(object):
     #############################
     # 公共session操作(API)
     #############################
+    @contextmanager
+    def session_unit(self, session_id: str):
+        """
+        请求内的session工作单元(仅blob格式的Redis session有效)
+        进入时一次性加载session，在with语句内的session操作都在内存中处理，正常退出时将变更一次性写回Redis
+        注：with语句出现异常时将放弃变更；嵌套使用时由最外层的工作单元写回；
+            与并发请求修改了同一个key时退出抛出SessionConflictError，当前请求的变更不写回
+
+        @param {str} session_id - session id
+
+        @returns {SessionUnit} - session工作单元，非blob格式或已在工作单元中时返回当前的工作单元(可能为None)
+        """
+        if not self.redis_blob_session or session_id is None or getattr(
+            self._session_unit_local, 'unit', None
+        ) is not None:
+            yield self._get_session_unit(session_id)
+            return
+
+        _unit = SessionUnit(session_id, logger=self.logger)
+        with redis.Redis(connection_pool=self.redis_pool) as _redis:
+            _unit.load(
+                _redis, migrate_fun=lambda section: self._update_session_section(
+                    session_id, section, None, _redis
+                )
+            )
+
+        self._session_unit_local.unit = _unit
+        try:
+            yield _unit
+        finally:
+            self._session_unit_local.unit = None
+
+        with redis.Redis(connection_pool=self.redis_pool) as _redis:
+            _unit.flush(_redis)
+
     def generate_session(self, info: dict = {}) -> str:
         """
         生成session, 开始QA对话前执行
@@ -134,20 +234,45 @@ class QA(object):
         if self.use_redis:
             # 使用Redis作为缓存
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                # 添加到session清单
-                _redis.hset(
-                    'chat_robot:session:list', key=_session_id,
-                    value='datetime:%s' % _session_dict['last_time'].strftime('%Y-%m-%d %H:%M:%S')
-                )
+                if self.redis_blob_session:
+                    # 添加到session清单并存入各部分的值, 在一个事务中提交
+                    _pipe = _redis.pipeline()
+                    _pipe.hset(
+                        'chat_robot:session:list', key=_session_id,
+                        value=self._value_to_redis_str(_session_dict['last_time'])
+                    )
+                    _pipe.zadd('chat_robot:session:expire', {
+                        _session_id: _session_dict['last_time'].timestamp()
+                    })
+                    _pipe.hset(
+                        'chat_robot:session:%s' % _session_id, mapping={
+                            _key: (
+                                self._value_to_redis_str(_value) if _key == 'last_time'
+                                else SessionCodec.encode(_value)
+                            ) for _key, _value in _session_dict.items()
+                        }
+                    )
+                    _pipe.execute()
+                else:
+                    # 添加到session清单及超时队列
+                    _redis.hset(
+                        'chat_robot:session:list', key=_session_id,
+                        value='datetime:%s' % _session_dict['last_time'].strftime('%Y-%m-%d %H:%M:%S')
+                    )
+                    _redis.zadd('chat_robot:session:expire', {
+                        _session_id: _session_dict['last_time'].timestamp()
+                    })
 
-                # 存入字典
-                self._add_redis_dict(
-                    'chat_robot:session:%s' % _session_id,
-                    _session_dict, _redis
-                )
+                    # 存入字典
+                    self._add_redis_dict(
+                        'chat_robot:session:%s' % _session_id,
+                        _session_dict, _redis
+                    )
         else:
             # 直接添加到字典中
-            self.sessions[_session_id] = _session_dict
+            with self._session_lock:
+                self.sessions[_session_id] = _session_dict
+                heapq.heappush(self._session_expire_heap, (_session_dict['last_time'], _session_id))
 
         self._log_debug('generate session[%s]: %s' % (_session_id, str(_session_dict)))
         return _session_id
@@ -163,6 +288,10 @@ class QA(object):
         if session_id is None:
             return False
 
+        _unit = self._get_session_unit(session_id)
+        if _unit is not None:
+            return _unit.exists
+
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
                 return _redis.hexists(
@@ -178,14 +307,22 @@ class QA(object):
 
         @param {str} session_id - session id
         """
-        if self.use_redis:
+        _now = datetime.datetime.now()
+        _unit = self._get_session_unit(session_id)
+        if _unit is not None:
+            # 在工作单元写回时更新
+            _unit.last_time_value = self._value_to_redis_str(_now)
+            _unit.last_time_score = _now.timestamp()
+        elif self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                self._add_redis_dict_value(
-                    'chat_robot:session:list', session_id, datetime.datetime.now(),
-                    _redis
+                _pipe = _redis.pipeline()
+                _pipe.hset(
+                    'chat_robot:session:list', key=session_id, value=self._value_to_redis_str(_now)
                 )
+                _pipe.zadd('chat_robot:session:expire', {session_id: _now.timestamp()})
+                _pipe.execute()
         else:
-            self.sessions[session_id]['last_time'] = datetime.datetime.now()
+            self.sessions[session_id]['last_time'] = _now
 
     def update_session_info(self, session_id: str, info: dict):
         """
@@ -200,10 +337,15 @@ class QA(object):
 
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                self._add_redis_dict(
-                    'chat_robot:session:%s:info' % session_id,
-                    copy.deepcopy(info), _redis
-                )
+                if self.redis_blob_session:
+                    self._update_session_section(
+                        session_id, 'info', lambda _info: _info.update(info), _redis
+                    )
+                else:
+                    self._add_redis_dict(
+                        'chat_robot:session:%s:info' % session_id,
+                        copy.deepcopy(info), _redis
+                    )
         else:
             self.sessions[session_id]['info'].update(info)
 
@@ -215,17 +357,25 @@ class QA(object):
 
         @param {str} session_id - session id
         """
+        _unit = self._get_session_unit(session_id)
+        if _unit is not None:
+            # 工作单元无需再写回
+            _unit.exists = False
+
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                # 先删除字典清单
+                # 先删除字典清单及超时队列
                 _redis.hdel('chat_robot:session:list', *(session_id,))
+                _redis.zrem('chat_robot:session:expire', session_id)
 
                 # 删除实际字典
                 self._del_redis_dict(
                     'chat_robot:session:%s' % session_id, _redis
                 )
         else:
-            self.sessions.pop(session_id, None)
+            # 超时堆中的记录在超时处理时再忽略
+            with self._session_lock:
+                self.sessions.pop(session_id, None)
 
         self._log_debug('delete session[%s]' % (session_id,))
 
@@ -239,6 +389,9 @@ class QA(object):
         """
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if self.redis_blob_session:
+                    return self._get_session_section(session_id, 'info', _redis)
+
                 return self._get_redis_dict(
                     'chat_robot:session:%s:info' % session_id, _redis
                 )
@@ -257,6 +410,9 @@ class QA(object):
         """
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if self.redis_blob_session:
+                    return self._get_session_section(session_id, 'info', _redis).get(key, default)
+
                 return self._get_redis_dict_by_key(
                     'chat_robot:session:%s:info' % session_id, key, _redis,
                     default=default
@@ -267,25 +423,41 @@ class QA(object):
     def delete_unuse_sessions(self):
         """
         清除无效session，仅redis模式使用
+        通过SCAN逐批扫描session的key，每批通过管道检查及删除，批次之间按session_sweep_interval等待，避免阻塞Redis
+
+        @returns {dict} - 处理结果统计
+            scan_count : 扫描的key数量
+            delete_count : 删除的无效session数量
         """
         _prefix = 'chat_robot:session:*'
         _index = len(_prefix) - 1
+        _scan_count = 0
+        _delete_count = 0
+        _start = time.time()
         with redis.Redis(connection_pool=self.redis_pool) as _redis:
-            # 获取session清单
-            _session_list = []
-            _keys = _redis.keys('chat_robot:session:*')
-            for _key in _keys:
+            _batch = list()
+            for _key in _redis.scan_iter(match=_prefix, count=self.session_sweep_batch):
+                _scan_count += 1
                 _session_id = _key[_index:]
-                if _session_id != 'list' and _session_id.find(':') == -1:
-                    _session_list.append(_session_id)
-
-            # 逐个进行删除
-            for _session_id in _session_list:
-                if not _redis.hexists('chat_robot:session:list', _session_id):
-                    self._del_redis_dict(
-                        'chat_robot:session:%s' % _session_id, _redis
-                    )
-                    self._log_debug('delete unuse session [%s]!' % _session_id)
+                if _session_id not in ('list', 'expire') and _session_id.find(':') == -1:
+                    _batch.append(_session_id)
+
+                if len(_batch) >= self.session_sweep_batch:
+                    _delete_count += self._delete_unuse_session_batch(_batch, _redis)
+                    _batch.clear()
+                    self._log_debug('delete unuse sessions progress: scan[%d] delete[%d]' % (
+                        _scan_count, _delete_count
+                    ))
+                    if self.session_sweep_interval > 0:
+                        time.sleep(self.session_sweep_interval)
+
+            if len(_batch) > 0:
+                _delete_count += self._delete_unuse_session_batch(_batch, _redis)
+
+        self._log_info('delete unuse sessions finished: scan[%d] delete[%d] use[%.3fs]' % (
+            _scan_count, _delete_count, time.time() - _start
+        ))
+        return {'scan_count': _scan_count, 'delete_count': _delete_count}
 
     #############################
     # 服务端上下文操作
@@ -308,9 +480,14 @@ class QA(object):
         """
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                self._clear_reids_dict(
-                    'chat_robot:session:%s:%s' % (session_id, type_key), _redis
-                )
+                if self.redis_blob_session:
+                    self._update_session_section(
+                        session_id, type_key, lambda _dict: _dict.clear(), _redis
+                    )
+                else:
+                    self._clear_reids_dict(
+                        'chat_robot:session:%s:%s' % (session_id, type_key), _redis
+                    )
         else:
             self.sessions[session_id][type_key].clear()
 
@@ -329,12 +506,20 @@ class QA(object):
         """
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                # 清除所有上下文
-                self._clear_reids_dict('chat_robot:session:%s:context' % session_id, _redis)
+                if self.redis_blob_session:
+                    # 清除所有上下文并替换为新的上下文
+                    self._update_session_section(
+                        session_id, 'context', lambda _context: self._replace_dict(
+                            _context, {'options': options}
+                        ), _redis
+                    )
+                else:
+                    # 清除所有上下文
+                    self._clear_reids_dict('chat_robot:session:%s:context' % session_id, _redis)
 
-                self._add_redis_dict_value(
-                    'chat_robot:session:%s:context' % session_id, 'options', options, _redis
-                )
+                    self._add_redis_dict_value(
+                        'chat_robot:session:%s:context' % session_id, 'options', options, _redis
+                    )
         else:
             self.sessions[session_id]['context'].clear()  # 清除所有上下文
             self.sessions[session_id]['context']['options'] = options
@@ -361,11 +546,19 @@ class QA(object):
         ask_info.setdefault('context_id', self.generate_context_id())
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                # 清除所有上下文
-                self._clear_reids_dict('chat_robot:session:%s:context' % session_id, _redis)
-                self._add_redis_dict_value(
-                    'chat_robot:session:%s:context' % session_id, 'ask', ask_info, _redis
-                )
+                if self.redis_blob_session:
+                    # 清除所有上下文并替换为新的上下文
+                    self._update_session_section(
+                        session_id, 'context', lambda _context: self._replace_dict(
+                            _context, {'ask': ask_info}
+                        ), _redis
+                    )
+                else:
+                    # 清除所有上下文
+                    self._clear_reids_dict('chat_robot:session:%s:context' % session_id, _redis)
+                    self._add_redis_dict_value(
+                        'chat_robot:session:%s:context' % session_id, 'ask', ask_info, _redis
+                    )
         else:
             self.sessions[session_id]['context'].clear()  # 清除所有上下文
             self.sessions[session_id]['context']['ask'] = ask_info
@@ -382,6 +575,9 @@ class QA(object):
         """
         if self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if self.redis_blob_session:
+                    return self._get_session_section(session_id, 'context', _redis)
+
                 return self._get_redis_dict(
                     'chat_robot:session:%s:context' % session_id, _redis
                 )
@@ -397,7 +593,18 @@ class QA(object):
         @param {object} value - 缓存的值
         @param {str} context_id=None - 指定的上下文id
         """
-        if self.use_redis:
+        if self.redis_blob_session:
+            with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if context_id is None:
+                    self._update_session_section(
+                        session_id, 'cache', lambda _cache: _cache.update({key: value}), _redis
+                    )
+                else:
+                    self._update_session_section(
+                        session_id, 'context_cache', lambda _context_cache: self._get_context_cache(
+                            _context_cache, context_id).update({key: value}), _redis
+                    )
+        elif self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
                 if context_id is None:
                     self._add_redis_dict_value(
@@ -437,7 +644,18 @@ class QA(object):
         @param {str} key - 缓存的key
         @param {str} context_id=None - 指定的上下文id
         """
-        if self.use_redis:
+        if self.redis_blob_session:
+            with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if context_id is None:
+                    self._update_session_section(
+                        session_id, 'cache', lambda _cache: _cache.pop(key, None), _redis
+                    )
+                else:
+                    self._update_session_section(
+                        session_id, 'context_cache', lambda _context_cache: _context_cache.get(
+                            context_id, {}).pop(key, None), _redis
+                    )
+        elif self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
                 if context_id is None:
                     self._del_redis_dict_by_key(
@@ -470,7 +688,15 @@ class QA(object):
 
         @returns {object} - 返回缓存值
         """
-        if self.use_redis:
+        if self.redis_blob_session:
+            with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if context_id is None:
+                    _value = self._get_session_section(session_id, 'cache', _redis).get(key, default)
+                else:
+                    _value = self._get_session_section(
+                        session_id, 'context_cache', _redis
+                    ).get(context_id, {}).get(key, default)
+        elif self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
                 if context_id is None:
                     _value = self._get_redis_dict_by_key(
@@ -502,7 +728,18 @@ class QA(object):
         @param {dict} info - 要更新的信息字典
         @param {str} context_id=None - 指定的上下文id
         """
-        if self.use_redis:
+        if self.redis_blob_session:
+            with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if context_id is None:
+                    self._update_session_section(
+                        session_id, 'cache', lambda _cache: _cache.update(info), _redis
+                    )
+                else:
+                    self._update_session_section(
+                        session_id, 'context_cache', lambda _context_cache: self._get_context_cache(
+                            _context_cache, context_id).update(info), _redis
+                    )
+        elif self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
                 if context_id is None:
                     self._add_redis_dict(
@@ -542,7 +779,15 @@ class QA(object):
 
         @returns {dict} - 返回缓存字典
         """
-        if self.use_redis:
+        if self.redis_blob_session:
+            with redis.Redis(connection_pool=self.redis_pool) as _redis:
+                if context_id is None:
+                    _dict = self._get_session_section(session_id, 'cache', _redis)
+                else:
+                    _dict = self._get_session_section(
+                        session_id, 'context_cache', _redis
+                    ).get(context_id, default)
+        elif self.use_redis:
             with redis.Redis(connection_pool=self.redis_pool) as _redis:
                 if context_id is None:
                     _dict = self._get_redis_dict(
@@ -571,7 +816,8 @@ class QA(object):
     # 公共问答处理
     #############################
     def quession_search(self, question: str, session_id: str = None, collection: str = None,
-                        std_question_id: int = None, std_question_tag: str = None) -> list:
+                        std_question_id: int = None, std_question_tag: str = None,
+                        question_vector=None) -> list:
         """
         搜寻问题答案并返回
 
@@ -580,62 +826,160 @@ class QA(object):
         @param {str} collection=None - 问题分类
         @param {int} std_question_id=None - 指定匹配的标准问题id（如指定后不再进行匹配处理）
         @param {str} std_question_tag=None - 指定匹配的标准问题tag（如指定后不再进行匹配处理）
+        @param {np.ndarray} question_vector=None - 预先生成的问题向量，不传则需要匹配时再生成
 
         @returns {list} - 返回的问题答案字符数组，有可能是多个答案
             注意：返回的清单如果第1个对象类型是str，则属于文本返回；如果第1个对象的类型是dict(且只允许一个)，则数据json数据返回
-        """
-        # 检查session是否存在
-        if not self.check_session_exists(session_id):
-            raise FileNotFoundError('session id [%s] not exists!' % session_id)
 
-        # 更新上次访问时间
-        self.update_last_time(session_id)
+        @throws {FileNotFoundError} - session不存在时抛出异常
+        @throws {SessionConflictError} - 与同一session的并发请求修改了同一个key时抛出异常，本次请求的session变更被放弃
+        """
+        # 在session工作单元中处理，session只加载一次，结束时一次性写回
+        with self.session_unit(session_id):
+            # 检查session是否存在
+            if not self.check_session_exists(session_id):
+                raise FileNotFoundError('session id [%s] not exists!' % session_id)
 
-        # 根据上下文及传参， 设置collection、partition及
-        _collection, _partition, _match_list, _answer, _context_id = self._pre_deal_context(
-            question, session_id, collection, std_question_id, std_question_tag
-        )
+            # 更新上次访问时间
+            self.update_last_time(session_id)
 
-        if _answer is not None:
-            return _answer
+            # 根据上下文及传参， 设置collection、partition及
+            with Metrics.timer('chat_robot_stage_seconds', stage='pre_deal_context'):
+                _collection, _partition, _match_list, _answer, _context_id = self._pre_deal_context(
+                    question, session_id, collection, std_question_id, std_question_tag
+                )
 
-        if _match_list is None and self.use_nlp:
-            # 使用NLP语义解析尝试匹配意图
-            _collection, _partition, _match_list, _answer = self._nlp_match_action(
-                question, session_id, _collection, _partition
-            )
+            if _answer is not None:
+                return _answer
 
-        if _match_list is None:
-            # 查询标准问题及答案
-            with self.qa_manager.get_bert_client() as _bert, self.qa_manager.get_milvus() as _milvus:
-                _vectors = _bert.encode([question, ])
-                _question_vector = self.qa_manager.normaliz_vec(_vectors.tolist())[0]
-
-                # 进行匹配
-                if _collection is None and _partition is None:
-                    # 查询多个问题分类的结果清单
-                    _match_list = self._match_stdq_and_answers(
-                        _question_vector, _milvus
+            if _match_list is None and self.use_nlp:
+                # 使用NLP语义解析尝试匹配意图(与问题原文相关，每次都需执行，不进行缓存)
+                with Metrics.timer('chat_robot_stage_seconds', stage='nlp_match'):
+                    _collection, _partition, _match_list, _answer = self._nlp_match_action(
+                        question, session_id, _collection, _partition
                     )
+
+            _cache_key = None
+            if _match_list is None and self.match_cache.max_size > 0:
+                # 尝试从缓存中获取向量匹配结果
+                _cache_key = (self._normalize_question(question), _collection, _partition)
+                _match_list = self.match_cache.get(_cache_key)
+                if _match_list is not None:
+                    Metrics.inc('chat_robot_match_cache_total', result='hit')
+                    _cache_key = None
                 else:
-                    # 只需查询一个问题分类的结果
-                    _is_best, _match = self._match_stdq_and_answer_single(
-                        _question_vector, _collection, _milvus, partition=_partition
-                    )
-                    if _match is None:
-                        # 没有匹配到答案
-                        _match_list = list()
+                    Metrics.inc('chat_robot_match_cache_total', result='miss')
+
+            if _match_list is None:
+                # 查询标准问题及答案
+                _question_vector = question_vector
+                if _question_vector is None:
+                    _question_vector = self.qa_manager.encode_questions([question, ])[0]
+                with self.qa_manager.get_milvus() as _milvus:
+                    # 进行匹配
+                    if _collection is None and _partition is None:
+                        # 查询多个问题分类的结果清单
+                        _match_list = self._match_stdq_and_answers(
+                            _question_vector, _milvus
+                        )
                     else:
-                        # 只返回第一个匹配上的
-                        _match_list = [_match[0], ]
+                        # 只需查询一个问题分类的结果
+                        _is_best, _match = self._match_stdq_and_answer_single(
+                            _question_vector, _collection, _milvus, partition=_partition
+                        )
+                        if _match is None:
+                            # 没有匹配到答案
+                            _match_list = list()
+                        else:
+                            # 只返回第一个匹配上的
+                            _match_list = [_match[0], ]
+
+                if _cache_key is not None:
+                    self.match_cache.set(_cache_key, _match_list)
+
+            # 对返回的标准问题和结果进行处理
+            _answer = self._deal_with_match_list(
+                question, session_id, _match_list, _collection, _context_id
+            )
 
-        # 对返回的标准问题和结果进行处理
-        _answer = self._deal_with_match_list(
-            question, session_id, _match_list, _collection, _context_id
-        )
+            # 返回答案
+            return _answer
 
-        # 返回答案
-        return _answer
+    def quession_search_batch(self, items: list) -> list:
+        """
+        批量搜寻问题答案
+        所有问题的向量通过一次编码生成；不同session的问题可并发处理，同一session的问题按顺序处理
+
+        @param {list} items - 问题清单，每个问题为一个字典，key与quession_search的入参一致:
+            question, session_id, collection, std_question_id, std_question_tag
+
+        @returns {list} - 与items顺序对应的结果清单，每个结果为(answers, exception)
+            处理成功时exception为None，处理失败时answers为None；问题不是字典或没有question时exception为ValueError
+        """
+        _results = [None] * len(items)
+
+        # 检查参数，参数不正确的问题直接返回错误，不影响其他问题
+        _valid_index = list()
+        for _i in range(len(items)):
+            if not isinstance(items[_i], dict) or items[_i].get('question', None) is None:
+                _results[_i] = (None, ValueError('item [%d] question is null!' % _i))
+            else:
+                _valid_index.append(_i)
+
+        # 一次性生成需要匹配的问题向量
+        _vectors = dict()
+        _vector_index = [
+            _i for _i in _valid_index if items[_i].get('std_question_id', None) is None and items[_i].get(
+                'std_question_tag', None) is None
+        ]
+        if len(_vector_index) > 0:
+            try:
+                _encoded = self.qa_manager.encode_questions(
+                    [items[_i]['question'] for _i in _vector_index]
+                )
+                _vectors = dict(zip(_vector_index, _encoded))
+            except:
+                # 批量编码失败，在逐个问题处理时再编码
+                self._log_error('batch encode questions error: %s' % traceback.format_exc())
+
+        # 按session分组
+        _groups = dict()
+        for _i in _valid_index:
+            _groups.setdefault(items[_i].get('session_id', None), list()).append(_i)
+
+        def deal_group(index_list: list):
+            # 按顺序处理同一个session的问题
+            for _i in index_list:
+                _item = items[_i]
+                try:
+                    _answers = self.quession_search(
+                        _item['question'], session_id=_item.get('session_id', None),
+                        collection=_item.get('collection', None),
+                        std_question_id=_item.get('std_question_id', None),
+                        std_question_tag=_item.get('std_question_tag', None),
+                        question_vector=_vectors.get(_i, None)
+                    )
+                    _results[_i] = (_answers, None)
+                except Exception as e:
+                    _results[_i] = (None, e)
+
+        def deal_group_in_thread(index_list: list):
+            # 在线程中处理需要单独的数据库连接
+            with self.qa_manager.database.connection_context():
+                deal_group(index_list)
+
+        if self._batch_executor is None or len(_groups) <= 1:
+            for _index_list in _groups.values():
+                deal_group(_index_list)
+        else:
+            _futures = [
+                self._batch_executor.submit(deal_group_in_thread, _index_list)
+                for _index_list in _groups.values()
+            ]
+            for _future in _futures:
+                _future.result()
+
+        return _results
 
     #############################
     # 主动推送给客户端的消息处理
@@ -733,10 +1077,10 @@ class QA(object):
         @returns {list} - 返回的问题答案字符数组，有可能是多个答案
         """
         _match_list = list()
-        _stdq = StdQuestion.get_or_none(StdQuestion.id == std_question_id)
-        if _stdq is not None:
-            _answer = Answer.get(Answer.std_question_id == std_question_id)
-            _match_list.append((_stdq, _answer))
+        _stdq = None
+        if self.qa_manager.answer_catalog.get_by_std_question_id(std_question_id) is not None:
+            _match_list.append(self._get_stdq_and_answer_by_id(std_question_id))
+            _stdq = _match_list[0][0]
 
         # 对返回的标准问题和结果进行预处理
         if len(_match_list) == 0:
@@ -766,54 +1110,23 @@ class QA(object):
 
         @returns {list} - 处理后的答案
         """
-        if not self.check_session_exists(session_id) or not replace_pre_def or type(answers[0]) != str:
+        if not replace_pre_def or len(answers) == 0 or type(answers[0]) != str:
             # 原样返回
             return answers
 
-        # 替换函数
-        def replace_var_fun(m):
-            _match_str = m.group(0)
-            _value = None
-            if _match_str.startswith('{$info='):
-                # 获取info的值
-                _key = _match_str[7:-2]
-                _session_value = self.get_info_by_key(session_id, _key, default=None)
-                if _session_value is not None:
-                    _value = _session_value
-            elif _match_str.startswith('{$cache=') and context_id is not None:
-                # 获取缓存的值
-                _key = _match_str[8:-2]
-                _value = self.get_cache_value(session_id, _key, default=None, context_id=context_id)
-            elif _match_str.startswith('{$config='):
-                # 获取qa_config的值
-                _key = _match_str[9:-2]
-                _value = self.qa_config.get(_key, None)
-            elif _match_str.startswith('{$para='):
-                # 通用参数
-                _key = _match_str[7:-2]
-                _value = self.qa_manager.DATA_MANAGER_PARA['common_para'].get(_key, None)
-
-            if _value is not None:
-                return str(_value)
-            else:
-                return _match_str
-
-        # 逐行替换
-        _len = len(answers)
-        if _len > 0:
-            if type(answers[0]) == dict:
-                # 返回的是字典，变更字典值就可以
-                for _key in answers[0].keys():
-                    answers[0][_key] = re.sub(
-                        r'\{\$.+?\$\}', replace_var_fun, answers[0][_key], re.M
-                    )
-            else:
-                _index = 0
-                while _index < _len:
-                    answers[_index] = re.sub(
-                        r'\{\$.+?\$\}', replace_var_fun, answers[_index], re.M
-                    )
-                    _index += 1
+        # 获取编译后的模板，没有占位符的答案无需处理
+        _templates = [self.qa_manager.answer_catalog.get_template(_answer) for _answer in answers]
+        if len([_template for _template in _templates if _template.has_var]) == 0:
+            return answers
+
+        if not self.check_session_exists(session_id):
+            return answers
+
+        # 一次性获取所有占位符的值后渲染
+        with Metrics.timer('chat_robot_stage_seconds', stage='answer_render'):
+            _values = self._get_template_values(session_id, _templates, context_id)
+            for _index in range(len(answers)):
+                answers[_index] = _templates[_index].render(_values)
 
         # 返回结果
         return answers
@@ -821,6 +1134,32 @@ class QA(object):
     #############################
     # 内部函数
     #############################
+    def _get_template_values(self, session_id: str, templates: list, context_id: str = None) -> dict:
+        """
+        获取答案模板占位符的值(每类值只获取一次)
+
+        @param {str} session_id - 客户session id
+        @param {list} templates - 答案模板清单
+        @param {str} context_id=None - 上下文临时id
+
+        @returns {dict} - 占位符的值字典, key为var_type, value为该类型的{key: value}字典
+        """
+        _values = dict()
+        _var_types = set()
+        for _template in templates:
+            _var_types.update([_type for _type in _template.keys.keys() if len(_template.keys[_type]) > 0])
+
+        if 'info' in _var_types:
+            _values['info'] = self.get_info_dict(session_id)
+        if 'cache' in _var_types and context_id is not None:
+            _values['cache'] = self.get_cache_dict(session_id, default={}, context_id=context_id)
+        if 'config' in _var_types:
+            _values['config'] = self.qa_config
+        if 'para' in _var_types:
+            _values['para'] = self.qa_manager.DATA_MANAGER_PARA['common_para']
+
+        return _values
+
     def _deal_with_match_list(self, question: str, session_id: str, match_list: list,
                               collection: str, context_id: str):
         """
@@ -835,6 +1174,9 @@ class QA(object):
         @returns {list} - 返回答案数组
         """
         _match_list = match_list
+        Metrics.inc('chat_robot_match_result_total', result=(
+            'no_match' if len(_match_list) == 0 else ('best' if len(_match_list) == 1 else 'multiple')
+        ))
         if len(_match_list) == 0:
             # 没有匹配到答案, 插入记录表用于后续改进
             NoMatchAnswers.create(
@@ -869,19 +1211,14 @@ class QA(object):
         """
         while not self._session_overtime_thread_stop:
             try:
-                _del_list = list()
                 if self.use_redis:
+                    # 从超时队列中获取最近访问时间已超时的session
                     with redis.Redis(connection_pool=self.redis_pool) as _redis:
-                        for _key in _redis.hkeys('chat_robot:session:list'):
-                            _last_time = self._get_redis_dict_by_key(
-                                'chat_robot:session:list', _key, _redis
-                            )
-                            if _last_time is None or type(_last_time) != datetime.datetime or (datetime.datetime.now() - _last_time).total_seconds() > self.session_overtime:
-                                _del_list.append(_key)
+                        _del_list = _redis.zrangebyscore(
+                            'chat_robot:session:expire', '-inf', time.time() - self.session_overtime
+                        )
                 else:
-                    for _key in self.sessions.keys():
-                        if (datetime.datetime.now() - self.sessions[_key]['last_time']).total_seconds() > self.session_overtime:
-                            _del_list.append(_key)
+                    _del_list = self._pop_overtime_sessions()
 
                 # 开始清除
                 for _session_id in _del_list:
@@ -894,6 +1231,146 @@ class QA(object):
             # 等待
             time.sleep(self.session_checktime)
 
+    def _delete_unuse_session_batch(self, session_list: list, redis_connection) -> int:
+        """
+        删除一批session中的无效session(已不在session清单中的)
+
+        @param {list} session_list - 要检查的session_id清单
+        @param {object} redis_connection - redis连接对象
+
+        @returns {int} - 删除的session数量
+        """
+        _pipe = redis_connection.pipeline(transaction=False)
+        for _session_id in session_list:
+            _pipe.hexists('chat_robot:session:list', _session_id)
+
+        _unuse_list = [
+            _session_id for _session_id, _exists in zip(session_list, _pipe.execute()) if not _exists
+        ]
+        if len(_unuse_list) == 0:
+            return 0
+
+        # 获取session及下级字典的key后一次性删除
+        _names = self._get_redis_dict_names_batch(
+            ['chat_robot:session:%s' % _session_id for _session_id in _unuse_list], redis_connection
+        )
+
+        _pipe = redis_connection.pipeline(transaction=False)
+        _pipe.delete(*_names)
+        _pipe.zrem('chat_robot:session:expire', *_unuse_list)
+        _pipe.execute()
+
+        self._log_debug('delete unuse session %s!' % str(_unuse_list))
+        return len(_unuse_list)
+
+    def _pop_overtime_sessions(self) -> list:
+        """
+        从超时堆中获取已超时的session(内存模式)
+        只处理堆顶已超过超时时间的记录，期间有访问过的session按实际访问时间重新放入堆中
+
+        @returns {list} - 已超时的session_id清单
+        """
+        _del_list = list()
+        _overtime = datetime.datetime.now() - datetime.timedelta(seconds=self.session_overtime)
+        with self._session_lock:
+            while len(self._session_expire_heap) > 0 and self._session_expire_heap[0][0] < _overtime:
+                _last_time, _session_id = heapq.heappop(self._session_expire_heap)
+                _session = self.sessions.get(_session_id, None)
+                if _session is None:
+                    # 已删除
+                    continue
+
+                if _session['last_time'] < _overtime:
+                    _del_list.append(_session_id)
+                else:
+                    # 有访问过，重新放入堆
+                    heapq.heappush(self._session_expire_heap, (_session['last_time'], _session_id))
+
+        return _del_list
+
+    def _init_redis_session_expire(self) -> dict:
+        """
+        将session清单中没有登记超时队列的session登记到超时队列(Redis模式)
+        通过HSCAN逐批扫描session清单，每批通过一次ZADD NX登记(已登记的session不会被覆盖)，
+        批次之间按session_sweep_interval等待；全部完成后设置迁移标志，之后启动时不再执行
+        注：用于兼容旧版本创建的session；如果仍有旧版本的服务在创建session，可删除迁移标志后重启重新执行
+
+        @returns {dict} - 处理结果统计
+            scan_count : 扫描的session数量
+            add_count : 登记到超时队列的session数量
+            skip : 是否因已完成迁移而跳过
+        """
+        _scan_count = 0
+        _add_count = 0
+        _start = time.time()
+        with redis.Redis(connection_pool=self.redis_pool) as _redis:
+            if _redis.exists('chat_robot:session_expire_migrated'):
+                return {'scan_count': 0, 'add_count': 0, 'skip': True}
+
+            _mapping = dict()
+            for _session_id, _value in _redis.hscan_iter(
+                'chat_robot:session:list', count=self.session_sweep_batch
+            ):
+                _scan_count += 1
+                _last_time = self._redis_str_to_value(_value)
+                _mapping[_session_id] = (
+                    _last_time.timestamp() if type(_last_time) == datetime.datetime else 0
+                )
+
+                if len(_mapping) >= self.session_sweep_batch:
+                    _add_count += _redis.zadd('chat_robot:session:expire', _mapping, nx=True)
+                    _mapping.clear()
+                    if self.session_sweep_interval > 0:
+                        time.sleep(self.session_sweep_interval)
+
+            if len(_mapping) > 0:
+                _add_count += _redis.zadd('chat_robot:session:expire', _mapping, nx=True)
+
+            _redis.set('chat_robot:session_expire_migrated', 1)
+
+        self._log_info('add sessions to expire queue finished: scan[%d] add[%d] use[%.3fs]' % (
+            _scan_count, _add_count, time.time() - _start
+        ))
+        return {'scan_count': _scan_count, 'add_count': _add_count, 'skip': False}
+
+    def _session_sweep_thread_fun(self):
+        """
+        启动时在后台执行的session整理线程(Redis模式)
+        先将旧版本创建的session登记到超时队列，再清除无效session
+        """
+        try:
+            self._init_redis_session_expire()
+        except:
+            self._log_error('init redis session expire error: %s' % traceback.format_exc())
+
+        try:
+            self.delete_unuse_sessions()
+        except:
+            self._log_error('delete unuse sessions error: %s' % traceback.format_exc())
+
+    def _normalize_question(self, question: str) -> str:
+        """
+        标准化问题文本(用于缓存key)
+
+        @param {str} question - 提出的问题
+
+        @returns {str} - 去除首尾及多余空白、转换为小写后的问题
+        """
+        return ' '.join(question.split()).lower()
+
+    def _on_data_change(self, action: str):
+        """
+        问题数据变更的处理函数
+
+        @param {str} action - 变更操作名
+        """
+        self.match_cache.clear()
+        self._log_debug('clear match cache by data change: %s' % action)
+
+        # 将变更后的意图配置推送到NLP工作进程
+        if self.use_nlp:
+            self.nlp.refresh_worker_para()
+
     def _pre_deal_context(self, question: str, session_id: str, collection: str, std_question_id: int,
                           std_question_tag: str):
         """
@@ -926,18 +1403,21 @@ class QA(object):
         # 如果指定了标准问题，无需匹配，直接使用
         if std_question_id is not None:
             _match_list = [
-                (StdQuestion.get(StdQuestion.id == std_question_id),
-                 Answer.get(Answer.std_question_id == std_question_id))
+                self._get_stdq_and_answer_by_id(std_question_id)
             ]
             return _collection, _partition, _match_list, _answers, _context_id
 
         # 如果指定了标准问题tag
         if std_question_tag is not None:
-            _std_q = StdQuestion.get(
-                (StdQuestion.tag == std_question_tag) & (StdQuestion.collection == _collection)
+            _stdq_and_answer = self.qa_manager.answer_catalog.get_by_tag(
+                std_question_tag, _collection
             )
+            if _stdq_and_answer is None:
+                raise StdQuestion.DoesNotExist(
+                    'StdQuestion not exists: tag[%s], collection[%s]' % (std_question_tag, _collection)
+                )
             _match_list = [
-                (_std_q, Answer.get(Answer.std_question_id == _std_q.id))
+                self._get_stdq_and_answer_by_id(_stdq_and_answer[0].id)
             ]
             return _collection, _partition, _match_list, _answers, _context_id
 
@@ -963,8 +1443,7 @@ class QA(object):
                         _stdq_id = _context_dict['options']['options'][_index -
                                                                        1]['std_question_id']
                         _match_list = [
-                            (StdQuestion.get(StdQuestion.id == _stdq_id),
-                             Answer.get(Answer.std_question_id == _stdq_id))
+                            self._get_stdq_and_answer_by_id(_stdq_id)
                         ]
                         # 清除上下文
                         self.clear_session_dict(session_id, 'context')
@@ -976,11 +1455,13 @@ class QA(object):
                 _ask_info = _context_dict['ask']
                 _context_id = _ask_info['context_id']
                 _deal_fun = self.plugins['ask'][_ask_info['deal_class']][_ask_info['deal_fun']]
-                _action, _ret = _deal_fun(
-                    question, session_id, _context_id,
-                    _ask_info['std_question_id'], _ask_info['collection'], _ask_info['partition'],
-                    self, self.qa_manager, **_ask_info['param']
-                )
+                with Metrics.timer('chat_robot_plugin_seconds', plugin_type='ask',
+                                   plugin_class=_ask_info['deal_class'], plugin_fun=_ask_info['deal_fun']):
+                    _action, _ret = _deal_fun(
+                        question, session_id, _context_id,
+                        _ask_info['std_question_id'], _ask_info['collection'], _ask_info['partition'],
+                        self, self.qa_manager, **_ask_info['param']
+                    )
 
                 if _action is None:
                     _action = 'again'
@@ -997,8 +1478,7 @@ class QA(object):
                     # 跳转到指定问题
                     _stdq_id = _ret
                     _match_list = [
-                        (StdQuestion.get(StdQuestion.id == _stdq_id),
-                            Answer.get(Answer.std_question_id == _stdq_id))
+                        self._get_stdq_and_answer_by_id(_stdq_id)
                     ]
                     # 清除上下文
                     self.clear_session_dict(session_id, 'context')
@@ -1017,8 +1497,7 @@ class QA(object):
                     # 重新提问一次
                     if _ret is None:
                         _answers = [
-                            Answer.get(Answer.std_question_id ==
-                                       _ask_info['std_question_id']).answer
+                            self._get_stdq_and_answer_by_id(_ask_info['std_question_id'])[1].answer
                         ]
                     else:
                         _answers = _ret
@@ -1061,8 +1540,7 @@ class QA(object):
             _partition = None
         _stdq_id = _action_list[0]['std_question_id']
         _match_list = [
-            (StdQuestion.get(StdQuestion.id == _stdq_id),
-                Answer.get(Answer.std_question_id == _stdq_id))
+            self._get_stdq_and_answer_by_id(_stdq_id)
         ]
 
         # 根据不同答案类型变更返回的列表信息, 将匹配信息更新至调用函数的参数中
@@ -1075,13 +1553,14 @@ class QA(object):
                 'match_type': _action_list[0]['match_type'],
             }
             _matched_info.update(_action_list[0]['info'])
-            _type_param = eval(_answer.type_param)
+            _type_param = self._get_type_param(_answer)  # 复制后再修改
             if _answer.a_type == 'job':
                 _type_param[2].update(_matched_info)
             elif _answer.a_type == 'ask':
                 _type_param[4].update(_matched_info)
 
-            _answer.type_param = str(_type_param)
+            # 缓存的答案记录不可修改，生成新的答案记录
+            _match_list[0] = (_match_list[0][0], _answer._replace(type_param_obj=_type_param))
 
         # 返回结果
         return _collection, _partition, _match_list, _answers
@@ -1095,11 +1574,25 @@ class QA(object):
 
         @returns {list} - 返回问题答案清单
         """
-        _match_list = list()
-        for _collection in self.qa_manager.sorted_collection:
-            _is_best, _match = self._match_stdq_and_answer_single(
-                question_vector, _collection, milvus
+        _collections = list(self.qa_manager.sorted_collection)
+        if self._search_executor is not None and len(_collections) > 1:
+            # 并发检索所有问题分类，再按分类优先顺序处理结果
+            _futures = [
+                self._search_executor.submit(
+                    self._search_milvus, question_vector, _collection, milvus
+                ) for _collection in _collections
+            ]
+            _search_results = (_future.result() for _future in _futures)
+        else:
+            # 按顺序逐个分类检索(遇到最优匹配即停止检索)
+            _search_results = (
+                self._search_milvus(question_vector, _collection, milvus)
+                for _collection in _collections
             )
+
+        _match_list = list()
+        for _collection, _result in zip(_collections, _search_results):
+            _is_best, _match = self._deal_with_search_result(_result, _collection)
             if _match is None:
                 # 找不到结果的情况不处理
                 continue
@@ -1127,22 +1620,50 @@ class QA(object):
         @returns {bool, list} - 返回是否最优匹配标志和问题答案 is_best, [(StdQuestion, Answer), ...], 如果查询不到返回None
             注意：有可能查到有StdQuestion，Answer为None的情况
         """
+        _result = self._search_milvus(question_vector, collection, milvus, partition=partition)
+        return self._deal_with_search_result(_result, collection, partition=partition)
+
+    def _search_milvus(self, question_vector, collection: str, milvus: mv.Milvus,
+                       partition: str = None):
+        """
+        在单个问题分类中检索向量
+
+        @param {object} question_vector - 问题向量对象
+        @param {str} collection - 问题分类
+        @param {mv.Milvus} milvus - Milvus服务器连接对象
+        @param {str} partition=None - 场景
+
+        @returns {list} - milvus的检索结果
+        """
         _collection = collection
         if _collection is None:
             _collection = self.qa_manager.sorted_collection[0]
 
-        _status, _result = milvus.search(
-            _collection, top_k=self.multiple_in_collection, query_records=[question_vector, ],
-            partition_tags=partition, params={'nprobe': self.nprobe}
-        )
+        with Metrics.timer('chat_robot_milvus_search_seconds', collection=_collection):
+            _status, _result = milvus.search(
+                _collection, top_k=self.multiple_in_collection, query_records=self.qa_manager.to_milvus_records(question_vector),
+                partition_tags=partition, params={'nprobe': self.nprobe}
+            )
         self.qa_manager.confirm_milvus_status(_status, 'search')
-        if len(_result) == 0:
+        return _result
+
+    def _deal_with_search_result(self, result, collection: str, partition: str = None):
+        """
+        根据向量检索结果获取匹配的标准问题和答案
+
+        @param {list} result - milvus的检索结果
+        @param {str} collection - 问题分类
+        @param {str} partition=None - 场景
+
+        @returns {bool, list} - 返回是否最优匹配标志和问题答案 is_best, [(StdQuestion, Answer), ...], 如果查询不到返回None
+        """
+        if len(result) == 0:
             # 没有找到任何匹配项
             return False, None
 
         _match_list = list()
         _match_std = list()  # 匹配问题id清单，用于避免扩展问题重复匹配
-        for _match in _result[0]:
+        for _match in result[0]:
             _stdq_and_answer = self._get_stdq_and_answer_from_db(
                 _match.id, collection, partition
             )
@@ -1176,27 +1697,42 @@ class QA(object):
         @returns {tuple} - 返回(StdQuestion, Answer), 如果查询不到返回None
             注意：有可能查到有StdQuestion，Answer为None的情况
         """
-        _stdq = StdQuestion.get_or_none(
-            (StdQuestion.milvus_id == milvus_id) & (StdQuestion.collection == collection) & (
-                StdQuestion.partition == ('' if partition is None else partition))
-        )
-        if _stdq is None:
-            # 查询问题扩展
-            _sub_query = (ExtQuestion.select(ExtQuestion.std_question_id)
-                          .where(ExtQuestion.milvus_id == milvus_id))
-            _stdq = (StdQuestion.select()
-                     .where(StdQuestion.id.in_(_sub_query) & (StdQuestion.collection == collection) & (
-                         StdQuestion.partition == ('' if partition is None else partition)))
-                     .get())
-            if _stdq is None:
-                # 扩展问题也找不到
-                return None
-
-        # 查询答案
-        _answer = Answer.get(Answer.std_question_id == _stdq.id)
+        with Metrics.timer('chat_robot_stage_seconds', stage='answer_lookup'):
+            return self.qa_manager.answer_catalog.get_by_milvus_id(milvus_id, collection, partition)
 
-        # 返回结果
-        return (_stdq, _answer)
+    def _get_stdq_and_answer_by_id(self, std_question_id: int) -> tuple:
+        """
+        通过标准问题id获取标准问题答案
+
+        @param {int} std_question_id - 标准问题id
+
+        @returns {tuple} - 返回(StdQuestion, Answer)
+        """
+        with Metrics.timer('chat_robot_stage_seconds', stage='answer_lookup'):
+            _stdq_and_answer = self.qa_manager.answer_catalog.get_by_std_question_id(std_question_id)
+
+        if _stdq_and_answer is None:
+            raise StdQuestion.DoesNotExist('StdQuestion not exists: id[%s]' % str(std_question_id))
+
+        if _stdq_and_answer[1] is None:
+            raise Answer.DoesNotExist('Answer not exists: std_question_id[%s]' % str(std_question_id))
+
+        return _stdq_and_answer
+
+    def _get_type_param(self, answer, is_copy: bool = True):
+        """
+        获取答案解析后的type_param
+
+        @param {AnswerRecord} answer - 答案记录
+        @param {bool} is_copy=True - 是否返回复制的对象(需要修改参数时必须复制，避免修改缓存的对象)
+
+        @returns {list} - 解析后的type_param
+        """
+        if answer.type_param_obj is None:
+            # 没有预先解析的对象
+            return eval(answer.type_param)
+
+        return copy.deepcopy(answer.type_param_obj) if is_copy else answer.type_param_obj
 
     def _get_no_match_answer(self, session_id: str, collection: str):
         """
@@ -1215,19 +1751,20 @@ class QA(object):
         _collection = collection
         if collection is None:
             _collection = self.no_answer_collection
-        _stdq = StdQuestion.get_or_none(
-            (StdQuestion.milvus_id == self.no_answer_milvus_id) & (StdQuestion.collection == _collection) & (
-                StdQuestion.partition == '')
+        _stdq_and_answer = self.qa_manager.answer_catalog.get_by_milvus_id(
+            self.no_answer_milvus_id, _collection, None
         )
-        if _stdq is None:
-            _stdq = StdQuestion.get(
-                (StdQuestion.milvus_id == self.no_answer_milvus_id) & (StdQuestion.collection == self.no_answer_collection) & (
-                    StdQuestion.partition == '')
+        if _stdq_and_answer is None:
+            _stdq_and_answer = self.qa_manager.answer_catalog.get_by_milvus_id(
+                self.no_answer_milvus_id, self.no_answer_collection, None
             )
+            if _stdq_and_answer is None:
+                raise StdQuestion.DoesNotExist(
+                    'StdQuestion not exists: milvus_id[%s], collection[%s]' % (
+                        str(self.no_answer_milvus_id), self.no_answer_collection)
+                )
 
-        _answer = Answer.get_or_none((Answer.std_question_id == _stdq.id))
-
-        return [(_stdq, _answer)]
+        return [_stdq_and_answer]
 
     def _get_match_one_answer(self, question: str, session_id: str, collection: str, match_list: list,
                               context_id: str = None) -> str:
@@ -1251,6 +1788,10 @@ class QA(object):
             )
         elif _answer.a_type == 'json':
             # json格式
+            if _answer.answer_obj is not None:
+                # 无需替换预定义值，直接使用预先解析的对象
+                return [copy.deepcopy(_answer.answer_obj)]
+
             _json_dict = eval(self.answer_replace_pre_def(
                 session_id, [_answer.answer], _answer.replace_pre_def == 'Y', context_id=context_id
             )[0])
@@ -1260,21 +1801,23 @@ class QA(object):
             if not self.check_session_exists(session_id):
                 raise FileNotFoundError('not support options if session id is None!')
 
-            _options = eval(_answer.type_param)
+            _options = self._get_type_param(_answer, is_copy=False)
+
+            # 提示信息和选项文本一起替换预定义值
+            _texts = self.answer_replace_pre_def(
+                session_id, [_answer.answer, ] + [_option[1] for _option in _options],
+                _answer.replace_pre_def == 'Y', context_id=context_id
+            )
             _back_answers = {
                 'data_type': 'options',
-                'tips': self.answer_replace_pre_def(
-                    session_id, [_answer.answer, ], _answer.replace_pre_def == 'Y', context_id=context_id
-                )[0],
+                'tips': _texts[0],
                 'options': list(),
             }
 
             _index = 1
             for _option in _options:
                 _back_answers['options'].append({
-                    'option_str': "%d. %s" % (_index, self.answer_replace_pre_def(
-                        session_id, [_option[1], ], _answer.replace_pre_def == 'Y', context_id=context_id
-                    )[0]),
+                    'option_str': "%d. %s" % (_index, _texts[_index]),
                     'std_question_id': _option[0],
                     'index': _index
                 })
@@ -1287,19 +1830,20 @@ class QA(object):
             return [_back_answers, ]
         elif _answer.a_type == 'job':
             # 操作类答案处理，如果处理完成为None，则用answer字段进行提示，type_param的格式为[class_name, fun_name, {para_dict}]
-            _type_param = eval(_answer.type_param)
+            _type_param = self._get_type_param(_answer)
             _job_fun = self.plugins['job'][_type_param[0]][_type_param[1]]
-            _action, _ret = _job_fun(
-                question, session_id, match_list, self, self.qa_manager,
-                **_type_param[2]
-            )
+            with Metrics.timer('chat_robot_plugin_seconds', plugin_type='job',
+                               plugin_class=_type_param[0], plugin_fun=_type_param[1]):
+                _action, _ret = _job_fun(
+                    question, session_id, match_list, self, self.qa_manager,
+                    **_type_param[2]
+                )
 
             if _action == 'to':
                 # 跳转到指定问题
                 _stdq_id = _ret
                 _job_match_list = [
-                    (StdQuestion.get(StdQuestion.id == _stdq_id),
-                        Answer.get(Answer.std_question_id == _stdq_id))
+                    self._get_stdq_and_answer_by_id(_stdq_id)
                 ]
 
                 return self._deal_with_match_list(
@@ -1332,7 +1876,7 @@ class QA(object):
                     return _answers
             else:
                 # 新的问题处理
-                _type_param = eval(_answer.type_param)
+                _type_param = self._get_type_param(_answer)
 
                 _ask_info = {
                     'deal_class': _type_param[0],
@@ -1446,6 +1990,159 @@ class QA(object):
             session_id
         )
 
+    def _get_session_section(self, session_id: str, section: str, redis_connection) -> dict:
+        """
+        获取blob格式session的部分字典(旧格式的数据将自动转换为blob格式)
+
+        @param {str} session_id - session id
+        @param {str} section - session的部分，如info、context、cache、context_cache
+        @param {object} redis_connection - redis的连接
+
+        @returns {dict} - 部分字典
+        """
+        _unit = self._get_session_unit(session_id)
+        if _unit is not None:
+            return _unit.get_section(section)
+
+        _value = redis_connection.hget('chat_robot:session:%s' % session_id, section)
+        if _value is None:
+            return dict()
+
+        if not SessionCodec.is_blob(_value):
+            # 旧格式的数据，转换为新格式
+            return self._update_session_section(session_id, section, None, redis_connection)
+
+        return SessionCodec.decode(_value)
+
+    def _update_session_section(self, session_id: str, section: str, update_fun, redis_connection) -> dict:
+        """
+        更新blob格式session的部分字典(通过WATCH事务保证读取和写入的原子性)
+
+        @param {str} session_id - session id
+        @param {str} section - session的部分，如info、context、cache、context_cache
+        @param {function} update_fun - 更新函数，入参为部分字典，直接修改该字典; 传None代表只转换旧格式数据
+        @param {object} redis_connection - redis的连接
+
+        @returns {dict} - 更新后的部分字典
+        """
+        _unit = self._get_session_unit(session_id)
+        if _unit is not None:
+            # 在工作单元中处理，结束时再写回
+            _dict = _unit.get_section(section)
+            if update_fun is not None:
+                update_fun(_dict)
+                _unit.set_changed(section)
+
+            return _dict
+
+        _name = 'chat_robot:session:%s' % session_id
+        _result = dict()
+
+        def transaction_fun(pipe):
+            _value = pipe.hget(_name, section)
+            _old_names = list()  # 旧格式需要删除的字典
+            if _value is None:
+                _dict = dict()
+            elif SessionCodec.is_blob(_value):
+                _dict = SessionCodec.decode(_value)
+            else:
+                # 旧格式, 从多级hash获取字典
+                _dict = self._redis_str_to_value(_value, pipe)
+                if _value.startswith('dict:'):
+                    self._get_redis_dict_names(_value[5:], pipe, _old_names)
+
+                if type(_dict) != dict:
+                    _dict = dict()
+
+            if update_fun is not None:
+                update_fun(_dict)
+
+            pipe.multi()
+            pipe.hset(_name, section, SessionCodec.encode(_dict))
+            pipe.hincrby(_name, 'version', 1)
+            if len(_old_names) > 0:
+                pipe.delete(*_old_names)
+
+            _result['dict'] = _dict
+
+        redis_connection.transaction(transaction_fun, _name)
+        return _result['dict']
+
+    def _get_session_unit(self, session_id: str) -> SessionUnit:
+        """
+        获取当前线程对应session的工作单元
+
+        @param {str} session_id - session id
+
+        @returns {SessionUnit} - 工作单元，没有时返回None
+        """
+        _unit = getattr(self._session_unit_local, 'unit', None)
+        if _unit is not None and _unit.session_id == session_id:
+            return _unit
+
+        return None
+
+    def _get_redis_dict_names(self, name: str, redis_connection, names: list):
+        """
+        获取旧格式字典及所有下级字典的redis key
+
+        @param {str} name - redis上的key
+        @param {object} redis_connection - redis连接对象
+        @param {list} names - 获取到的key将放入该清单
+        """
+        names.append(name)
+        for _value in redis_connection.hvals(name):
+            if _value.startswith('dict:'):
+                self._get_redis_dict_names(_value[5:], redis_connection, names)
+
+    def _get_redis_dict_names_batch(self, names: list, redis_connection) -> list:
+        """
+        批量获取旧格式字典及所有下级字典的redis key(每一层级通过一次pipeline获取)
+
+        @param {list} names - redis上的key清单
+        @param {object} redis_connection - redis连接对象
+
+        @returns {list} - 包含传入key及所有下级字典key的清单
+        """
+        _all_names = list()
+        _level_names = list(names)
+        while len(_level_names) > 0:
+            _all_names.extend(_level_names)
+            _pipe = redis_connection.pipeline(transaction=False)
+            for _name in _level_names:
+                _pipe.hvals(_name)
+
+            _level_names = [
+                _value[5:] for _values in _pipe.execute() for _value in _values if _value.startswith('dict:')
+            ]
+
+        return _all_names
+
+    def _replace_dict(self, old_dict: dict, new_dict: dict):
+        """
+        将字典的内容替换为新字典的内容
+
+        @param {dict} old_dict - 要替换内容的字典
+        @param {dict} new_dict - 新的内容
+        """
+        old_dict.clear()
+        old_dict.update(new_dict)
+
+    def _get_context_cache(self, context_cache: dict, context_id: str) -> dict:
+        """
+        获取上下文id对应的临时缓存字典(不存在时清掉其他上下文的临时信息并创建)
+
+        @param {dict} context_cache - session的context_cache字典
+        @param {str} context_id - 上下文id
+
+        @returns {dict} - 上下文id对应的缓存字典
+        """
+        if context_id not in context_cache.keys():
+            context_cache.clear()
+            context_cache[context_id] = dict()
+
+        return context_cache[context_id]
+
     def _add_redis_dict(self, name: str, mapping: dict, redis_connection):
         """
         将字典存入redis中
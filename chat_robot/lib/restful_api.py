@@ -32,6 +32,7 @@ sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
 # from chat_robot.lib.loader import QAServerLoader
 from chat_robot.lib.answer_db import UploadFileConfig
+from chat_robot.lib.session_unit import SessionConflictError
 
 
 __MOUDLE__ = 'restful_api'  # 模块名
@@ -645,6 +646,8 @@ class Qa(object):
                 00001 - 成功, 返回上下文选择清单
                 10001 - session id为必填
                 10002 - session id不存在或已失效
+                10003 - session被同一session的并发请求修改(修改了同一个key)，本次处理结果已放弃，客户端可重新提交
+                10004 - question为必填
                 2XXXX - 处理失败
             msg : 处理状态对应的描述
             answer_type: 'text'或'json'，指示返回的答案是文本数组，还是一个json对象
@@ -666,7 +669,12 @@ class Qa(object):
                 _ret_json['msg'] = 'session id is null'
                 return jsonify(_ret_json)
 
-            _question = request.json['question']
+            _question = request.json.get('question', None)
+            if _question is None:
+                _ret_json['status'] = '10004'
+                _ret_json['msg'] = 'question is null'
+                return jsonify(_ret_json)
+
             _collection = request.json.get('collection', None)
             if _collection == '':
                 _collection = None
@@ -681,14 +689,7 @@ class Qa(object):
             )
 
             # 处理返回类型
-            if len(_answers) > 0 and type(_answers[0]) == dict:
-                _ret_json['answer_type'] = 'json'
-                _ret_json['answers'] = _answers[0]
-            else:
-                _ret_json['answer_type'] = 'text'
-                _ret_json['answers'] = _answers
-                if len(_answers) > 1:
-                    _ret_json['status'] = '00001'
+            cls._set_answers(_ret_json, _answers)
         except FileNotFoundError:
             if _qa_loader.logger:
                 _qa_loader.logger.debug(
@@ -700,6 +701,17 @@ class Qa(object):
                 'status': '10002',
                 'msg': 'session id 不存在'
             }
+        except SessionConflictError:
+            if _qa_loader.logger:
+                _qa_loader.logger.debug(
+                    'Session conflict: %s' % traceback.format_exc(),
+                    extra={'callFunLevel': 1}
+                )
+            _ret_json = {
+                'interface_seq_id': _interface_seq_id,
+                'status': '10003',
+                'msg': 'session 被并发请求修改，请重新提交'
+            }
         except:
             if _qa_loader.logger:
                 _qa_loader.logger.error(
@@ -713,6 +725,133 @@ class Qa(object):
 
         return jsonify(_ret_json)
 
+    @classmethod
+    @FlaskTool.log
+    @FlaskTool.db_connect
+    @auth.login_required
+    def SearchAnswerBatch(cls, methods=['POST']):
+        """
+        批量获取问题答案 (/api/Qa/SearchAnswerBatch)
+        所有问题的向量通过一次编码生成，同一session的问题按传入顺序处理
+        传入信息为json字典，定义如下:
+            {
+                'interface_seq_id': '(可选)客户端序号，客户端可传入该值来支持异步调用'
+                'items': [
+                    {
+                        'item_id': '(可选)客户端的问题序号，将原样返回',
+                        'session_id': GetSessionId获取的session id,
+                        'question': 客户的输入,
+                        'collection': 指定的问题分类，可不传,
+                        'std_question_id': 直接指定对应的标准问题，特殊情况时使用
+                        'std_question_tag': 直接指定对应的标准问题tag，特殊情况时使用(与collection共同匹配)
+                    },
+                    ...
+                ]
+            }
+
+        @return {str} - 返回回答的json字符串
+            interface_seq_id : 回传客户端的接口请求id
+            status : 处理状态
+                00000 - 成功(每个问题的处理结果见results)
+                2XXXX - 处理失败
+            msg : 处理状态对应的描述
+            results : 与items顺序对应的结果清单，每个结果的字典定义与SearchAnswer的返回一致:
+                item_id : 客户端的问题序号(有传入时返回)
+                status : 问题的处理状态，与SearchAnswer的状态码一致
+                msg : 处理状态对应的描述
+                answer_type: 'text'或'json'
+                answers : 匹配答案
+        """
+        _qa_loader = RunTool.get_global_var('QA_LOADER')
+        _interface_seq_id = ''
+        try:
+            if hasattr(request, 'json') and request.json is not None:
+                _interface_seq_id = request.json.get('interface_seq_id', '')
+            _ret_json = {
+                'interface_seq_id': _interface_seq_id,
+                'status': '00000',
+                'msg': 'success',
+                'results': list(),
+            }
+
+            # 整理要处理的问题，参数不正确的问题单独返回错误，不影响其他问题
+            _items = list()
+            _item_rets = list()
+            for _item in request.json['items']:
+                if not isinstance(_item, dict):
+                    _item = dict()
+
+                _item_ret = {'status': '00000', 'msg': 'success'}
+                if 'item_id' in _item.keys():
+                    _item_ret['item_id'] = _item['item_id']
+
+                _search_item = {
+                    'session_id': _item.get('session_id', None),
+                    'question': _item.get('question', None),
+                    'collection': _item.get('collection', None),
+                    'std_question_id': _item.get('std_question_id', None),
+                    'std_question_tag': _item.get('std_question_tag', None),
+                }
+                if _search_item['collection'] == '':
+                    _search_item['collection'] = None
+
+                if _search_item['session_id'] is None:
+                    _item_ret['status'] = '10001'
+                    _item_ret['msg'] = 'session id is null'
+                elif _search_item['question'] is None:
+                    _item_ret['status'] = '10004'
+                    _item_ret['msg'] = 'question is null'
+
+                _items.append(_search_item)
+                _item_rets.append(_item_ret)
+
+            # 只处理参数正确的问题
+            _search_index = [
+                _i for _i in range(len(_items)) if _item_rets[_i]['status'] == '00000'
+            ]
+            _search_results = _qa_loader.qa.quession_search_batch(
+                [_items[_i] for _i in _search_index]
+            )
+            _results = dict(zip(_search_index, _search_results))
+
+            for _i in range(len(_items)):
+                _item_ret = _item_rets[_i]
+                if _i in _results.keys():
+                    _answers, _error = _results[_i]
+                    if _error is None:
+                        cls._set_answers(_item_ret, _answers)
+                    elif isinstance(_error, FileNotFoundError):
+                        _item_ret['status'] = '10002'
+                        _item_ret['msg'] = 'session id 不存在'
+                    elif isinstance(_error, SessionConflictError):
+                        _item_ret['status'] = '10003'
+                        _item_ret['msg'] = 'session 被并发请求修改，请重新提交'
+                    else:
+                        if _qa_loader.logger:
+                            _qa_loader.logger.error(
+                                'Exception: %s' % ''.join(traceback.format_exception(
+                                    type(_error), _error, _error.__traceback__
+                                )),
+                                extra={'callFunLevel': 1}
+                            )
+                        _item_ret['status'] = '20001'
+                        _item_ret['msg'] = '获取答案出现异常'
+
+                _ret_json['results'].append(_item_ret)
+        except:
+            if _qa_loader.logger:
+                _qa_loader.logger.error(
+                    'Exception: %s' % traceback.format_exc(),
+                    extra={'callFunLevel': 1}
+                )
+            _ret_json = {
+                'interface_seq_id': _interface_seq_id,
+                'status': '20001',
+                'msg': '获取答案出现异常'
+            }
+
+        return jsonify(_ret_json)
+
     @classmethod
     @FlaskTool.log
     @FlaskTool.db_connect
@@ -1044,6 +1183,26 @@ class Qa(object):
 
         return jsonify(_ret_json)
 
+    #############################
+    # 内部函数
+    #############################
+    @classmethod
+    def _set_answers(cls, ret_json: dict, answers: list):
+        """
+        将问题答案按返回类型设置到返回字典
+
+        @param {dict} ret_json - 返回的字典
+        @param {list} answers - quession_search返回的答案
+        """
+        if len(answers) > 0 and type(answers[0]) == dict:
+            ret_json['answer_type'] = 'json'
+            ret_json['answers'] = answers[0]
+        else:
+            ret_json['answer_type'] = 'text'
+            ret_json['answers'] = answers
+            if len(answers) > 1:
+                ret_json['status'] = '00001'
+
 
 class QaDataManager(object):
     """
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Session数据编解码
+@module session_codec
+@file session_codec.py
+"""
+
+import os
+import sys
+import json
+import datetime
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'session_codec'  # 模块名
+__DESCRIPT__ = u'Session数据编解码'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class SessionCodec(object):
+    """
+    Session数据编解码
+    将session的一个部分(info、context、cache等)整体序列化为一个字符串，存入Redis时只需一个值
+    """
+
+    BLOB_PREFIX = 'blob:'  # 编码后字符串的前缀，用于与旧格式('dict:'、'str:'等)区分
+    DATETIME_KEY = '__datetime__'  # 日期时间对象的标识
+    DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+    @classmethod
+    def is_blob(cls, value_str: str) -> bool:
+        """
+        判断字符串是否编码后的格式
+
+        @param {str} value_str - 要判断的字符串
+
+        @returns {bool} - 是否编码格式
+        """
+        return value_str is not None and value_str.startswith(cls.BLOB_PREFIX)
+
+    @classmethod
+    def encode(cls, value) -> str:
+        """
+        将对象编码为字符串
+
+        @param {object} value - 要编码的对象，支持json的基础类型及datetime.datetime
+            注：tuple将转换为list，字典的key将转换为字符串
+
+        @returns {str} - 编码后的字符串
+        """
+        return cls.BLOB_PREFIX + json.dumps(
+            value, ensure_ascii=False, separators=(',', ':'), default=cls._json_default
+        )
+
+    @classmethod
+    def decode(cls, value_str: str, default=None):
+        """
+        将字符串解码为对象
+
+        @param {str} value_str - 编码后的字符串
+        @param {object} default=None - 字符串为None时返回的默认值
+
+        @returns {object} - 解码后的对象
+        """
+        if value_str is None:
+            return default
+
+        if not cls.is_blob(value_str):
+            raise ValueError('value is not a session blob: %s' % value_str)
+
+        return json.loads(value_str[len(cls.BLOB_PREFIX):], object_hook=cls._json_object_hook)
+
+    #############################
+    # 内部函数
+    #############################
+    @classmethod
+    def _json_default(cls, value):
+        """
+        json无法直接序列化对象的转换函数
+
+        @param {object} value - 要转换的对象
+
+        @returns {object} - 转换后的对象
+        """
+        if isinstance(value, datetime.datetime):
+            return {cls.DATETIME_KEY: value.strftime(cls.DATETIME_FORMAT)}
+        elif isinstance(value, (set, frozenset)):
+            return list(value)
+
+        raise TypeError('Object of type %s is not session serializable' % type(value).__name__)
+
+    @classmethod
+    def _json_object_hook(cls, obj: dict):
+        """
+        json反序列化字典的处理函数
+
+        @param {dict} obj - 反序列化的字典
+
+        @returns {object} - 转换后的对象
+        """
+        if len(obj) == 1 and cls.DATETIME_KEY in obj:
+            return datetime.datetime.strptime(obj[cls.DATETIME_KEY], cls.DATETIME_FORMAT)
+
+        return obj
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
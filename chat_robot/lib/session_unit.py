@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+请求内的session工作单元
+@module session_unit
+@file session_unit.py
+"""
+
+import os
+import sys
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+from chat_robot.lib.session_codec import SessionCodec
+
+
+__MOUDLE__ = 'session_unit'  # 模块名
+__DESCRIPT__ = u'请求内的session工作单元'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+class SessionConflictError(RuntimeError):
+    """
+    session并发修改冲突(当前请求与其他请求修改了session同一部分的同一个key)
+    """
+    pass
+
+
+class SessionUnit(object):
+    """
+    请求内的session工作单元(blob格式的Redis session使用)
+    请求开始时一次性加载整个session，请求处理过程中在内存中读写，请求结束时将变更的部分在一个事务中写回
+    注：通过session的version字段检测并发请求的冲突，冲突时重新读取最新的数据并按key重新应用当前请求的变更，
+        如果两个请求修改了同一个key(且值不同)，则抛出SessionConflictError，放弃当前请求的变更
+    """
+
+    SECTIONS = ('info', 'context', 'cache', 'context_cache')  # session的部分清单
+
+    def __init__(self, session_id: str, logger=None):
+        """
+        请求内的session工作单元
+
+        @param {str} session_id - session id
+        @param {Logger} logger=None - 日志对象
+        """
+        self.session_id = session_id
+        self.logger = logger
+        self.name = 'chat_robot:session:%s' % session_id  # session在redis上的key
+        self.exists = False  # session是否存在
+        self.version = 0  # 加载时session的版本
+        self.sections = dict()  # session各部分的字典
+        self.changed = set()  # 有变更的部分
+        self.last_time_value = None  # 要更新的最近访问时间(redis格式的字符串)
+        self.last_time_score = None  # 要更新的最近访问时间戳，用于登记超时队列
+
+        self._loaded_values = dict()  # 加载时各部分在redis上的值，用于检查冲突
+
+    #############################
+    # 公共函数
+    #############################
+    def load(self, redis_connection, migrate_fun=None):
+        """
+        从redis一次性加载session
+
+        @param {object} redis_connection - redis的连接
+        @param {function} migrate_fun=None - 旧格式数据的转换函数，入参为section，返回转换后的字典
+        """
+        _pipe = redis_connection.pipeline(transaction=False)
+        _pipe.hexists('chat_robot:session:list', self.session_id)
+        _pipe.hmget(self.name, ['version', ] + list(self.SECTIONS))
+        self.exists, _values = _pipe.execute()
+
+        self.version = int(_values[0] or 0)
+        for _i in range(len(self.SECTIONS)):
+            _section = self.SECTIONS[_i]
+            _value = _values[_i + 1]
+            if _value is None:
+                self.sections[_section] = dict()
+            elif SessionCodec.is_blob(_value):
+                self.sections[_section] = SessionCodec.decode(_value)
+            elif migrate_fun is not None:
+                # 旧格式的数据，转换后会变更版本，冲突检查直接比较值
+                self.sections[_section] = migrate_fun(_section)
+                _value = SessionCodec.encode(self.sections[_section])
+            else:
+                self.sections[_section] = dict()
+
+            self._loaded_values[_section] = _value
+
+    def get_section(self, section: str) -> dict:
+        """
+        获取session的部分字典
+
+        @param {str} section - session的部分
+
+        @returns {dict} - 部分字典
+        """
+        return self.sections.setdefault(section, dict())
+
+    def set_changed(self, section: str):
+        """
+        登记部分字典已变更
+
+        @param {str} section - session的部分
+        """
+        self.changed.add(section)
+
+    def flush(self, redis_connection):
+        """
+        将变更写回redis
+
+        @param {object} redis_connection - redis的连接
+
+        @throws {SessionConflictError} - 当前请求与其他请求修改了同一个key时抛出异常，当前请求的变更不写回
+        """
+        if not self.exists or (len(self.changed) == 0 and self.last_time_value is None):
+            # 无需写回
+            return
+
+        _changed = list(self.changed)
+
+        def transaction_fun(pipe):
+            _values = pipe.hmget(self.name, ['version', ] + _changed)
+            if not pipe.exists(self.name):
+                # session已被删除
+                pipe.multi()
+                return
+
+            if int(_values[0] or 0) != self.version:
+                # 有其他请求修改了session，在最新的数据上重新应用当前请求的变更
+                for _i in range(len(_changed)):
+                    if _values[_i + 1] != self._loaded_values.get(_changed[_i], None):
+                        self.sections[_changed[_i]] = self._merge_section(_changed[_i], _values[_i + 1])
+                        self._loaded_values[_changed[_i]] = _values[_i + 1]
+
+                # 合并结果以最新数据为基础，事务重试时与最新的版本比较
+                self.version = int(_values[0] or 0)
+
+            pipe.multi()
+            if len(_changed) > 0:
+                pipe.hset(self.name, mapping={
+                    _section: SessionCodec.encode(self.sections[_section]) for _section in _changed
+                })
+                pipe.hincrby(self.name, 'version', 1)
+
+            if self.last_time_value is not None:
+                pipe.hset('chat_robot:session:list', key=self.session_id, value=self.last_time_value)
+                pipe.zadd('chat_robot:session:expire', {self.session_id: self.last_time_score})
+
+        redis_connection.transaction(transaction_fun, self.name)
+        self.changed.clear()
+        self.last_time_value = None
+        self.last_time_score = None
+
+    #############################
+    # 内部函数
+    #############################
+    def _merge_section(self, section: str, latest_value: str) -> dict:
+        """
+        将当前请求对部分字典的变更(按key)应用到其他请求写入的最新数据上
+
+        @param {str} section - session的部分
+        @param {str} latest_value - 部分在redis上的最新值
+
+        @returns {dict} - 合并后的部分字典
+
+        @throws {SessionConflictError} - 当前请求与其他请求修改了同一个key时抛出异常
+        """
+        _base = self._decode_value(self._loaded_values.get(section, None))
+        _latest = self._decode_value(latest_value)
+        _current = self.sections[section]
+        _missing = object()  # 代表key不存在
+
+        for _key in set(_base.keys()) | set(_current.keys()):
+            _base_item = _base.get(_key, _missing)
+            _current_item = _current.get(_key, _missing)
+            if _current_item == _base_item:
+                # 当前请求未修改
+                continue
+
+            _latest_item = _latest.get(_key, _missing)
+            if _latest_item != _base_item and _latest_item != _current_item:
+                raise SessionConflictError('session [%s] section [%s] key [%s] changed by other request!' % (
+                    self.session_id, section, _key
+                ))
+
+            if _current_item is _missing:
+                _latest.pop(_key, None)
+            else:
+                _latest[_key] = _current_item
+
+        self._log_debug('session [%s] section [%s] changed by other request, merged' % (
+            self.session_id, section
+        ))
+        return _latest
+
+    def _decode_value(self, value: str) -> dict:
+        """
+        解码部分在redis上的值
+
+        @param {str} value - redis上的值
+
+        @returns {dict} - 部分字典，值不存在或非编码格式时返回空字典
+        """
+        if value is None or not SessionCodec.is_blob(value):
+            return dict()
+
+        return SessionCodec.decode(value, default=dict())
+
+    def _log_debug(self, msg: str, *args, **kwargs):
+        """
+        输出debug日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.debug(msg, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -0,0 +1,699 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+进程内的向量检索库
+@module vector_store
+@file vector_store.py
+"""
+
+import os
+import sys
+import json
+import shutil
+import threading
+from collections import namedtuple
+import numpy as np
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir)))
+
+
+__MOUDLE__ = 'vector_store'  # 模块名
+__DESCRIPT__ = u'进程内的向量检索库'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+VectorHit = namedtuple('VectorHit', ['id', 'distance'])  # 检索结果的匹配项, 与Milvus检索结果的属性一致
+
+
+class VectorStatus(object):
+    """
+    执行结果(与Milvus的Status接口一致)
+    """
+
+    def __init__(self, code: int = 0, message: str = 'Success'):
+        """
+        执行结果
+
+        @param {int} code=0 - 结果码，0代表成功
+        @param {str} message='Success' - 结果描述
+        """
+        self.code = code
+        self.message = message
+
+    def OK(self) -> bool:
+        """
+        是否执行成功
+
+        @returns {bool} - 是否成功
+        """
+        return self.code == 0
+
+    def __str__(self):
+        return 'Status(code=%d, message=%s)' % (self.code, self.message)
+
+
+class VectorCollection(object):
+    """
+    向量检索库的问题分类
+    向量按批追加保存，检索时合并为矩阵进行暴力检索；记录数达到阈值时在后台线程建立IVF分桶索引，
+    索引建立完成后只检索最接近的分桶(建立过程中及数据变更后索引未重建完成前使用暴力检索)
+    """
+
+    def __init__(self, name: str, dimension: int, metric_type: str = 'IP', path: str = None,
+                 ivf_threshold: int = 0, ivf_nlist: int = 0):
+        """
+        向量检索库的问题分类
+
+        @param {str} name - 问题分类名
+        @param {int} dimension - 向量维度
+        @param {str} metric_type='IP' - 度量类型，IP-内积(越大越相似)，L2-欧氏距离平方(越小越相似)
+        @param {str} path=None - 持久化目录，不传代表只保存在内存中
+        @param {int} ivf_threshold=0 - 记录数达到该值时建立IVF索引，0代表始终暴力检索
+        @param {int} ivf_nlist=0 - IVF索引的分桶数，0代表按记录数的平方根自动计算
+        """
+        self.name = name
+        self.dimension = dimension
+        self.metric_type = metric_type
+        self.path = path
+        self.ivf_threshold = ivf_threshold
+        self.ivf_nlist = ivf_nlist
+        self.partitions = set()
+
+        self._chunks = list()  # 向量批次清单, [(vectors, ids, tags), ...]
+        self._matrix = None  # 合并后的向量矩阵
+        self._ids = None  # 合并后的id数组
+        self._tags = None  # 合并后的场景数组
+        self._ivf = None  # IVF索引, (centroids, [每个分桶的行号数组, ...]), 只对应当前版本的矩阵
+        self._version = 0  # 数据版本，每次变更加1
+        self._ivf_thread = None  # 建立IVF索引的后台线程
+        self._lock = threading.RLock()
+
+        if self.path is not None:
+            if os.path.exists(self._file('meta.json')):
+                self._load()
+                self._start_ivf_build()
+            else:
+                os.makedirs(self.path, exist_ok=True)
+                self._save_meta()
+
+    #############################
+    # 公共函数
+    #############################
+    @property
+    def size(self) -> int:
+        """
+        记录数
+        """
+        return sum([len(_chunk[1]) for _chunk in self._chunks])
+
+    @property
+    def max_id(self) -> int:
+        """
+        最大的记录id，没有记录时返回0
+        """
+        return max([0, ] + [int(_chunk[1].max()) for _chunk in self._chunks if len(_chunk[1]) > 0])
+
+    def add_partition(self, partition: str):
+        """
+        添加场景
+
+        @param {str} partition - 场景
+        """
+        self.partitions.add(partition)
+        if self.path is not None:
+            self._save_meta()
+
+    def insert(self, vectors: np.ndarray, ids: list, partition: str = None):
+        """
+        添加向量
+
+        @param {np.ndarray} vectors - 向量矩阵
+        @param {list} ids - 与向量对应的id清单
+        @param {str} partition=None - 场景
+        """
+        _vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        _ids = np.asarray(ids, dtype=np.int64)
+        _tags = np.asarray([partition] * len(ids), dtype=object)
+        with self._lock:
+            self._append(_vectors, _ids, _tags, partition)
+            self._start_ivf_build()
+
+    def search(self, query_vectors: np.ndarray, top_k: int, partitions: list = None,
+               nprobe: int = 1) -> list:
+        """
+        检索向量
+
+        @param {np.ndarray} query_vectors - 要检索的向量矩阵
+        @param {int} top_k - 每个向量返回的匹配数量
+        @param {list} partitions=None - 要检索的场景清单，None代表检索所有记录
+        @param {int} nprobe=1 - 使用IVF索引时检索的分桶数
+
+        @returns {list} - 检索结果, [[VectorHit, ...], ...]
+        """
+        _queries = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dimension)
+        with self._lock:
+            # 合并矩阵需要锁定，检索本身使用快照，无需锁定；IVF索引由后台线程建立，未建立完成时暴力检索
+            _matrix, _ids, _tags = self._get_matrix()
+            _ivf = self._ivf
+
+        if _matrix.shape[0] == 0:
+            return [list() for _ in range(_queries.shape[0])]
+
+        _mask = None
+        if partitions is not None:
+            _mask = np.isin(_tags, list(partitions))
+
+        _result = list()
+        for _query in _queries:
+            if _ivf is None:
+                _rows = None
+            else:
+                # 只检索最接近的分桶
+                _probe = np.argsort(-self._score(_ivf[0], _query))[0: max(1, nprobe)]
+                _rows = np.concatenate([_ivf[1][_i] for _i in _probe])
+
+            if _mask is not None:
+                _rows = np.nonzero(_mask)[0] if _rows is None else _rows[_mask[_rows]]
+
+            _scores = self._score(_matrix if _rows is None else _matrix[_rows], _query)
+            _count = min(top_k, _scores.shape[0])
+            if _count == 0:
+                _result.append(list())
+                continue
+
+            _top = np.argpartition(-_scores, _count - 1)[0: _count]
+            _top = _top[np.argsort(-_scores[_top])]
+            _rows_top = _top if _rows is None else _rows[_top]
+            _sign = -1.0 if self.metric_type == 'L2' else 1.0
+            _result.append([
+                VectorHit(int(_ids[_row]), float(_sign * _scores[_index]))
+                for _row, _index in zip(_rows_top, _top)
+            ])
+
+        return _result
+
+    def wait_ivf(self, timeout: float = None) -> bool:
+        """
+        等待后台线程完成IVF索引的建立
+
+        @param {float} timeout=None - 超时时间(秒)，None代表一直等待
+
+        @returns {bool} - 是否已完成(没有正在建立的索引时直接返回True)
+        """
+        _thread = self._ivf_thread
+        if _thread is not None:
+            _thread.join(timeout)
+            return not _thread.is_alive()
+
+        return True
+
+    def drop(self):
+        """
+        删除问题分类(包括持久化文件)
+        """
+        with self._lock:
+            self._chunks = list()
+            self._matrix = None
+            self._ivf = None
+            self._version += 1
+
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    #############################
+    # 内部函数
+    #############################
+    def _file(self, file_name: str) -> str:
+        """
+        获取持久化文件路径
+
+        @param {str} file_name - 文件名
+
+        @returns {str} - 文件路径
+        """
+        return os.path.join(self.path, file_name)
+
+    def _file_size(self, file_name: str) -> int:
+        """
+        获取持久化文件的大小
+
+        @param {str} file_name - 文件名
+
+        @returns {int} - 文件大小，文件不存在返回0
+        """
+        _file = self._file(file_name)
+        return os.path.getsize(_file) if os.path.exists(_file) else 0
+
+    def _append(self, vectors: np.ndarray, ids: np.ndarray, tags: np.ndarray, partition: str):
+        """
+        追加一批向量(需在锁定状态下调用)
+
+        @param {np.ndarray} vectors - 向量矩阵
+        @param {np.ndarray} ids - id数组
+        @param {np.ndarray} tags - 场景数组
+        @param {str} partition - 场景
+        """
+        if self.path is not None:
+            # 追加到持久化文件
+            with open(self._file('vectors.f32'), 'ab') as _file:
+                _file.write(vectors.tobytes())
+            with open(self._file('ids.i64'), 'ab') as _file:
+                _file.write(ids.tobytes())
+            with open(self._file('tags.txt'), 'a', encoding='utf-8') as _file:
+                _file.write('%s\n' % json.dumps(partition) * len(ids))
+
+        self._chunks.append((vectors, ids, tags))
+        self._matrix = None
+        self._ivf = None
+        self._version += 1
+
+    def _save_meta(self):
+        """
+        保存问题分类信息
+        """
+        with open(self._file('meta.json'), 'w', encoding='utf-8') as _file:
+            json.dump({
+                'name': self.name, 'dimension': self.dimension, 'metric_type': self.metric_type,
+                'partitions': sorted(self.partitions)
+            }, _file, ensure_ascii=False)
+
+    def _load(self):
+        """
+        装载持久化的问题分类，向量文件通过内存映射访问
+        """
+        with open(self._file('meta.json'), 'r', encoding='utf-8') as _file:
+            _meta = json.load(_file)
+
+        self.dimension = _meta['dimension']
+        self.metric_type = _meta['metric_type']
+        self.partitions = set(_meta['partitions'])
+
+        # 场景文件中完整写入(以换行结尾)的行的结束位置
+        _tag_ends = [0]
+        if os.path.exists(self._file('tags.txt')):
+            with open(self._file('tags.txt'), 'rb') as _file:
+                for _line in _file:
+                    if not _line.endswith(b'\n'):
+                        break
+                    _tag_ends.append(_tag_ends[-1] + len(_line))
+
+        # 只使用完整写入的记录，并将写入中断留下的不完整数据截断，保证后续追加的记录对齐
+        _count = min(
+            self._file_size('ids.i64') // 8, len(_tag_ends) - 1,
+            self._file_size('vectors.f32') // (4 * self.dimension)
+        )
+        for _name, _size in (
+            ('vectors.f32', _count * 4 * self.dimension), ('ids.i64', _count * 8), ('tags.txt', _tag_ends[_count])
+        ):
+            if self._file_size(_name) > _size:
+                os.truncate(self._file(_name), _size)
+
+        if _count == 0:
+            return
+
+        _ids = np.fromfile(self._file('ids.i64'), dtype=np.int64, count=_count)
+        with open(self._file('tags.txt'), 'r', encoding='utf-8') as _file:
+            _tags = np.asarray([json.loads(_line) for _line in _file], dtype=object)
+
+        _vectors = np.memmap(
+            self._file('vectors.f32'), dtype=np.float32, mode='r', shape=(_count, self.dimension)
+        )
+        self._chunks.append((_vectors, _ids, _tags))
+
+    def _get_matrix(self):
+        """
+        获取合并后的向量矩阵
+
+        @returns {np.ndarray, np.ndarray, np.ndarray} - 向量矩阵, id数组, 场景数组
+        """
+        if self._matrix is None:
+            if len(self._chunks) == 1:
+                self._matrix, self._ids, self._tags = self._chunks[0]
+            elif len(self._chunks) == 0:
+                self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+                self._ids = np.zeros((0, ), dtype=np.int64)
+                self._tags = np.zeros((0, ), dtype=object)
+            else:
+                # 合并为一个批次，后续无需再合并
+                self._matrix = np.concatenate([_chunk[0] for _chunk in self._chunks])
+                self._ids = np.concatenate([_chunk[1] for _chunk in self._chunks])
+                self._tags = np.concatenate([_chunk[2] for _chunk in self._chunks])
+                self._chunks = [(self._matrix, self._ids, self._tags), ]
+
+        return self._matrix, self._ids, self._tags
+
+    def _start_ivf_build(self):
+        """
+        记录数达到阈值时启动后台线程建立IVF索引(需在锁定状态下调用，已有线程在执行时由该线程处理最新数据)
+        """
+        if self.ivf_threshold <= 0 or self.size < self.ivf_threshold:
+            return
+
+        if self._ivf_thread is None:
+            self._ivf_thread = threading.Thread(
+                target=self._ivf_build_thread_fun, name='VectorCollection-IVF-%s' % self.name, daemon=True
+            )
+            self._ivf_thread.start()
+
+    def _ivf_build_thread_fun(self):
+        """
+        建立IVF索引的后台线程函数
+        k-means计算在锁外执行，不阻塞插入及检索；计算过程中数据有变更时丢弃结果并按最新数据重新建立
+        """
+        while True:
+            with self._lock:
+                if self._ivf is not None or self.ivf_threshold <= 0 or self.size < self.ivf_threshold:
+                    self._ivf_thread = None
+                    return
+
+                _matrix = self._get_matrix()[0]
+                _version = self._version
+
+            _ivf = self._build_ivf(_matrix)
+
+            with self._lock:
+                if _version == self._version:
+                    self._ivf = _ivf
+
+    def _build_ivf(self, matrix: np.ndarray) -> tuple:
+        """
+        通过k-means建立IVF索引
+
+        @param {np.ndarray} matrix - 向量矩阵
+
+        @returns {tuple} - (centroids, [每个分桶的行号数组, ...])
+        """
+        _nlist = self.ivf_nlist if self.ivf_nlist > 0 else int(np.sqrt(matrix.shape[0]))
+        _nlist = max(1, min(_nlist, matrix.shape[0]))
+        _random = np.random.RandomState(0)
+        _centroids = np.array(matrix[_random.choice(matrix.shape[0], _nlist, replace=False)])
+        for _ in range(10):
+            _assign = np.argmax(self._score_matrix(matrix, _centroids), axis=1)
+            for _i in range(_nlist):
+                _members = matrix[_assign == _i]
+                if _members.shape[0] > 0:
+                    _centroids[_i] = _members.mean(axis=0)
+
+        _assign = np.argmax(self._score_matrix(matrix, _centroids), axis=1)
+        return (_centroids, [np.nonzero(_assign == _i)[0] for _i in range(_nlist)])
+
+    def _score(self, matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        计算向量与矩阵每行的相似度(越大越相似)
+
+        @param {np.ndarray} matrix - 向量矩阵
+        @param {np.ndarray} query - 向量
+
+        @returns {np.ndarray} - 相似度数组
+        """
+        if self.metric_type == 'L2':
+            _diff = matrix - query
+            return -np.einsum('ij,ij->i', _diff, _diff)
+
+        return matrix @ query
+
+    def _score_matrix(self, matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """
+        计算矩阵每行与各中心点的相似度(越大越相似)
+
+        @param {np.ndarray} matrix - 向量矩阵
+        @param {np.ndarray} centroids - 中心点矩阵
+
+        @returns {np.ndarray} - 相似度矩阵, 行为记录, 列为中心点
+        """
+        if self.metric_type == 'L2':
+            return 2 * (matrix @ centroids.T) - (centroids * centroids).sum(axis=1)
+
+        return matrix @ centroids.T
+
+
+class EmbeddedVectorStore(object):
+    """
+    进程内的向量检索库，可替代Milvus服务
+    问题分类和场景保存在内存中，可持久化到目录(每个问题分类一个子目录，向量文件通过内存映射访问)
+    注：持久化文件只在当前进程中更新，其他进程需重启后才能获取到变更
+    """
+
+    def __init__(self, path: str = None, ivf_threshold: int = 0, ivf_nlist: int = 0, logger=None):
+        """
+        进程内的向量检索库
+
+        @param {str} path=None - 持久化目录，不传代表只保存在内存中
+        @param {int} ivf_threshold=0 - 问题分类记录数达到该值时建立IVF索引，0代表始终暴力检索
+        @param {int} ivf_nlist=0 - IVF索引的分桶数，0代表按记录数的平方根自动计算
+        @param {Logger} logger=None - 日志对象
+        """
+        self.path = path
+        self.ivf_threshold = ivf_threshold
+        self.ivf_nlist = ivf_nlist
+        self.logger = logger
+        self.collections = dict()
+        self._lock = threading.RLock()
+        self._next_id = 1
+
+        if self.path is not None:
+            # 装载已持久化的问题分类
+            os.makedirs(self.path, exist_ok=True)
+            for _name in sorted(os.listdir(self.path)):
+                if os.path.exists(os.path.join(self.path, _name, 'meta.json')):
+                    self.collections[_name] = VectorCollection(
+                        _name, 0, path=os.path.join(self.path, _name),
+                        ivf_threshold=self.ivf_threshold, ivf_nlist=self.ivf_nlist
+                    )
+                    self._next_id = max(self._next_id, self.collections[_name].max_id + 1)
+
+            self._log_info('embedded vector store loaded: %s' % str({
+                _name: _collection.size for _name, _collection in self.collections.items()
+            }))
+
+    #############################
+    # 公共函数
+    #############################
+    def get_client(self):
+        """
+        获取访问对象(接口与Milvus客户端一致)
+
+        @returns {EmbeddedVectorClient} - 访问对象
+        """
+        return EmbeddedVectorClient(self)
+
+    def has_collection(self, collection: str) -> bool:
+        """
+        检查问题分类是否存在
+
+        @param {str} collection - 问题分类
+
+        @returns {bool} - 是否存在
+        """
+        return collection in self.collections.keys()
+
+    def create_collection(self, collection: str, dimension: int, metric_type: str = 'IP'):
+        """
+        创建问题分类
+
+        @param {str} collection - 问题分类
+        @param {int} dimension - 向量维度
+        @param {str} metric_type='IP' - 度量类型，IP或L2
+        """
+        with self._lock:
+            if collection in self.collections.keys():
+                raise FileExistsError('collection [%s] exists' % collection)
+
+            self.collections[collection] = VectorCollection(
+                collection, dimension, metric_type=metric_type,
+                path=None if self.path is None else os.path.join(self.path, collection),
+                ivf_threshold=self.ivf_threshold, ivf_nlist=self.ivf_nlist
+            )
+
+    def drop_collection(self, collection: str):
+        """
+        删除问题分类
+
+        @param {str} collection - 问题分类
+        """
+        with self._lock:
+            self._get_collection(collection).drop()
+            self.collections.pop(collection)
+
+    def has_partition(self, collection: str, partition: str) -> bool:
+        """
+        检查场景是否存在
+
+        @param {str} collection - 问题分类
+        @param {str} partition - 场景
+
+        @returns {bool} - 是否存在
+        """
+        return partition in self._get_collection(collection).partitions
+
+    def create_partition(self, collection: str, partition: str):
+        """
+        创建场景
+
+        @param {str} collection - 问题分类
+        @param {str} partition - 场景
+        """
+        with self._lock:
+            self._get_collection(collection).add_partition(partition)
+
+    def insert(self, collection: str, vectors, partition: str = None) -> list:
+        """
+        添加向量
+
+        @param {str} collection - 问题分类
+        @param {list|np.ndarray} vectors - 向量清单
+        @param {str} partition=None - 场景
+
+        @returns {list} - 与向量顺序对应的id清单
+        """
+        with self._lock:
+            _collection = self._get_collection(collection)
+            if partition is not None and partition not in _collection.partitions:
+                raise KeyError('partition [%s] not exists in collection [%s]' % (partition, collection))
+
+            _ids = list(range(self._next_id, self._next_id + len(vectors)))
+            _collection.insert(vectors, _ids, partition=partition)
+            self._next_id += len(_ids)
+
+        return _ids
+
+    def search(self, collection: str, vectors, top_k: int, partitions=None, nprobe: int = 1) -> list:
+        """
+        检索向量
+
+        @param {str} collection - 问题分类
+        @param {list|np.ndarray} vectors - 要检索的向量清单
+        @param {int} top_k - 每个向量返回的匹配数量
+        @param {str|list} partitions=None - 要检索的场景(清单)，None代表检索所有记录
+        @param {int} nprobe=1 - 使用IVF索引时检索的分桶数
+
+        @returns {list} - 检索结果, [[VectorHit, ...], ...]
+        """
+        _partitions = partitions
+        if type(_partitions) == str:
+            _partitions = [_partitions, ]
+
+        return self._get_collection(collection).search(vectors, top_k, partitions=_partitions, nprobe=nprobe)
+
+    #############################
+    # 内部函数
+    #############################
+    def _get_collection(self, collection: str) -> VectorCollection:
+        """
+        获取问题分类对象
+
+        @param {str} collection - 问题分类
+
+        @returns {VectorCollection} - 问题分类对象
+        """
+        _collection = self.collections.get(collection, None)
+        if _collection is None:
+            raise KeyError('collection [%s] not exists' % collection)
+
+        return _collection
+
+    def _log_info(self, msg: str, *args, **kwargs):
+        """
+        输出info日志
+
+        @param {str} msg - 要输出的日志
+        """
+        if self.logger:
+            if 'extra' not in kwargs:
+                kwargs['extra'] = {'callFunLevel': 2}
+
+            self.logger.info(msg, *args, **kwargs)
+
+
+class EmbeddedVectorClient(object):
+    """
+    进程内向量检索库的访问对象
+    接口与Milvus客户端一致(只实现问答服务用到的部分)，返回(status, result)形式的结果
+    """
+
+    def __init__(self, store: EmbeddedVectorStore):
+        """
+        进程内向量检索库的访问对象
+
+        @param {EmbeddedVectorStore} store - 向量检索库
+        """
+        self.store = store
+
+    #############################
+    # 公共函数
+    #############################
+    def server_status(self):
+        return VectorStatus(), 'OK'
+
+    def list_collections(self):
+        return VectorStatus(), list(self.store.collections.keys())
+
+    def has_collection(self, collection_name: str):
+        return VectorStatus(), self.store.has_collection(collection_name)
+
+    def create_collection(self, param: dict):
+        _metric_type = param.get('metric_type', 'IP')
+        return self._call(
+            self.store.create_collection, param['collection_name'], param['dimension'],
+            metric_type=getattr(_metric_type, 'name', str(_metric_type))
+        )[0]
+
+    def create_index(self, collection_name: str, index_type=None, params: dict = None):
+        # 索引按记录数自动建立
+        return VectorStatus()
+
+    def drop_collection(self, collection_name: str):
+        return self._call(self.store.drop_collection, collection_name)[0]
+
+    def has_partition(self, collection_name: str, partition_tag: str):
+        return self._call(self.store.has_partition, collection_name, partition_tag)
+
+    def create_partition(self, collection_name: str, partition_tag: str):
+        return self._call(self.store.create_partition, collection_name, partition_tag)[0]
+
+    def insert(self, collection_name: str, records, partition_tag: str = None):
+        return self._call(self.store.insert, collection_name, records, partition=partition_tag)
+
+    def search(self, collection_name: str, top_k: int, query_records, partition_tags=None,
+               params: dict = None):
+        return self._call(
+            self.store.search, collection_name, query_records, top_k, partitions=partition_tags,
+            nprobe=(params or {}).get('nprobe', 1)
+        )
+
+    def close(self):
+        pass
+
+    #############################
+    # 内部函数
+    #############################
+    def _call(self, fun, *args, **kwargs):
+        """
+        执行向量检索库函数，将异常转换为执行结果
+
+        @param {function} fun - 要执行的函数
+
+        @returns {VectorStatus, object} - 执行结果, 函数返回值
+        """
+        try:
+            return VectorStatus(), fun(*args, **kwargs)
+        except Exception as e:
+            return VectorStatus(code=1, message=str(e)), None
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    # 打印版本信息
+    print(('模块名：%s  -  %s\n'
+           '作者：%s\n'
+           '发布日期：%s\n'
+           '版本：%s' % (__MOUDLE__, __DESCRIPT__, __AUTHOR__, __PUBLISH__, __VERSION__)))
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+离线性能测试
+使用确定性的替代服务(BERT、Milvus)及SQLite数据库，无需连接外部服务即可测试问答处理的性能
+
+执行方式: python benchmark.py [rounds=20] [config=../chat_robot/conf/server.xml] [db=sqlite文件路径]
+    rounds : 每个场景重复执行的轮次
+    config : 使用的配置文件，BERT、Milvus、AnswerDB、Redis的配置将被替换
+    db : SQLite数据库文件路径，不传则使用临时目录
+    excel : 要导入的问题Excel文件，默认为test/questions.xlsx
+
+@module benchmark
+@file benchmark.py
+"""
+
+import os
+import sys
+import math
+import time
+import zlib
+import shutil
+import tempfile
+import threading
+import tracemalloc
+import traceback
+from collections import namedtuple
+import numpy as np
+from HiveNetLib.simple_xml import SimpleXml
+from HiveNetLib.base_tools.file_tool import FileTool
+from HiveNetLib.base_tools.run_tool import RunTool
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+import chat_robot.lib.loader as loader_module
+from chat_robot.lib.data_manager import QAManager
+from chat_robot.lib.loader import QAServerLoader
+
+
+__MOUDLE__ = 'benchmark'  # 模块名
+__DESCRIPT__ = u'离线性能测试'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+# 测试场景, 每个场景为对话清单, 每个对话在新的session中按顺序提问(问题来源于questions.xlsx)
+SCENARIOS = {
+    'single': [
+        ['你好'], ['您好'], ['你好啊'], ['你叫什么名字'], ['这个问题应该不存在才对啊'],
+        ['今天天气怎么样？'], ['翡翠是怎么形成的'],
+    ],
+    'options': [
+        ['[选项]我想学银行业务', '2', '1'],
+        ['[选项]我想学银行业务', '3', '1'],
+        ['[选项]我想学银行业务', '4', '你叫什么名字', '1'],
+        ['[未精确匹配]90%以上', '1'],
+    ],
+    'ask': [
+        ['[ask示例]问我的名字', '黎慧剑'],
+        ['[ask示例]重复提问', '继续', '1'],
+        ['[ask示例1]单问题多轮提问', '18岁', '男'],
+        ['[ask示例2]多个问题多轮提问', '广州', '搬砖', '篮球'],
+    ],
+    'nlp': [
+        ['我要寄信给广州的黎慧剑'],
+        ['我要转账', '黎慧剑', '500', '是的'],
+        ['我要转账给黎慧剑的账户315元', '不是'],
+        ['广州的天气'], ['明天广州的天气'], ['朝阳的天气', '3'],
+    ],
+}
+
+
+#############################
+# 替代服务
+#############################
+class FakeBertClient(object):
+    """
+    确定性的BERT客户端替代对象
+    按字及相邻两字的哈希值生成向量，相同问题的向量一致，字面相近的问题向量相近
+    """
+
+    def __init__(self, dimension: int = 768, **kwargs):
+        """
+        BERT客户端替代对象
+
+        @param {int} dimension=768 - 向量维度
+        """
+        self.dimension = dimension
+        self.timeout = -1
+        self.server_status = {'status': 'ok'}
+
+    def encode(self, texts: list) -> np.ndarray:
+        """
+        对文本清单进行编码
+
+        @param {list} texts - 文本清单
+
+        @returns {np.ndarray} - 向量矩阵，每行对应一个文本
+        """
+        _vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for _row in range(len(texts)):
+            _text = texts[_row]
+            _grams = list(_text) + [_text[_i: _i + 2] for _i in range(len(_text) - 1)]
+            for _gram in _grams:
+                _hash = zlib.crc32(_gram.encode('utf-8'))
+                _vectors[_row, _hash % self.dimension] += (1.0 if _hash & 0x80000000 else -1.0)
+
+        return _vectors
+
+    def close(self):
+        """
+        关闭连接
+        """
+        pass
+
+
+class FakeStatus(object):
+    """
+    Milvus执行结果替代对象
+    """
+
+    def __init__(self, code: int = 0, message: str = 'Success'):
+        self.code = code
+        self.message = message
+
+    def OK(self) -> bool:
+        return self.code == 0
+
+    def __str__(self):
+        return 'Status(code=%d, message=%s)' % (self.code, self.message)
+
+
+FakeHit = namedtuple('FakeHit', ['id', 'distance'])  # Milvus检索结果替代对象
+
+
+class FakeMilvusServer(object):
+    """
+    Milvus服务替代对象(内存中通过NumPy暴力检索)，由多个连接对象共享
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.collections = dict()  # key为collection, value为{'partitions', 'ids', 'tags', 'vectors', 'matrix'}
+        self.next_id = 1000
+
+
+class FakeMilvus(object):
+    """
+    Milvus连接替代对象，支持分类、场景、插入及检索
+    """
+
+    def __init__(self, server: FakeMilvusServer):
+        """
+        Milvus连接替代对象
+
+        @param {FakeMilvusServer} server - 共享的服务对象
+        """
+        self.server = server
+
+    def server_status(self):
+        return FakeStatus(), 'OK'
+
+    def list_collections(self):
+        with self.server.lock:
+            return FakeStatus(), list(self.server.collections.keys())
+
+    def has_collection(self, collection: str):
+        return FakeStatus(), collection in self.server.collections.keys()
+
+    def create_collection(self, param: dict):
+        with self.server.lock:
+            self.server.collections[param['collection_name']] = {
+                'partitions': set(), 'ids': list(), 'tags': list(), 'vectors': list(), 'matrix': None
+            }
+        return FakeStatus()
+
+    def drop_collection(self, collection: str):
+        with self.server.lock:
+            self.server.collections.pop(collection, None)
+        return FakeStatus()
+
+    def create_index(self, collection: str, index_type, params: dict):
+        return FakeStatus()
+
+    def has_partition(self, collection: str, partition: str):
+        with self.server.lock:
+            return FakeStatus(), partition in self.server.collections[collection]['partitions']
+
+    def create_partition(self, collection: str, partition: str):
+        with self.server.lock:
+            self.server.collections[collection]['partitions'].add(partition)
+        return FakeStatus()
+
+    def insert(self, collection: str, records: list, partition_tag: str = None):
+        with self.server.lock:
+            _info = self.server.collections[collection]
+            _ids = list(range(self.server.next_id, self.server.next_id + len(records)))
+            self.server.next_id += len(records)
+            _info['ids'].extend(_ids)
+            _info['tags'].extend([partition_tag] * len(records))
+            _info['vectors'].extend(records)
+            _info['matrix'] = None
+
+        return FakeStatus(), _ids
+
+    def search(self, collection: str, top_k: int, query_records: list, partition_tags=None,
+               params: dict = None):
+        with self.server.lock:
+            _info = self.server.collections[collection]
+            if _info['matrix'] is None:
+                _info['matrix'] = np.asarray(_info['vectors'], dtype=np.float32).reshape(
+                    len(_info['vectors']), -1
+                )
+                _info['id_array'] = np.asarray(_info['ids'])
+                _info['tag_array'] = np.asarray(_info['tags'], dtype=object)
+            _matrix = _info['matrix']
+            _id_array = _info['id_array']
+            _tag_array = _info['tag_array']
+
+        if _matrix.shape[0] == 0:
+            return FakeStatus(), [[] for _ in query_records]
+
+        if partition_tags is not None:
+            _tags = [partition_tags, ] if type(partition_tags) == str else list(partition_tags)
+            _mask = np.isin(_tag_array, _tags)
+            _matrix = _matrix[_mask]
+            _id_array = _id_array[_mask]
+
+        _scores = np.asarray(query_records, dtype=np.float32) @ _matrix.T
+        _result = list()
+        for _row in _scores:
+            _top = np.argsort(-_row)[0: top_k]
+            _result.append([FakeHit(int(_id_array[_i]), float(_row[_i])) for _i in _top])
+
+        return FakeStatus(), _result
+
+    def close(self):
+        pass
+
+
+class BenchQAManager(QAManager):
+    """
+    使用替代服务的问答数据管理
+    """
+
+    fake_milvus_server = FakeMilvusServer()
+
+    def _create_milvus(self):
+        return FakeMilvus(self.fake_milvus_server)
+
+    def _create_bert_client(self):
+        return FakeBertClient(dimension=self.dimension)
+
+
+#############################
+# 测试处理
+#############################
+def stat_str(name: str, latencies: list, total_time: float, errors: int, mem: tuple = None) -> str:
+    """
+    生成统计信息字符串
+
+    @param {str} name - 统计项名
+    @param {list} latencies - 每次调用的耗时清单(秒)
+    @param {float} total_time - 总耗时(秒)
+    @param {int} errors - 出现异常的次数
+    @param {tuple} mem=None - 内存分配信息(保留字节数, 峰值字节数)
+
+    @returns {str} - 统计信息字符串
+    """
+    _sorted = sorted(latencies)
+    _count = len(_sorted)
+
+    def percentile(q):
+        if _count == 0:
+            return 0.0
+        return _sorted[max(0, int(math.ceil(q * _count)) - 1)] * 1000
+
+    _str = '%-10s calls[%6d] qps[%9.1f] p50[%8.3fms] p99[%8.3fms] max[%8.3fms] errors[%d]' % (
+        name, _count, 0.0 if total_time == 0 else _count / total_time,
+        percentile(0.5), percentile(0.99), percentile(1.0), errors
+    )
+    if mem is not None:
+        _str += ' retained[%.1fKB] peak[%.1fKB]' % (mem[0] / 1024, mem[1] / 1024)
+
+    return _str
+
+
+def run_calls(fun, args_list: list, rounds: int, trace_alloc: bool = True):
+    """
+    重复执行函数并统计耗时
+
+    @param {function} fun - 要执行的函数，入参为args_list的一项
+    @param {list} args_list - 每轮执行的入参清单
+    @param {int} rounds - 执行轮次
+    @param {bool} trace_alloc=True - 是否额外执行一轮统计内存分配
+
+    @returns {list, float, int, tuple} - latencies, total_time, errors, mem
+    """
+    _latencies = list()
+    _errors = 0
+    _start = time.perf_counter()
+    for _round in range(rounds):
+        for _args in args_list:
+            _call_start = time.perf_counter()
+            try:
+                fun(_args)
+            except:
+                _errors += 1
+                if _errors == 1:
+                    print('call error: %s' % traceback.format_exc())
+            _latencies.append(time.perf_counter() - _call_start)
+
+    _total_time = time.perf_counter() - _start
+
+    _mem = None
+    if trace_alloc:
+        # 单独执行一轮统计内存分配，避免跟踪内存对耗时的影响
+        tracemalloc.start()
+        for _args in args_list:
+            try:
+                fun(_args)
+            except:
+                pass
+        _mem = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return _latencies, _total_time, _errors, _mem
+
+
+def main(opts: dict):
+    """
+    执行性能测试
+
+    @param {dict} opts - 命令行参数
+    """
+    _file_path = os.path.realpath(FileTool.get_file_path(__file__))
+    _execute_path = os.path.realpath(os.path.join(_file_path, os.path.pardir, 'chat_robot'))
+    _rounds = int(opts.get('rounds', '20'))
+    _config = opts.get('config', os.path.join(_execute_path, 'conf/server.xml'))
+    _excel = opts.get('excel', os.path.join(_file_path, 'questions.xlsx'))
+
+    _temp_path = None
+    _db = opts.get('db', None)
+    if _db is None:
+        _temp_path = tempfile.mkdtemp(prefix='chat_robot_benchmark_')
+        _db = os.path.join(_temp_path, 'answerdb.db')
+
+    # 装载配置并替换外部服务
+    _server_config = SimpleXml(_config, encoding='utf-8').to_dict()['server']
+    _server_config['debug'] = False
+    _server_config['config'] = _config
+    _server_config['encoding'] = 'utf-8'
+    _server_config['execute_path'] = _execute_path
+    _server_config.pop('logger', None)  # 不输出日志，避免影响测试结果
+    _server_config['excel_engine'] = 'openpyxl'
+    _server_config['answerdb'] = {'db_type': 'SQLite', 'database': _db, 'max_connections': 20}
+    _server_config['qa_config']['use_redis'] = False
+
+    try:
+        # 使用替代服务装载问答服务
+        loader_module.QAManager = BenchQAManager
+        _loader = QAServerLoader(_server_config)
+        _qa_manager = _loader.qa_manager
+        _qa = _loader.qa
+
+        # 导入问题数据
+        _start = time.perf_counter()
+        _qa_manager.import_questions_by_xls(_excel, reset_questions=False)
+        print('import_questions_by_xls: %.3fs' % (time.perf_counter() - _start))
+        _qa_manager.load_common_para()
+        _qa_manager.load_nlp_sure_judge_dict()
+        _qa_manager.load_nlp_purpos_config_dict()
+
+        # 问答场景
+        def run_dialog(questions):
+            _session_id = _qa.generate_session({'name': '测试用户'})
+            for _question in questions:
+                _qa.quession_search(_question, session_id=_session_id)
+            _qa.delete_session(_session_id)
+
+        print('\nquession_search (latency per dialog):')
+        _all_latencies, _all_time = list(), 0.0
+        for _name, _dialogs in SCENARIOS.items():
+            _latencies, _total_time, _errors, _mem = run_calls(run_dialog, _dialogs, _rounds)
+            _all_latencies.extend(_latencies)
+            _all_time += _total_time
+            print(stat_str(_name, _latencies, _total_time, _errors, _mem))
+        print(stat_str('all', _all_latencies, _all_time, 0))
+
+        # 意图识别
+        _questions = list()
+        for _dialogs in SCENARIOS.values():
+            for _dialog in _dialogs:
+                _questions.extend(_dialog)
+
+        print('\nNLP.analyse_purpose (latency per question):')
+        print(stat_str(
+            'nlp', *run_calls(_loader.nlp.analyse_purpose, _questions, _rounds)
+        ))
+    finally:
+        loader_module.QAManager = QAManager
+        if _temp_path is not None:
+            shutil.rmtree(_temp_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    main(RunTool.get_kv_opts())
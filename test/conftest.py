@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+单元测试公共对象
+使用SQLite数据库、进程内向量检索库及确定性的BERT替代对象创建问答数据管理，无需连接外部服务
+
+@module conftest
+@file conftest.py
+"""
+
+import os
+import sys
+import inspect
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+
+
+__MOUDLE__ = 'conftest'  # 模块名
+__DESCRIPT__ = u'单元测试公共对象'  # 模块描述
+__VERSION__ = '0.1.0'  # 版本
+__AUTHOR__ = u'黎慧剑'  # 作者
+__PUBLISH__ = '2020.07.20'  # 发布日期
+
+
+# 测试用的问题Excel文件
+QUESTIONS_XLSX = os.path.join(os.path.dirname(__file__), 'questions.xlsx')
+
+
+@pytest.fixture
+def qa_manager_factory(tmp_path):
+    """
+    创建问答数据管理对象的工厂函数(SQLite数据库 + 进程内向量检索库 + BERT替代对象)
+    调用方式: qa_manager_factory(db_name='answerdb.db', **kwargs), kwargs为QAManager的其他初始化参数
+    """
+    pytest.importorskip('peewee')
+    pytest.importorskip('milvus')
+    pytest.importorskip('bert_serving.client')
+    from chat_robot.lib.data_manager import QAManager
+    from benchmark import FakeBertClient
+
+    class LocalQAManager(QAManager):
+        """
+        使用BERT替代对象的问答数据管理
+        """
+
+        def _create_bert_client(self):
+            return FakeBertClient(dimension=self.dimension)
+
+    _managers = list()
+
+    def create(db_name: str = 'answerdb.db', **kwargs):
+        _para = {
+            'excel_engine': 'openpyxl',
+        }
+        _para.update(kwargs)
+        _qa_manager = LocalQAManager(
+            {'db_type': 'SQLite', 'database': str(tmp_path / db_name), 'max_connections': 20},
+            {'backend': 'embedded', 'dimension': 64, 'metric_type': 'IP', 'nlist': 16},
+            {}, **_para
+        )
+        _managers.append(_qa_manager)
+        return _qa_manager
+
+    yield create
+
+    for _qa_manager in _managers:
+        _qa_manager.milvus_pool.clear()
+        _qa_manager.bert_pool.clear()
+        _qa_manager.database.close_all()
+
+
+@pytest.fixture
+def fake_redis_config():
+    """
+    使用进程内Redis替代服务的redis_config(每个测试独立的数据)
+    """
+    fakeredis = pytest.importorskip('fakeredis')
+    return {
+        'connection': {'connection_class': fakeredis.FakeConnection, 'server': fakeredis.FakeServer()}
+    }
+
+
+@pytest.fixture
+def qa_factory(qa_manager_factory):
+    """
+    创建问答处理对象的工厂函数(内存session，不使用NLP)
+    调用方式: qa_factory(qa_manager=None, **qa_config), qa_manager不传时导入questions.xlsx创建
+    """
+    pytest.importorskip('redis')
+    from chat_robot.lib.qa import QA
+
+    _qa_list = list()
+
+    def create(qa_manager=None, nlp=None, redis_config: dict = None, **qa_config):
+        if qa_manager is None:
+            qa_manager = qa_manager_factory()
+            qa_manager.import_questions_by_xls(QUESTIONS_XLSX)
+
+        _qa_config = {'use_nlp': False, 'use_redis': False, 'match_distance': 0.9}
+        _qa_config.update(qa_config)
+        _qa = QA(
+            qa_manager, nlp, os.path.join(os.path.dirname(__file__), os.path.pardir, 'chat_robot'),
+            qa_config=_qa_config, redis_config={} if redis_config is None else redis_config
+        )
+        _qa_list.append(_qa)
+        return _qa
+
+    yield create
+
+    for _qa in _qa_list:
+        _qa._session_overtime_thread_stop = True
+
+
+@pytest.fixture
+def api_caller():
+    """
+    创建Restful Api调用函数的工厂函数，在请求上下文中直接执行Api的处理函数(不经过认证等装饰函数)
+    调用方式: call = api_caller(qa); call(api_name, json_dict)返回结果字典
+    """
+    flask = pytest.importorskip('flask')
+    from HiveNetLib.base_tools.run_tool import RunTool
+    from chat_robot.lib.restful_api import Qa
+
+    class Loader(object):
+        """
+        服务装载对象的替代对象
+        """
+
+        def __init__(self, qa):
+            self.qa = qa
+            self.logger = None
+
+    _app = flask.Flask(__name__)
+    _old_loader = RunTool.get_global_var('QA_LOADER')
+
+    def create(qa):
+        RunTool.set_global_var('QA_LOADER', Loader(qa))
+
+        def call(api_name: str, json_dict: dict) -> dict:
+            _fun = inspect.unwrap(getattr(Qa, api_name).__func__)
+            with _app.test_request_context(method='POST', json=json_dict):
+                return _fun(Qa).get_json()
+
+        return call
+
+    yield create
+
+    RunTool.set_global_var('QA_LOADER', _old_loader)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+标准问题及答案内存目录的测试
+@module test_answer_catalog
+@file test_answer_catalog.py
+"""
+
+import os
+import sys
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from conftest import QUESTIONS_XLSX
+
+
+def _count_db_queries(database, fun, *args):
+    """
+    执行函数并统计数据库查询次数
+
+    @returns {tuple} - (函数返回值, 查询次数)
+    """
+    _count = [0]
+    _execute_sql = database.execute_sql
+
+    def execute_sql(*args, **kwargs):
+        _count[0] += 1
+        return _execute_sql(*args, **kwargs)
+
+    database.execute_sql = execute_sql
+    try:
+        return fun(*args), _count[0]
+    finally:
+        database.execute_sql = _execute_sql
+
+
+def test_load_from_db(qa_manager_factory):
+    """
+    装载后通过milvus_id、标准问题id、tag获取的数据与数据库一致，且无需访问数据库
+    """
+    from chat_robot.lib.answer_db import StdQuestion, Answer, ExtQuestion
+
+    _writer = qa_manager_factory()
+    _writer.import_questions_by_xls(QUESTIONS_XLSX)
+
+    _qa_manager = qa_manager_factory(use_answer_catalog=True)
+    _catalog = _qa_manager.answer_catalog
+    assert len(_catalog._stdq_dict) == StdQuestion.select().count()
+    assert len(_catalog._answer_dict) == Answer.select().count()
+
+    for _stdq in StdQuestion.select():
+        if _stdq.milvus_id == -1:
+            # 没有向量的问题(例如场景问题)只能通过id获取
+            _ret, _queries = _count_db_queries(
+                _qa_manager.database, _catalog.get_by_std_question_id, _stdq.id
+            )
+        else:
+            _ret, _queries = _count_db_queries(
+                _qa_manager.database, _catalog.get_by_milvus_id,
+                _stdq.milvus_id, _stdq.collection, _stdq.partition
+            )
+        assert _queries == 0
+        assert _ret[0].id == _stdq.id and _ret[0].question == _stdq.question
+
+        _answer = Answer.get_or_none(Answer.std_question_id == _stdq.id)
+        if _answer is None:
+            assert _ret[1] is None
+        else:
+            assert _ret[1].answer == _answer.answer and _ret[1].a_type == _answer.a_type
+
+        if _stdq.tag != '':
+            assert _catalog.get_by_tag(_stdq.tag, _stdq.collection)[0].id == _stdq.id
+
+    # 扩展问题的milvus_id指向对应的标准问题
+    for _ext in ExtQuestion.select():
+        _stdq = StdQuestion.get_by_id(_ext.std_question_id)
+        _ret, _queries = _count_db_queries(
+            _qa_manager.database, _catalog.get_by_milvus_id,
+            _ext.milvus_id, _stdq.collection, _stdq.partition
+        )
+        assert _queries == 0
+        assert _ret[0].id == _stdq.id
+
+
+def test_disabled_reads_db(qa_manager_factory):
+    """
+    不启用时直接查询数据库
+    """
+    _qa_manager = qa_manager_factory()
+    _qa_manager.import_questions_by_xls(QUESTIONS_XLSX)
+    _catalog = _qa_manager.answer_catalog
+    assert not _catalog.enabled
+    assert len(_catalog._stdq_dict) == 0
+
+    _std_id = _qa_manager.add_std_question('目录测试问题', answer='目录测试答案')
+    _ret, _queries = _count_db_queries(
+        _qa_manager.database, _catalog.get_by_std_question_id, _std_id
+    )
+    assert _queries > 0
+    assert _ret[1].answer == '目录测试答案'
+
+
+def test_reload_on_data_change(qa_manager_factory):
+    """
+    通过接口修改数据后内存目录同步刷新，并通知监听函数
+    """
+    _qa_manager = qa_manager_factory(use_answer_catalog=True)
+    _catalog = _qa_manager.answer_catalog
+    _actions = list()
+    _qa_manager.add_data_change_listener(_actions.append)
+
+    # 导入后重新装载
+    _qa_manager.import_questions_by_xls(QUESTIONS_XLSX)
+    assert _actions[-1] == 'import_questions_by_xls'
+    _count = len(_catalog._stdq_dict)
+    assert _count > 0
+
+    # 新增标准问题及扩展问题直接登记
+    _std_id = _qa_manager.add_std_question(
+        '目录测试问题', answer='你好{$info=name$}', replace_pre_def='Y'
+    )
+    assert _actions[-1] == 'add_std_question'
+    assert len(_catalog._stdq_dict) == _count + 1
+    assert _catalog.get_template('你好{$info=name$}').has_var
+
+    _ext_id = _qa_manager.add_ext_question(_std_id, '目录测试问题的其他问法')
+    assert _actions[-1] == 'add_ext_question'
+
+    from chat_robot.lib.answer_db import ExtQuestion
+    _ext = ExtQuestion.get_by_id(_ext_id)
+    _ret, _queries = _count_db_queries(
+        _qa_manager.database, _catalog.get_by_milvus_id, _ext.milvus_id, 'chat'
+    )
+    assert _queries == 0
+    assert _ret[0].id == _std_id
+
+    # 清空问题
+    _qa_manager.reset_db()
+    assert _actions[-1] == 'reset_db'
+    assert len(_catalog._stdq_dict) == 0
+    assert _catalog.get_by_std_question_id(_std_id) is None
+
+
+def test_listener_error_is_isolated(qa_manager_factory):
+    """
+    监听函数出现异常不影响其他监听函数及数据变更
+    """
+    _qa_manager = qa_manager_factory(use_answer_catalog=True)
+    _actions = list()
+
+    def bad_listener(action):
+        raise RuntimeError('listener error')
+
+    _qa_manager.add_data_change_listener(bad_listener)
+    _qa_manager.add_data_change_listener(_actions.append)
+    _std_id = _qa_manager.add_std_question('监听测试问题', answer='监听测试答案')
+    assert _actions == ['add_std_question']
+    assert _qa_manager.answer_catalog.get_by_std_question_id(_std_id)[1].answer == '监听测试答案'
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+BERT批量编码服务的测试
+@module test_bert_batch
+@file test_bert_batch.py
+"""
+
+import os
+import sys
+import threading
+from contextlib import contextmanager
+import pytest
+import numpy as np
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.bert_batch import BertBatchEncoder
+
+
+class BlockingBertClient(object):
+    """
+    可阻塞的BertClient替代对象，向量为[问题长度, 问题首字符编码]
+    """
+
+    def __init__(self):
+        self.batches = list()  # 每次encode的问题清单
+        self.started = threading.Event()  # 已开始encode
+        self.release = threading.Event()  # 允许encode返回
+        self.release.set()
+        self.error = None  # 要抛出的异常
+
+    def encode(self, texts: list) -> np.ndarray:
+        self.batches.append(list(texts))
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+
+        return np.array([[len(_text), ord(_text[0])] for _text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def bert():
+    """
+    BertClient替代对象
+    """
+    _bert = BlockingBertClient()
+    yield _bert
+    _bert.release.set()
+
+
+def _create_encoder(bert: BlockingBertClient, **kwargs) -> BertBatchEncoder:
+    """
+    创建使用替代对象的批量编码服务
+    """
+    @contextmanager
+    def get_bert_client():
+        yield bert
+
+    return BertBatchEncoder(get_bert_client, **kwargs)
+
+
+def test_merge_concurrent_questions(bert):
+    """
+    编码期间提交的问题合并为一批(不超过每批最大问题数)，结果按问题分发
+    """
+    _encoder = _create_encoder(bert, max_batch_size=3, max_wait=0.05)
+    try:
+        # 第一个问题编码时阻塞，期间提交的问题在队列中等待
+        bert.release.clear()
+        _first = _encoder.submit('a')
+        assert bert.started.wait(5)
+        _questions = ['bb', 'ccc', 'dddd', 'eeeee', 'ffffff']
+        _futures = [_encoder.submit(_question) for _question in _questions]
+        assert _encoder.get_stats()['queue_depth'] == 5
+        bert.release.set()
+
+        assert _first.result(5).tolist() == [1, ord('a')]
+        assert [_future.result(5).tolist() for _future in _futures] == [
+            [len(_question), ord(_question[0])] for _question in _questions
+        ]
+        assert bert.batches == [['a'], ['bb', 'ccc', 'dddd'], ['eeeee', 'ffffff']]
+
+        _stats = _encoder.get_stats()
+        assert _stats['batch_count'] == 3 and _stats['item_count'] == 6
+        assert _stats['avg_batch_size'] == 2.0 and _stats['fill_ratio'] == 2.0 / 3
+
+        # encode接口与BertClient一致
+        assert _encoder.encode(['x', 'yy'], timeout=5).tolist() == [[1, ord('x')], [2, ord('y')]]
+    finally:
+        _encoder.stop()
+
+
+def test_error_to_all_callers(bert):
+    """
+    编码失败时同一批的所有调用方都收到异常，之后的批次不受影响
+    """
+    _encoder = _create_encoder(bert, max_batch_size=4, max_wait=0.05)
+    try:
+        bert.release.clear()
+        bert.error = RuntimeError('bert error')
+        _futures = [_encoder.submit(_question) for _question in ('a', 'b')]
+        bert.release.set()
+        for _future in _futures:
+            with pytest.raises(RuntimeError):
+                _future.result(5)
+
+        bert.error = None
+        assert _encoder.encode(['c'], timeout=5).tolist() == [[1, ord('c')]]
+        assert _encoder.get_stats()['error_count'] == 1
+    finally:
+        _encoder.stop()
+
+
+def test_queue_full(bert):
+    """
+    队列满时提交问题等待超时后报错
+    """
+    _encoder = _create_encoder(bert, max_batch_size=1, queue_size=1, put_timeout=0.05)
+    try:
+        bert.release.clear()
+        _encoder.submit('a')
+        assert bert.started.wait(5)
+        _encoder.submit('b')
+        with pytest.raises(RuntimeError):
+            _encoder.submit('c')
+    finally:
+        bert.release.set()
+        _encoder.stop()
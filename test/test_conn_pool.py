@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+通用连接池的测试
+@module test_conn_pool
+@file test_conn_pool.py
+"""
+
+import os
+import sys
+import time
+import socket
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.conn_pool import ConnectionPool
+
+
+class FakeConnection(object):
+    """
+    连接替代对象
+    """
+
+    def __init__(self, num: int, healthy: bool = True):
+        self.num = num
+        self.healthy = healthy
+        self.closed = False
+
+
+def _create_pool(check_fun, **kwargs):
+    """
+    创建使用连接替代对象的连接池
+
+    @returns {tuple} - (连接池, 已创建的连接清单)
+    """
+    _created = list()
+
+    def create_fun():
+        _created.append(FakeConnection(len(_created)))
+        return _created[-1]
+
+    def close_fun(conn):
+        conn.closed = True
+
+    _para = {'pool_size': 2, 'check_interval': 0}
+    _para.update(kwargs)
+    return ConnectionPool(create_fun, close_fun=close_fun, check_fun=check_fun, **_para), _created
+
+
+@pytest.mark.parametrize('check_result', ['false', 'error'])
+def test_unhealthy_connection_is_replaced(check_result):
+    """
+    健康检查返回False或抛出异常的连接被关闭并重建，不占用连接数
+    """
+    def check_fun(conn):
+        if conn.healthy:
+            return True
+        if check_result == 'error':
+            raise ConnectionError('server gone')
+        return False
+
+    _pool, _created = _create_pool(check_fun)
+    with _pool.connection() as _conn:
+        assert _conn.num == 0
+
+    _created[0].healthy = False
+    with _pool.connection() as _conn:
+        assert _conn.num == 1
+
+    assert _created[0].closed
+    assert _pool.get_stats()['idle'] == 1
+
+    # 连接数未被泄露，可以同时取出pool_size个连接
+    _pool.wait_timeout = 0.1
+    _conns = [_pool._acquire(), _pool._acquire()]
+    with pytest.raises(TimeoutError):
+        _pool._acquire()
+    for _conn in _conns:
+        _pool._release(_conn)
+
+
+def test_failed_use_forces_check():
+    """
+    使用过程出现异常的连接，下次取出时无论是否在检查间隔内都进行健康检查
+    """
+    _checked = list()
+
+    def check_fun(conn):
+        _checked.append(conn.num)
+        return False
+
+    _pool, _created = _create_pool(check_fun, check_interval=3600)
+    with pytest.raises(RuntimeError):
+        with _pool.connection():
+            raise RuntimeError('use error')
+
+    with _pool.connection() as _conn:
+        assert _conn.num == 1
+
+    assert _checked == [0]
+    assert _created[0].closed
+
+
+def _free_port() -> int:
+    """
+    获取一个未被监听的本地端口
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as _sock:
+        _sock.bind(('127.0.0.1', 0))
+        return _sock.getsockname()[1]
+
+
+def test_bert_check_does_not_block(qa_manager_factory):
+    """
+    BertClient服务端无响应时健康检查按超时时间返回，连接池重建连接
+    """
+    pytest.importorskip('zmq')
+    from bert_serving.client import BertClient
+    from benchmark import FakeBertClient
+
+    _qa_manager = qa_manager_factory()
+    _qa_manager.bert_check_timeout = 0.2
+
+    # 第一个连接指向没有服务的端口(默认timeout为-1)，之后的连接正常
+    _created = list()
+
+    def create_fun():
+        if len(_created) == 0:
+            _created.append(BertClient(
+                ip='127.0.0.1', port=_free_port(), port_out=_free_port(), ignore_all_checks=True
+            ))
+        else:
+            _created.append(FakeBertClient(dimension=8))
+        return _created[-1]
+
+    _pool = ConnectionPool(
+        create_fun, close_fun=_qa_manager._close_connection,
+        check_fun=_qa_manager._check_bert_client, pool_size=1, check_interval=0
+    )
+    with _pool.connection() as _bert:
+        assert _bert is _created[0]
+
+    _start = time.time()
+    with _pool.connection() as _bert:
+        assert _bert is _created[1]
+
+    assert time.time() - _start < 5
+    assert _created[0].timeout == -1  # 检查后恢复客户端原有的超时设置
+    assert _qa_manager._check_bert_client(_created[1])
+
+
+def test_nested_use_reuses_connection():
+    """
+    同一线程嵌套获取连接时复用已取出的连接，最外层退出后才放回连接池
+    """
+    _pool, _created = _create_pool(None, pool_size=1)
+    _pool.wait_timeout = 0.1
+    with _pool.connection() as _conn:
+        with _pool.connection() as _inner:
+            assert _inner is _conn
+
+        assert _pool.get_stats()['idle'] == 0
+
+    assert _pool.get_stats()['idle'] == 1
+    assert len(_created) == 1
+
+
+def test_idle_timeout_and_prefill():
+    """
+    预先建立连接，空闲超时的连接在下次取出时关闭
+    """
+    _pool, _created = _create_pool(None, pool_size=3, idle_timeout=0.05)
+    assert _pool.prefill(5) == 3
+    assert len(_created) == 3
+
+    time.sleep(0.1)
+    with _pool.connection() as _conn:
+        assert _conn.num == 3
+
+    assert all([_conn.closed for _conn in _created[0: 3]])
+    assert _pool.get_stats() == {'pool_size': 3, 'idle': 1}
+
+    _pool.clear()
+    assert _created[3].closed and _pool.get_stats()['idle'] == 0
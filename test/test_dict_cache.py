@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+分词词典缓存的测试
+@module test_dict_cache
+@file test_dict_cache.py
+"""
+
+import os
+import sys
+import glob
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+
+
+jieba = pytest.importorskip('jieba')
+from chat_robot.lib.dict_cache import JiebaDictCache
+
+
+@pytest.fixture
+def user_dict(tmp_path):
+    """
+    用户词典文件
+    """
+    _file = str(tmp_path / 'user_dict.txt')
+    with open(_file, 'w', encoding='utf-8') as _f:
+        _f.write('词典缓存测试词 10 n\n')
+
+    return _file
+
+
+def _cache_files(cache_path: str) -> list:
+    """
+    获取缓存目录下的缓存文件
+    """
+    return glob.glob(os.path.join(cache_path, 'jieba_dict.*.cache'))
+
+
+def test_load_from_cache(tmp_path, user_dict):
+    """
+    第一次装载生成缓存，之后从缓存装载，结果与直接装载用户词典一致
+    """
+    _cache_path = str(tmp_path / 'cache')
+    _cache = JiebaDictCache(_cache_path)
+    assert not _cache.load(user_dicts=[user_dict])
+    assert len(_cache_files(_cache_path)) == 1
+    _freq, _total = dict(jieba.dt.FREQ), jieba.dt.total
+
+    # 清除已装载的词典后从缓存装载
+    jieba.dt.FREQ = {}
+    assert _cache.load(user_dicts=[user_dict])
+    assert jieba.dt.FREQ == _freq and jieba.dt.total == _total
+    assert jieba.dt.user_word_tag_tab['词典缓存测试词'] == 'n'
+    assert '词典缓存测试词' in jieba.lcut('这是词典缓存测试词')
+
+
+def test_rebuild_on_change(tmp_path, user_dict):
+    """
+    词典文件变更或缓存文件损坏时重新生成缓存，并清除旧版本的缓存
+    """
+    _cache_path = str(tmp_path / 'cache')
+    _cache = JiebaDictCache(_cache_path)
+    assert not _cache.load(user_dicts=[user_dict])
+    _version = _cache.get_version(user_dicts=[user_dict])
+
+    with open(user_dict, 'a', encoding='utf-8') as _f:
+        _f.write('另一个缓存测试词 10 n\n')
+
+    assert _cache.get_version(user_dicts=[user_dict]) != _version
+    assert not _cache.load(user_dicts=[user_dict])
+    _files = _cache_files(_cache_path)
+    assert len(_files) == 1 and _files[0].find(_version) == -1
+    assert '另一个缓存测试词' in jieba.dt.FREQ
+
+    # 缓存文件损坏
+    with open(_files[0], 'wb') as _f:
+        _f.write(b'broken')
+
+    assert not _cache.load(user_dicts=[user_dict])
+    assert _cache.load(user_dicts=[user_dict])
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Excel流式读取工具的测试
+@module test_excel_tool
+@file test_excel_tool.py
+"""
+
+import os
+import sys
+import datetime
+import pytest
+import pandas as pd
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.excel_tool import ExcelTool
+from conftest import QUESTIONS_XLSX
+
+
+pytest.importorskip('openpyxl')
+
+
+def _read_all(excel_io, sheet_name: str, batch_num: int) -> pd.DataFrame:
+    """
+    流式读取整页数据并合并
+    """
+    _dfs = list(ExcelTool.read_sheet_by_batch(excel_io, sheet_name, batch_num))
+    for _df in _dfs:
+        assert _df.shape[0] <= batch_num
+        assert list(_df.index) == list(range(_df.shape[0]))
+
+    if len(_dfs) == 0:
+        return None
+
+    return pd.concat(_dfs, ignore_index=True)
+
+
+def _assert_same_as_read_excel(excel_io, sheet_name: str, batch_num: int):
+    """
+    检查流式读取的结果与pd.read_excel一致
+    """
+    _expect = pd.read_excel(excel_io, sheet_name=sheet_name, header=0)
+    _expect = _expect.loc[:, [not str(_col).startswith('Unnamed:') for _col in _expect.columns]]
+    _expect = _expect.dropna(how='all').reset_index(drop=True)
+    _actual = _read_all(excel_io, sheet_name, batch_num)
+    if _expect.shape[0] == 0:
+        assert _actual is None
+        return
+
+    # 每批按自身数据推断类型(与原来按批调用pd.read_excel一致)，空值可能为nan或NaT，按值比较
+    assert list(_actual.columns) == list(_expect.columns)
+    assert _to_values(_actual) == _to_values(_expect)
+    if batch_num >= _expect.shape[0]:
+        pd.testing.assert_frame_equal(_actual, _expect)
+
+
+def _to_values(df: pd.DataFrame) -> list:
+    """
+    将DataFrame转换为值清单，空值统一为None
+    """
+    return [
+        [None if pd.isna(_value) else _value for _value in _row]
+        for _row in df.astype(object).itertuples(index=False, name=None)
+    ]
+
+
+@pytest.mark.parametrize('batch_num', [1, 7, 100])
+def test_questions_xlsx_same_as_read_excel(batch_num):
+    """
+    questions.xlsx每一页的流式读取结果与pd.read_excel一致
+    """
+    with pd.io.excel.ExcelFile(QUESTIONS_XLSX, engine='openpyxl') as _excel_io:
+        for _sheet_name in _excel_io.sheet_names:
+            _assert_same_as_read_excel(_excel_io, _sheet_name, batch_num)
+
+
+@pytest.fixture
+def typed_xlsx(tmp_path):
+    """
+    包含各种数据类型及空值的Excel文件
+    """
+    _file = str(tmp_path / 'typed.xlsx')
+    _df = pd.DataFrame({
+        'int': [1, 2, None, 4],
+        'float': [1.5, None, 3.0, 4.25],
+        'text': ['a', None, '中文', '{"k": 1}'],
+        'mixed': [1, 'b', 2.5, None],
+        'date': [datetime.datetime(2020, 7, 20, 10, 30), None, datetime.datetime(2020, 1, 1), None],
+        'bool': [True, False, None, True],
+    })
+    with pd.ExcelWriter(_file, engine='openpyxl') as _writer:
+        _df.to_excel(_writer, sheet_name='Typed', index=False)
+        pd.DataFrame({'only_header': []}).to_excel(_writer, sheet_name='Empty', index=False)
+
+    return _file
+
+
+def test_typed_values_same_as_read_excel(typed_xlsx):
+    """
+    数值、文本、日期、布尔及空值的转换与pd.read_excel一致
+    """
+    with pd.io.excel.ExcelFile(typed_xlsx, engine='openpyxl') as _excel_io:
+        _assert_same_as_read_excel(_excel_io, 'Typed', 3)
+        _assert_same_as_read_excel(_excel_io, 'Typed', 100)
+        assert _read_all(_excel_io, 'Empty', 3) is None
+        assert list(ExcelTool.read_sheet_by_batch(_excel_io, 'NotExists', 3)) == []
+
+
+def test_fallback_engine_same_as_read_excel(typed_xlsx, monkeypatch):
+    """
+    不支持流式读取的引擎一次性解析后分批返回，结果与pd.read_excel一致
+    """
+    monkeypatch.setattr(ExcelTool, 'STREAM_ENGINES', ())
+    with pd.io.excel.ExcelFile(typed_xlsx, engine='openpyxl') as _excel_io:
+        _assert_same_as_read_excel(_excel_io, 'Typed', 3)
+
+    with pd.io.excel.ExcelFile(QUESTIONS_XLSX, engine='openpyxl') as _excel_io:
+        _assert_same_as_read_excel(_excel_io, 'StdQuestions', 7)
+
+
+def test_engine_mismatch_rejected(typed_xlsx):
+    """
+    指定的引擎与打开文件的引擎不一致时明确报错
+    """
+    with pd.io.excel.ExcelFile(typed_xlsx, engine='openpyxl') as _excel_io:
+        with pytest.raises(ValueError):
+            next(ExcelTool.read_sheet_by_batch(_excel_io, 'Typed', 3, engine='xlrd'))
+
+        assert next(ExcelTool.read_sheet_by_batch(_excel_io, 'Typed', 3, engine='openpyxl')).shape[0] == 3
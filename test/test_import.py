@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Excel导入问题的测试
+@module test_import
+@file test_import.py
+"""
+
+import os
+import re
+import sys
+import pytest
+import pandas as pd
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from conftest import QUESTIONS_XLSX
+
+
+def _import_and_snapshot(qa_manager) -> tuple:
+    """
+    导入questions.xlsx，并获取导入后数据库的数据快照
+    注：数据库代理为全局对象，需在创建下一个问答数据管理对象前获取快照
+
+    @returns {tuple} - (标准问题id映射字典, {表名: 排序后的数据清单})
+        数据中的标准问题id转换为Excel上的id，milvus_id转换为(场景, 向量)
+    """
+    from chat_robot.lib.answer_db import (
+        StdQuestion, Answer, ExtQuestion, CollectionOrder, CommonPara, NlpSureJudgeDict,
+        NlpPurposConfigDict, UploadFileConfig
+    )
+
+    _mapping = list()
+    _import_std_questions_by_xls = qa_manager._import_std_questions_by_xls
+
+    def import_std_questions_by_xls(*args, **kwargs):
+        _mapping.append(_import_std_questions_by_xls(*args, **kwargs))
+        return _mapping[-1]
+
+    qa_manager._import_std_questions_by_xls = import_std_questions_by_xls
+    qa_manager.import_questions_by_xls(QUESTIONS_XLSX)
+
+    # 向量库中的记录, key为(collection, milvus_id), value为(场景, 向量)
+    _vectors = dict()
+    with qa_manager.get_milvus() as _milvus:
+        for _name, _collection in _milvus.store.collections.items():
+            _matrix, _ids, _tags = _collection._get_matrix()
+            for _row in range(_matrix.shape[0]):
+                _vectors[(_name, int(_ids[_row]))] = (_tags[_row], _matrix[_row].tolist())
+
+    _excel_ids = {_id: _excel_id for _excel_id, _id in _mapping[0].items()}
+    _std_collections = dict()
+
+    def to_vector(collection, milvus_id):
+        # 没有向量(-1)或Excel上指定的milvus_id保持原值
+        return _vectors.get((collection, milvus_id), milvus_id)
+
+    _tables = dict()
+    _tables['std_questions'] = list()
+    for _row in StdQuestion.select().dicts():
+        _std_collections[_row['id']] = _row['collection']
+        _row['id'] = _excel_ids[_row['id']]
+        _row['milvus_id'] = to_vector(_row['collection'], _row['milvus_id'])
+        _tables['std_questions'].append(_row)
+
+    # 答案参数中的{$id=...$}变量替换为对应的标准问题id，检查后还原为Excel上的值
+    _type_params = dict()
+    for _, _row in pd.read_excel(QUESTIONS_XLSX, sheet_name='Answers', engine='openpyxl').iterrows():
+        if str(_row['type_param']) != 'nan':
+            _type_params[_row['std_question_id']] = str(_row['type_param'])
+
+    _tables['answers'] = list()
+    for _row in Answer.select().dicts():
+        _row['std_question_id'] = _excel_ids[_row['std_question_id']]
+        if _row['std_question_id'] in _type_params:
+            _type_param = _type_params[_row['std_question_id']]
+            assert _row['type_param'] == re.sub(
+                r'\{\$id=(.+?)\$\}', lambda m: str(_mapping[0][m.group(1)]), _type_param
+            )
+            _row['type_param'] = _type_param
+
+        _tables['answers'].append(_row)
+
+    _tables['ext_questions'] = list()
+    for _row in ExtQuestion.select().dicts():
+        _row.pop('id')
+        _row['milvus_id'] = to_vector(_std_collections[_row['std_question_id']], _row['milvus_id'])
+        _row['std_question_id'] = _excel_ids[_row['std_question_id']]
+        _tables['ext_questions'].append(_row)
+
+    _tables['nlp_purpos_config_dict'] = list()
+    for _row in NlpPurposConfigDict.select().dicts():
+        _row.pop('id')
+        _row['std_question_id'] = _excel_ids.get(_row['std_question_id'], _row['std_question_id'])
+        _tables['nlp_purpos_config_dict'].append(_row)
+
+    for _model in (CollectionOrder, CommonPara, NlpSureJudgeDict, UploadFileConfig):
+        _tables[_model._meta.table_name] = list(_model.select().dicts())
+
+    for _table in _tables.keys():
+        _tables[_table].sort(key=lambda _row: str(sorted(_row.items())))
+
+    return _mapping[0], _tables
+
+
+def test_bulk_same_as_one_by_one(qa_manager_factory):
+    """
+    批量写入与逐条写入的导入结果一致(按Excel上的id及向量对比)
+    """
+    _mapping, _tables = _import_and_snapshot(
+        qa_manager_factory(db_name='one_by_one.db', excel_bulk_insert=False)
+    )
+    _bulk_mapping, _bulk_tables = _import_and_snapshot(
+        qa_manager_factory(db_name='bulk.db', excel_bulk_insert=True)
+    )
+
+    # 两种方式都导入了Excel上的所有标准问题
+    assert len(_mapping) > 0
+    assert sorted(_bulk_mapping.keys()) == sorted(_mapping.keys())
+    for _table in ('std_questions', 'answers', 'ext_questions'):
+        assert len(_tables[_table]) > 0
+
+    assert len(_tables['std_questions']) == len(_mapping)
+    for _table in _tables.keys():
+        assert _bulk_tables[_table] == _tables[_table], _table
+
+
+@pytest.mark.parametrize('excel_bulk_insert', [False, True])
+def test_pipeline_same_as_serial(qa_manager_factory, excel_bulk_insert):
+    """
+    流水线并行导入与顺序导入的结果一致
+    """
+    _mapping, _tables = _import_and_snapshot(qa_manager_factory(
+        db_name='serial.db', excel_bulk_insert=excel_bulk_insert, excel_batch_num=3
+    ))
+    _pipeline_mapping, _pipeline_tables = _import_and_snapshot(qa_manager_factory(
+        db_name='pipeline.db', excel_bulk_insert=excel_bulk_insert, excel_batch_num=3,
+        import_pipeline_para={
+            'enable': True, 'encode_thread_num': 2, 'persist_thread_num': 2, 'queue_size': 1
+        }
+    ))
+
+    assert sorted(_pipeline_mapping.keys()) == sorted(_mapping.keys())
+    for _table in _tables.keys():
+        assert _pipeline_tables[_table] == _tables[_table], _table
+
+
+def test_bulk_create_fallback(qa_manager_factory):
+    """
+    批量插入失败时整批回滚并改为逐条插入，失败记录通过错误处理函数返回
+    """
+    from chat_robot.lib.answer_db import ExtQuestion
+
+    _qa_manager = qa_manager_factory()
+    _errors = list()
+
+    def error_fun(i, error):
+        _errors.append(i)
+
+    # 批量插入成功
+    _rows = [
+        {'milvus_id': _i, 'std_question_id': 1, 'question': '问题%d' % _i} for _i in range(5)
+    ]
+    assert _qa_manager._bulk_create(ExtQuestion, _rows, error_fun, chunk_size=2) is None
+    assert ExtQuestion.select().count() == 5
+    assert _qa_manager._bulk_create(ExtQuestion, [], error_fun) is None
+
+    # 与已有记录的唯一索引冲突、缺少必填字段的记录失败，其他记录正常插入
+    _rows = [
+        {'milvus_id': 10, 'std_question_id': 1, 'question': '问题10'},
+        {'milvus_id': 3, 'std_question_id': 1, 'question': '重复的问题'},
+        {'milvus_id': 11, 'std_question_id': 1, 'question': '问题11'},
+        {'milvus_id': 12, 'std_question_id': 1},
+        {'milvus_id': 13, 'std_question_id': 1, 'question': '问题13'},
+    ]
+    _ids = _qa_manager._bulk_create(ExtQuestion, _rows, error_fun, chunk_size=2)
+    assert _errors == [1, 3]
+    assert len(_ids) == len(_rows)
+    assert _ids[1] is None and _ids[3] is None
+    for _i in (0, 2, 4):
+        _ext = ExtQuestion.get_by_id(_ids[_i])
+        assert _ext.milvus_id == _rows[_i]['milvus_id'] and _ext.question == _rows[_i]['question']
+
+    # 第一个批次已成功写入的记录被回滚，没有重复记录
+    assert ExtQuestion.select().count() == 8
+    assert ExtQuestion.select().where(ExtQuestion.milvus_id == 3).count() == 1
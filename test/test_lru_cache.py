@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+带超时机制的LRU缓存的测试
+@module test_lru_cache
+@file test_lru_cache.py
+"""
+
+import os
+import sys
+import time
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.lru_cache import LRUCache
+
+
+def test_evict_least_recently_used():
+    """
+    超过最大记录数时淘汰最久未使用的记录(读取也算使用)
+    """
+    _cache = LRUCache(max_size=2)
+    _cache.set('a', 1)
+    _cache.set('b', 2)
+    assert _cache.get('a') == 1
+    _cache.set('c', 3)
+
+    assert _cache.get('b') is None
+    assert _cache.get('a') == 1 and _cache.get('c') == 3
+    assert len(_cache) == 2
+    assert _cache.get_stats() == {'size': 2, 'hits': 3, 'misses': 1}
+
+    # 覆盖已有的key不增加记录数
+    _cache.set('a', 10)
+    assert _cache.get('a') == 10 and len(_cache) == 2
+
+
+def test_ttl():
+    """
+    超时的记录视为不存在并被删除
+    """
+    _cache = LRUCache(max_size=10, ttl=0.05)
+    _cache.set('a', 1)
+    assert _cache.get('a') == 1
+    time.sleep(0.1)
+    assert _cache.get('a', 'default') == 'default'
+    assert len(_cache) == 0
+
+
+def test_disabled_and_clear():
+    """
+    最大记录数为0时不缓存；清空后统计信息保留
+    """
+    _cache = LRUCache(max_size=0)
+    _cache.set('a', 1)
+    assert _cache.get('a') is None and len(_cache) == 0
+
+    _cache = LRUCache(max_size=10)
+    _cache.set('a', None)
+    _cache.set('b', [])
+    assert _cache.get('b') == []
+    _cache.clear()
+    assert _cache.get('b') is None
+    assert _cache.get_stats() == {'size': 0, 'hits': 1, 'misses': 1}
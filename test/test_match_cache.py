@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+向量匹配结果缓存的测试
+@module test_match_cache
+@file test_match_cache.py
+"""
+
+import os
+import sys
+import time
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+
+
+def _count_encode(qa):
+    """
+    统计问题向量的编码次数(即实际执行向量检索的次数)
+
+    @returns {list} - 编码的问题清单，会随调用增加
+    """
+    _encoded = list()
+    _encode_questions = qa.qa_manager.encode_questions
+
+    def encode_questions(questions):
+        _encoded.extend(questions)
+        return _encode_questions(questions)
+
+    qa.qa_manager.encode_questions = encode_questions
+    return _encoded
+
+
+def test_hit_and_miss(qa_factory):
+    """
+    相同问题(标准化后)命中缓存，不同问题需重新检索
+    """
+    _qa = qa_factory(match_cache_size=100)
+    _encoded = _count_encode(_qa)
+    _session_id = _qa.generate_session()
+
+    _answer = _qa.quession_search('你叫什么名字', session_id=_session_id)
+    assert _encoded == ['你叫什么名字']
+
+    assert _qa.quession_search(' 你叫什么名字 ', session_id=_session_id) == _answer
+    assert _encoded == ['你叫什么名字']
+
+    _qa.quession_search('你好', session_id=_session_id)
+    assert _encoded == ['你叫什么名字', '你好']
+    assert len(_qa.match_cache) == 2
+
+
+def test_disabled(qa_factory):
+    """
+    缓存大小为0时每次都进行检索
+    """
+    _qa = qa_factory(match_cache_size=0)
+    _encoded = _count_encode(_qa)
+    _session_id = _qa.generate_session()
+    _qa.quession_search('你好', session_id=_session_id)
+    _qa.quession_search('你好', session_id=_session_id)
+    assert _encoded == ['你好', '你好']
+
+
+def test_ttl(qa_factory):
+    """
+    缓存超过有效时间后重新检索
+    """
+    _qa = qa_factory(match_cache_size=100, match_cache_ttl=0.2)
+    _encoded = _count_encode(_qa)
+    _session_id = _qa.generate_session()
+    _qa.quession_search('你好', session_id=_session_id)
+    _qa.quession_search('你好', session_id=_session_id)
+    assert len(_encoded) == 1
+
+    time.sleep(0.3)
+    _qa.quession_search('你好', session_id=_session_id)
+    assert len(_encoded) == 2
+
+
+def test_clear_on_data_change(qa_factory):
+    """
+    问题数据变更后清空缓存，新增的问题可以被匹配到
+    """
+    _qa = qa_factory(match_cache_size=100)
+    _encoded = _count_encode(_qa)
+    _session_id = _qa.generate_session()
+    _qa.quession_search('缓存测试新增的问题', session_id=_session_id)
+    assert len(_qa.match_cache) == 1
+
+    _qa.qa_manager.add_std_question('缓存测试新增的问题', answer='缓存测试新增的答案')
+    assert len(_qa.match_cache) == 0
+
+    assert _qa.quession_search('缓存测试新增的问题', session_id=_session_id) == ['缓存测试新增的答案']
+    assert len(_encoded) == 2
+
+
+def test_nlp_runs_on_cache_hit(qa_factory):
+    """
+    命中缓存时仍按问题原文执行NLP意图匹配，缓存只保存向量检索结果
+    """
+    _qa = qa_factory(match_cache_size=100)
+    _qa.use_nlp = True
+    _encoded = _count_encode(_qa)
+    _nlp_questions = list()
+
+    def nlp_match_action(question, session_id, collection, partition):
+        _nlp_questions.append(question)
+        if question == '我要转账':
+            # 模拟意图匹配成功
+            return collection, partition, [], None
+        return collection, partition, None, None
+
+    _qa._nlp_match_action = nlp_match_action
+    _session_id = _qa.generate_session()
+    _qa.quession_search('你好', session_id=_session_id)
+    _qa.quession_search('你好 ', session_id=_session_id)
+    assert _nlp_questions == ['你好', '你好 ']
+    assert _encoded == ['你好']
+
+    # 意图匹配成功的结果不进入缓存
+    _qa.quession_search('我要转账', session_id=_session_id)
+    assert len(_qa.match_cache) == 1
+    assert len(_encoded) == 1
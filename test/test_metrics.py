@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+性能指标统计的测试
+@module test_metrics
+@file test_metrics.py
+"""
+
+import os
+import sys
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.metrics import Metrics
+
+
+@pytest.fixture
+def metrics():
+    """
+    启用统计并在测试后恢复
+    """
+    _enable = Metrics.enable
+    Metrics.clear()
+    Metrics.enable = True
+    yield Metrics
+    Metrics.enable = _enable
+    Metrics.clear()
+
+
+def test_disabled_by_default():
+    """
+    默认不启用，登记不产生数据
+    """
+    assert not Metrics.enable
+    Metrics.inc('test_disabled_total')
+    Metrics.observe('test_disabled_seconds', 0.1)
+    with Metrics.timer('test_disabled_seconds'):
+        pass
+
+    assert 'test_disabled' not in Metrics.render()
+
+
+def test_render_counter_and_gauge(metrics):
+    """
+    计数器及仪表按指标名及标签排序输出，标签值转义
+    """
+    metrics.register('test_requests_total', 'counter', 'Test requests')
+    metrics.register('test_queue_depth', 'gauge')
+    metrics.inc('test_requests_total', result='ok')
+    metrics.inc('test_requests_total', 2, result='ok')
+    metrics.inc('test_requests_total', result='error')
+    metrics.inc('test_requests_total', 0.5, path='a"b\\c\nd')
+    metrics.set('test_queue_depth', 3)
+    metrics.set('test_queue_depth', 5)
+
+    assert metrics.render() == (
+        '# TYPE test_queue_depth gauge\n'
+        'test_queue_depth 5\n'
+        '# HELP test_requests_total Test requests\n'
+        '# TYPE test_requests_total counter\n'
+        'test_requests_total{path="a\\"b\\\\c\\nd"} 0.5\n'
+        'test_requests_total{result="error"} 1\n'
+        'test_requests_total{result="ok"} 3\n'
+    )
+
+
+def test_render_histogram(metrics):
+    """
+    直方图按分桶累计输出，包括+Inf、sum及count
+    """
+    metrics.register('test_latency_seconds', 'histogram', 'Test latency', buckets=(0.1, 1))
+    for _value in (0.05, 0.1, 0.5, 2):
+        metrics.observe('test_latency_seconds', _value, stage='a')
+
+    with pytest.raises(RuntimeError):
+        with metrics.timer('test_latency_seconds', stage='b'):
+            raise RuntimeError('timer error')
+
+    assert metrics.render() == (
+        '# HELP test_latency_seconds Test latency\n'
+        '# TYPE test_latency_seconds histogram\n'
+        'test_latency_seconds_bucket{stage="a",le="0.1"} 2\n'
+        'test_latency_seconds_bucket{stage="a",le="1"} 3\n'
+        'test_latency_seconds_bucket{stage="a",le="+Inf"} 4\n'
+        'test_latency_seconds_sum{stage="a"} 2.65\n'
+        'test_latency_seconds_count{stage="a"} 4\n'
+        'test_latency_seconds_bucket{stage="b",le="0.1"} 1\n'
+        'test_latency_seconds_bucket{stage="b",le="1"} 1\n'
+        'test_latency_seconds_bucket{stage="b",le="+Inf"} 1\n'
+        'test_latency_seconds_sum{stage="b"} %s\n'
+        'test_latency_seconds_count{stage="b"} 1\n'
+    ) % repr(metrics._histograms[('test_latency_seconds', (('stage', 'b'), ))][1])
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+NLP分词及意图匹配的测试
+@module test_nlp
+@file test_nlp.py
+"""
+
+import os
+import sys
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from conftest import QUESTIONS_XLSX
+
+
+# 测试问题(包含questions.xlsx的意图词、数量及币种合并、标点及肯定否定)
+QUESTIONS = [
+    '我要寄信', '寄信', '我想转账', '帮我转账给张三', '你好', '不要转账，寄信100元', '不是不要寄信!',
+    '我要转账100,000元给张三', '转账￥100给张三', '转账$5,000,000。不要寄信', '100,000', '￥100',
+    '我想转账 100 , 200', '转账1,2,3块', 'yes 转账￥1,000,000', 'not 寄信 ok', '寄信1,000元，转账100',
+]
+
+# 测试增加的意图: 用于检查合并前的词及合并过程中的词也参与匹配
+AMOUNT_ACTION = '金额'
+AMOUNT_WORDS = ['100', '￥100', '100,000', '1,000', '1', '$']
+
+
+@pytest.fixture
+def data_manager_para(qa_manager_factory):
+    """
+    导入questions.xlsx后的内存参数，每个场景增加匹配金额的意图
+    """
+    pytest.importorskip('jieba')
+    _qa_manager = qa_manager_factory()
+    _qa_manager.import_questions_by_xls(QUESTIONS_XLSX)
+    _qa_manager.load_common_para()
+    _qa_manager.load_nlp_sure_judge_dict()
+    _qa_manager.load_nlp_purpos_config_dict()
+
+    for _partitions in _qa_manager.DATA_MANAGER_PARA['nlp_purpos_config_dict'].values():
+        for _partition_dict in _partitions.values():
+            _partition_dict['match'][AMOUNT_ACTION] = [AMOUNT_WORDS, False, 0]
+            _partition_dict['actions'][AMOUNT_ACTION] = {
+                'order_num': 0, 'collection': None, 'partition': None, 'std_question_id': 0,
+                'info': [], 'check': [],
+            }
+            _qa_manager._build_purpos_match_index(_partition_dict)
+
+    return _qa_manager.DATA_MANAGER_PARA
+
+
+def _legacy_match_purposes(data_manager_para: dict, question: str, collection: str, partition: str) -> tuple:
+    """
+    逐个词合并数量及币种并匹配意图的原处理逻辑(用于对比)
+
+    @returns {list, list} - 按优先顺序排序的意图清单, 分词列表[[word, flag], ]
+    """
+    import jieba.posseg as pseg
+
+    _amount_sign_list = data_manager_para.get('common_para', {}).get('amount_sign_list', ['$', '￥'])
+    _config_dict = data_manager_para['nlp_purpos_config_dict'][collection][partition]
+    _sure_judge_dict = data_manager_para['nlp_sure_judge_dict']
+    _question_len = len(question)
+
+    def match_purpose(word):
+        _matched = list()
+        for _action, (_words, _ignorecase, _scale) in _config_dict['match'].items():
+            if (word.lower() if _ignorecase else word) in _words:
+                if _scale <= 0.0 or len(word) / _question_len >= _scale:
+                    _matched.append(_action)
+        return _matched
+
+    def judge_is_sure(words):
+        _is_sure = None
+        for _word, _flag in words:
+            _judge = None
+            if _word in _sure_judge_dict['negative'].get(_flag, []):
+                _judge = False
+            elif _word in _sure_judge_dict['sure'].get(_flag, []):
+                _judge = True
+
+            if _is_sure is None:
+                _is_sure = _judge
+            elif _judge is not None and not _judge:
+                _is_sure = not _is_sure
+
+        return 'uncertain' if _is_sure is None else ('sure' if _is_sure else 'negative')
+
+    _purpose = list()
+    _matched_list = list()
+    _matched_in_s = list()
+    for _action, (_words, _ignorecase) in _config_dict['exact_match'].items():
+        _temp_question = question.lower() if _ignorecase else question
+        if _temp_question in _words:
+            _matched_in_s.append([_action, _temp_question, 'exact_match'])
+
+    _words = pseg.cut(question)
+    _words_list = list()
+    _s_start = 0
+    _word, _flag = next(_words)
+    _last_word, _last_flag = '', ''
+    _stop_iter = False
+    while True:
+        try:
+            _next_word, _next_flag = ('', '') if _stop_iter else next(_words)
+        except StopIteration:
+            _stop_iter = True
+            _next_word, _next_flag = '.', 'x'
+
+        if _flag == 'm' and (_last_flag == 'm' or _last_word in _amount_sign_list):
+            _word = _words_list[-1][0] + _word
+            _words_list[-1] = [_word, 'm']
+        elif _word == ',' and _last_flag == 'm' and _next_flag == 'm':
+            _word, _flag = _last_word + _word + _next_word, 'm'
+            _words_list[-1] = [_word, _flag]
+            try:
+                _next_word, _next_flag = ('', '') if _stop_iter else next(_words)
+            except StopIteration:
+                _stop_iter = True
+                _next_word, _next_flag = '.', 'x'
+        else:
+            _words_list.append([_word, _flag])
+
+        if (_flag == 'x' and _word != ' ') or _word in ('.'):
+            for _action, _match_word, _match_type in _matched_in_s:
+                _config = _config_dict['actions'][_action]
+                _purpose.append({
+                    'action': _action, 'collection': _config['collection'], 'partition': _config['partition'],
+                    'match_word': _match_word, 'match_type': _match_type,
+                    'is_sure': judge_is_sure(_words_list[_s_start:]),
+                    'order_num': _config['order_num'], 'std_question_id': _config['std_question_id'],
+                    'info': {},
+                })
+            _s_start = len(_words_list)
+            _matched_in_s.clear()
+        else:
+            for _action in match_purpose(_word):
+                if _action not in _matched_list:
+                    _matched_list.append(_action)
+                    _matched_in_s.append([_action, _word, 'nlp_match'])
+
+        if _next_word == '':
+            break
+
+        _last_word, _last_flag = _word, _flag
+        _word, _flag = _next_word, _next_flag
+
+    return sorted(_purpose, key=lambda x: x['order_num'], reverse=True), _words_list
+
+
+def test_match_purposes_same_as_legacy(data_manager_para):
+    """
+    单次遍历分词后的意图匹配结果与逐个词处理的原逻辑一致(包括合并前的词及合并过程中的词的匹配)
+    """
+    from chat_robot.lib.nlp import NLP
+
+    _nlp = NLP(data_manager_para=data_manager_para)
+    _matched = dict()
+    for _question in QUESTIONS:
+        for _collection, _partitions in data_manager_para['nlp_purpos_config_dict'].items():
+            for _partition in _partitions.keys():
+                _expect, _expect_words = _legacy_match_purposes(
+                    data_manager_para, _question, _collection, _partition
+                )
+                _purpose, _words = _nlp.match_purposes(_question, _collection, _partition)
+                assert _purpose == _expect, _question
+                assert [list(_word) for _word in _words] == _expect_words, _question
+                assert _nlp.cut_sentence(_question) == _expect_words
+                for _item in _purpose:
+                    _matched.setdefault(_item['action'], set()).add(_item['match_word'])
+
+    # 检查测试问题覆盖了questions.xlsx的意图及合并前后的词
+    assert {'寄信', '转账', AMOUNT_ACTION} <= set(_matched.keys())
+    assert {'100', '￥100'} <= _matched[AMOUNT_ACTION]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+NLP工作进程池的测试
+@module test_nlp_pool
+@file test_nlp_pool.py
+"""
+
+import os
+import sys
+import copy
+import time
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from conftest import QUESTIONS_XLSX
+
+
+# 测试问题
+QUESTIONS = ['我要寄信', '寄信', '我想转账', '帮我转账给张三', '你好', '今天天气怎么样']
+
+
+@pytest.fixture
+def data_manager_para(qa_manager_factory):
+    """
+    导入questions.xlsx后的内存参数
+    """
+    pytest.importorskip('jieba')
+    _qa_manager = qa_manager_factory()
+    _qa_manager.import_questions_by_xls(QUESTIONS_XLSX)
+    _qa_manager.load_common_para()
+    _qa_manager.load_nlp_sure_judge_dict()
+    _qa_manager.load_nlp_purpos_config_dict()
+    return _qa_manager.DATA_MANAGER_PARA
+
+
+@pytest.fixture
+def worker_pool(data_manager_para):
+    """
+    一个工作进程的进程池
+    """
+    from chat_robot.lib.nlp_pool import NLPWorkerPool
+
+    _pool = NLPWorkerPool(
+        1, {
+            'set_dictionary': None, 'user_dicts': [], 'enable_paddle': False,
+            'cut_cache_size': 100, 'dict_cache_path': None
+        }, data_manager_para, timeout=30
+    )
+    yield _pool
+    _pool.close()
+
+
+def test_same_as_local(data_manager_para, worker_pool):
+    """
+    工作进程的意图匹配结果与在当前进程处理一致
+    """
+    from chat_robot.lib.nlp import NLP
+
+    _nlp = NLP(data_manager_para=data_manager_para)
+    _matched = 0
+    for _question in QUESTIONS:
+        for _collection, _partitions in data_manager_para['nlp_purpos_config_dict'].items():
+            for _partition in _partitions.keys():
+                _expect = _nlp.match_purposes(_question, _collection, _partition)
+                assert worker_pool.match_purposes(_question, _collection, _partition) == _expect
+                _matched += len(_expect[0])
+
+    assert _matched > 0
+
+
+def test_update_para(data_manager_para, worker_pool):
+    """
+    参数无变化时不更新，有变化时在后台替换进程池，期间仍可正常处理
+    """
+    assert not worker_pool.update_para(data_manager_para)
+    assert not worker_pool.update_para(copy.deepcopy(data_manager_para))
+
+    # 变更与工作进程无关的参数
+    _para = copy.deepcopy(data_manager_para)
+    _para['nlp_sure_judge_dict'] = {'changed': True}
+    assert not worker_pool.update_para(_para)
+
+    _old_pool = worker_pool._pool
+    _expect = worker_pool.match_purposes('我要寄信')
+    _para['common_para']['nlp_pool_test'] = 'changed'
+    assert worker_pool.update_para(_para)
+    assert worker_pool.match_purposes('我要寄信') == _expect
+
+    _start = time.time()
+    while worker_pool._updating and time.time() - _start < 60:
+        time.sleep(0.1)
+
+    assert not worker_pool._updating
+    assert worker_pool._pool is not _old_pool
+    assert not worker_pool.update_para(_para)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+批量搜寻问题答案的测试
+@module test_search_batch
+@file test_search_batch.py
+"""
+
+import os
+import sys
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+
+
+def test_batch_with_invalid_items(qa_factory):
+    """
+    参数不正确的问题单独返回错误，其他问题的结果与逐个处理一致
+    """
+    _qa = qa_factory()
+    _session_id = _qa.generate_session()
+    _expect = _qa.quession_search('你好', session_id=_session_id)
+
+    _results = _qa.quession_search_batch([
+        {'question': '你好', 'session_id': _session_id},
+        {'session_id': _session_id},
+        'not a dict',
+        {'question': '你好', 'session_id': 'not exists'},
+    ])
+    assert _results[0] == (_expect, None)
+    assert _results[1][0] is None and isinstance(_results[1][1], ValueError)
+    assert _results[2][0] is None and isinstance(_results[2][1], ValueError)
+    assert _results[3][0] is None and isinstance(_results[3][1], FileNotFoundError)
+
+
+def test_api_batch_with_invalid_items(qa_factory, api_caller):
+    """
+    SearchAnswerBatch对每个问题分别校验参数，参数不正确的问题返回对应的状态码
+    """
+    _qa = qa_factory()
+    _session_id = _qa.generate_session()
+    api_call = api_caller(_qa)
+
+    _ret = api_call('SearchAnswerBatch', {'interface_seq_id': '1', 'items': [
+        {'item_id': 'ok', 'question': '你好', 'session_id': _session_id},
+        {'item_id': 'no_question', 'session_id': _session_id},
+        {'item_id': 'no_session', 'question': '你好'},
+        'not a dict',
+        {'item_id': 'not_exists', 'question': '你好', 'session_id': 'not exists'},
+        {'question': '你好', 'session_id': _session_id},
+    ]})
+    assert _ret['status'] == '00000' and _ret['interface_seq_id'] == '1'
+    assert [(_item.get('item_id', None), _item['status']) for _item in _ret['results']] == [
+        ('ok', '00000'), ('no_question', '10004'), ('no_session', '10001'), (None, '10001'),
+        ('not_exists', '10002'), (None, '00000')
+    ]
+    _answers = _ret['results'][0]['answers']
+    assert len(_answers) > 0 and _ret['results'][5]['answers'] == _answers
+
+    # 单个问题的接口
+    _ret = api_call('SearchAnswer', {'session_id': _session_id})
+    assert _ret['status'] == '10004'
+    _ret = api_call('SearchAnswer', {'session_id': _session_id, 'question': '你好'})
+    assert _ret['status'] == '00000' and _ret['answers'] == _answers
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Session数据编解码的测试
+@module test_session_codec
+@file test_session_codec.py
+"""
+
+import os
+import sys
+import datetime
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.session_codec import SessionCodec
+
+
+def test_round_trip():
+    """
+    编码后解码与原对象一致
+    """
+    _value = {
+        'name': '中文', 'age': 18, 'rate': 0.5, 'vip': True, 'none': None,
+        'last_time': datetime.datetime(2020, 7, 20, 10, 30, 1, 123456),
+        'nest': {'list': [1, 'a', {'time': datetime.datetime(2020, 1, 1)}]},
+    }
+    _str = SessionCodec.encode(_value)
+    assert SessionCodec.is_blob(_str)
+    assert SessionCodec.decode(_str) == _value
+
+
+def test_converted_types():
+    """
+    tuple、set转换为list，字典的数字key转换为字符串
+    """
+    _str = SessionCodec.encode({'tuple': (1, 2), 'set': {3}, 1: 'int key'})
+    assert SessionCodec.decode(_str) == {'tuple': [1, 2], 'set': [3], '1': 'int key'}
+
+    with pytest.raises(TypeError):
+        SessionCodec.encode({'obj': object()})
+
+
+def test_not_blob():
+    """
+    旧格式的字符串不是编码格式，解码时报错；None返回默认值
+    """
+    assert not SessionCodec.is_blob('dict:chat_robot:session:1:info')
+    assert not SessionCodec.is_blob(None)
+    assert SessionCodec.decode(None, default={}) == {}
+    with pytest.raises(ValueError):
+        SessionCodec.decode('str:abc')
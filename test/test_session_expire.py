@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Redis session超时队列迁移的测试
+@module test_session_expire
+@file test_session_expire.py
+"""
+
+import os
+import sys
+import datetime
+import threading
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+
+
+redis = pytest.importorskip('redis')
+
+
+# 旧版本session的最近访问时间(未超时)
+LAST_TIME = datetime.datetime.now().replace(microsecond=0)
+
+
+def _last_time(i: int) -> datetime.datetime:
+    """
+    第i个session的最近访问时间
+    """
+    return LAST_TIME + datetime.timedelta(seconds=i)
+
+
+def _add_legacy_session(redis_connection, i: int):
+    """
+    登记旧版本的session(只登记session清单)
+    """
+    redis_connection.hset(
+        'chat_robot:session:list', key='s%d' % i,
+        value='datetime:%s' % _last_time(i).strftime('%Y-%m-%d %H:%M:%S')
+    )
+
+
+@pytest.fixture
+def legacy_redis(fake_redis_config):
+    """
+    登记了旧版本session(没有登记超时队列)的redis连接
+    session清单: s0 ~ s9，其中s0已登记超时队列
+    """
+    _redis = redis.Redis(
+        connection_pool=redis.ConnectionPool(decode_responses=True, **fake_redis_config['connection'])
+    )
+    for _i in range(10):
+        _add_legacy_session(_redis, _i)
+    _redis.zadd('chat_robot:session:expire', {'s0': _last_time(100).timestamp()})
+    yield _redis
+    _redis.close()
+
+
+def test_migrate_in_background(qa_factory, fake_redis_config, legacy_redis, monkeypatch):
+    """
+    初始化时不执行迁移，由后台线程执行
+    """
+    from chat_robot.lib.qa import QA
+
+    _event = threading.Event()
+    _init_redis_session_expire = QA._init_redis_session_expire
+
+    def init_redis_session_expire(self):
+        assert _event.wait(5)
+        return _init_redis_session_expire(self)
+
+    monkeypatch.setattr(QA, '_init_redis_session_expire', init_redis_session_expire)
+    _qa = qa_factory(
+        use_redis=True, redis_session_format='blob', redis_config=fake_redis_config,
+        session_sweep_batch=3, session_sweep_interval=0
+    )
+    assert legacy_redis.zcard('chat_robot:session:expire') == 1
+
+    _event.set()
+    _qa._session_sweep_thread.join(5)
+    assert legacy_redis.zcard('chat_robot:session:expire') == 10
+
+
+def test_migrate_by_batch(qa_factory, fake_redis_config, legacy_redis):
+    """
+    分批将没有登记的session登记到超时队列，已登记的不覆盖，完成后不再执行
+    """
+    _qa = qa_factory(
+        use_redis=True, redis_session_format='blob', redis_config=fake_redis_config,
+        session_sweep_batch=3, session_sweep_interval=0
+    )
+    _qa._session_sweep_thread.join(5)
+
+    assert legacy_redis.exists('chat_robot:session_expire_migrated')
+    assert legacy_redis.zscore('chat_robot:session:expire', 's0') == _last_time(100).timestamp()
+    for _i in range(1, 10):
+        assert legacy_redis.zscore('chat_robot:session:expire', 's%d' % _i) == _last_time(_i).timestamp()
+
+    # 已完成迁移时跳过
+    _add_legacy_session(legacy_redis, 10)
+    assert _qa._init_redis_session_expire()['skip']
+    assert legacy_redis.zscore('chat_robot:session:expire', 's10') is None
+
+    # 删除迁移标志后重新执行
+    legacy_redis.delete('chat_robot:session_expire_migrated')
+    assert _qa._init_redis_session_expire() == {'scan_count': 11, 'add_count': 1, 'skip': False}
+    assert legacy_redis.zscore('chat_robot:session:expire', 's10') == _last_time(10).timestamp()
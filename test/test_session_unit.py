@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+请求内的session工作单元的测试
+@module test_session_unit
+@file test_session_unit.py
+"""
+
+import os
+import sys
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.session_codec import SessionCodec
+from chat_robot.lib.session_unit import SessionUnit, SessionConflictError
+
+
+redis = pytest.importorskip('redis')
+
+
+@pytest.fixture
+def redis_connection(fake_redis_config):
+    """
+    已登记一个blob格式session的redis连接
+    """
+    _pool = redis.ConnectionPool(decode_responses=True, **fake_redis_config['connection'])
+    _redis = redis.Redis(connection_pool=_pool)
+    _redis.hset('chat_robot:session:list', key='s1', value='2020-07-20 10:00:00')
+    _redis.hset('chat_robot:session:s1', mapping={
+        'version': 0,
+        'info': SessionCodec.encode({'name': 'a', 'age': 1}),
+        'context': SessionCodec.encode({}),
+    })
+    yield _redis
+    _redis.close()
+
+
+def _load(redis_connection, session_id: str = 's1') -> SessionUnit:
+    """
+    加载session工作单元
+    """
+    _unit = SessionUnit(session_id)
+    _unit.load(redis_connection)
+    return _unit
+
+
+def _set(unit: SessionUnit, section: str, **kwargs):
+    """
+    修改工作单元的部分字典
+    """
+    unit.get_section(section).update(kwargs)
+    unit.set_changed(section)
+
+
+def _get_section(redis_connection, section: str, session_id: str = 's1') -> dict:
+    """
+    获取redis上session的部分字典
+    """
+    return SessionCodec.decode(redis_connection.hget('chat_robot:session:%s' % session_id, section))
+
+
+def _get_version(redis_connection, session_id: str = 's1') -> int:
+    """
+    获取redis上session的版本
+    """
+    return int(redis_connection.hget('chat_robot:session:%s' % session_id, 'version'))
+
+
+def test_flush_without_conflict(redis_connection):
+    """
+    没有并发修改时直接写回变更的部分，并登记访问时间
+    """
+    _unit = _load(redis_connection)
+    assert _unit.exists and _unit.version == 0
+    assert _unit.get_section('info') == {'name': 'a', 'age': 1}
+    assert _unit.get_section('cache') == {}
+
+    _set(_unit, 'info', name='b')
+    _unit.last_time_value = '2020-07-20 10:01:00'
+    _unit.last_time_score = 1.0
+    _unit.flush(redis_connection)
+
+    assert _get_section(redis_connection, 'info') == {'name': 'b', 'age': 1}
+    assert _get_version(redis_connection) == 1
+    assert redis_connection.hget('chat_robot:session:list', 's1') == '2020-07-20 10:01:00'
+    assert redis_connection.zscore('chat_robot:session:expire', 's1') == 1.0
+
+    # 没有变更时不写回
+    _unit.flush(redis_connection)
+    assert _get_version(redis_connection) == 1
+
+
+def test_flush_not_exists_session(redis_connection):
+    """
+    session不存在时不写回
+    """
+    _unit = _load(redis_connection, session_id='s2')
+    assert not _unit.exists
+    _set(_unit, 'info', name='b')
+    _unit.flush(redis_connection)
+    assert not redis_connection.exists('chat_robot:session:s2')
+
+
+def test_merge_disjoint_keys(redis_connection):
+    """
+    并发请求修改不同的key(包括同一部分及不同部分)时合并双方的变更
+    """
+    _unit1 = _load(redis_connection)
+    _unit2 = _load(redis_connection)
+
+    _set(_unit1, 'info', name='b')
+    _unit1.get_section('info').pop('age')
+    _set(_unit1, 'context', step=1)
+    _unit1.flush(redis_connection)
+
+    _set(_unit2, 'info', city='gz')
+    _set(_unit2, 'cache', key='value')
+    _unit2.flush(redis_connection)
+
+    assert _get_section(redis_connection, 'info') == {'name': 'b', 'city': 'gz'}
+    assert _get_section(redis_connection, 'context') == {'step': 1}
+    assert _get_section(redis_connection, 'cache') == {'key': 'value'}
+    assert _get_version(redis_connection) == 2
+
+    # 合并后以最新版本为基础，后续变更无需再合并
+    assert _unit2.version == 1
+    _set(_unit2, 'info', name='c')
+    _unit2.flush(redis_connection)
+    assert _get_section(redis_connection, 'info') == {'name': 'c', 'city': 'gz'}
+
+
+def test_merge_same_key_same_value(redis_connection):
+    """
+    并发请求将同一个key修改为相同的值不视为冲突
+    """
+    _unit1 = _load(redis_connection)
+    _unit2 = _load(redis_connection)
+    _set(_unit1, 'info', name='b')
+    _unit1.flush(redis_connection)
+    _set(_unit2, 'info', name='b', age=2)
+    _unit2.flush(redis_connection)
+
+    assert _get_section(redis_connection, 'info') == {'name': 'b', 'age': 2}
+
+
+def test_same_key_conflict(redis_connection):
+    """
+    并发请求将同一个key修改为不同的值时抛出SessionConflictError，放弃当前请求的变更
+    """
+    _unit1 = _load(redis_connection)
+    _unit2 = _load(redis_connection)
+    _set(_unit1, 'info', name='b')
+    _unit1.flush(redis_connection)
+
+    _set(_unit2, 'info', name='c', city='gz')
+    _unit2.last_time_value = '2020-07-20 10:01:00'
+    _unit2.last_time_score = 1.0
+    with pytest.raises(SessionConflictError):
+        _unit2.flush(redis_connection)
+
+    assert _get_section(redis_connection, 'info') == {'name': 'b', 'age': 1}
+    assert _get_version(redis_connection) == 1
+    assert redis_connection.hget('chat_robot:session:list', 's1') == '2020-07-20 10:00:00'
+
+    # 删除已被其他请求修改的key同样视为冲突
+    _unit3 = _load(redis_connection)
+    _unit3.get_section('info').pop('name')
+    _unit3.set_changed('info')
+    _unit4 = _load(redis_connection)
+    _set(_unit4, 'info', name='d')
+    _unit4.flush(redis_connection)
+    with pytest.raises(SessionConflictError):
+        _unit3.flush(redis_connection)
+
+
+@pytest.fixture
+def blob_qa(qa_factory, fake_redis_config):
+    """
+    使用blob格式Redis session的问答处理对象
+    """
+    return qa_factory(
+        use_redis=True, redis_session_format='blob', redis_config=fake_redis_config
+    )
+
+
+def _concurrent_update_info(qa, session_id: str, **kwargs):
+    """
+    模拟同一session的其他请求修改客户信息(在其他工作单元中写回)
+    """
+    _unit = SessionUnit(session_id)
+    with redis.Redis(connection_pool=qa.redis_pool) as _redis:
+        _unit.load(_redis)
+        _set(_unit, 'info', **kwargs)
+        _unit.flush(_redis)
+
+
+def test_qa_session_conflict(blob_qa):
+    """
+    问答处理中与并发请求修改了同一个key时，quession_search抛出SessionConflictError，session保留其他请求的修改
+    """
+    _session_id = blob_qa.generate_session({'name': 'a'})
+    _other_session_id = blob_qa.generate_session({'name': 'a'})
+    _update_last_time = blob_qa.update_last_time
+    _other_names = ['d', 'c']
+
+    def update_last_time(session_id: str):
+        # 处理过程中修改客户信息，同时有其他请求修改了同一个key
+        _update_last_time(session_id)
+        blob_qa.update_session_info(session_id, {'name': 'b'})
+        if session_id == _session_id:
+            _concurrent_update_info(blob_qa, session_id, name=_other_names.pop())
+
+    blob_qa.update_last_time = update_last_time
+    with pytest.raises(SessionConflictError):
+        blob_qa.quession_search('你好', session_id=_session_id)
+
+    assert blob_qa.get_info_dict(_session_id) == {'name': 'c'}
+
+    # 批量处理时只有冲突的问题返回异常
+    _results = blob_qa.quession_search_batch([
+        {'question': '你好', 'session_id': _session_id},
+        {'question': '你好', 'session_id': _other_session_id},
+    ])
+    assert _results[0][0] is None and isinstance(_results[0][1], SessionConflictError)
+    assert _results[1][1] is None and len(_results[1][0]) > 0
+    assert blob_qa.get_info_dict(_session_id) == {'name': 'd'}
+    assert blob_qa.get_info_dict(_other_session_id) == {'name': 'b'}
+
+
+class _ConflictQA(object):
+    """
+    处理问题时出现session冲突的问答处理替代对象
+    """
+
+    def quession_search(self, question: str, session_id: str = None, **kwargs):
+        if session_id == 'conflict':
+            raise SessionConflictError('session [%s] conflict' % session_id)
+
+        return ['answer of %s' % question, ]
+
+    def quession_search_batch(self, items: list) -> list:
+        _results = list()
+        for _item in items:
+            try:
+                _results.append((self.quession_search(_item['question'], _item['session_id']), None))
+            except Exception as e:
+                _results.append((None, e))
+
+        return _results
+
+
+def test_api_session_conflict(api_caller):
+    """
+    出现session冲突时客户端收到10003状态码，可重新提交
+    """
+    api_call = api_caller(_ConflictQA())
+    _ret = api_call('SearchAnswer', {'interface_seq_id': '1', 'session_id': 'conflict', 'question': 'q'})
+    assert _ret['status'] == '10003' and _ret['interface_seq_id'] == '1'
+    assert 'answers' not in _ret
+
+    _ret = api_call('SearchAnswer', {'session_id': 'ok', 'question': 'q'})
+    assert _ret['status'] == '00000' and _ret['answers'] == ['answer of q']
+
+    _ret = api_call('SearchAnswerBatch', {'items': [
+        {'item_id': 'a', 'session_id': 'conflict', 'question': 'q1'},
+        {'item_id': 'b', 'session_id': 'ok', 'question': 'q2'},
+    ]})
+    assert _ret['status'] == '00000'
+    assert [(_item['item_id'], _item['status']) for _item in _ret['results']] == [('a', '10003'), ('b', '00000')]
+    assert _ret['results'][1]['answers'] == ['answer of q2']
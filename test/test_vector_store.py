@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2019 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+进程内向量检索库的测试
+@module test_vector_store
+@file test_vector_store.py
+"""
+
+import os
+import sys
+import threading
+import numpy as np
+import pytest
+# 根据当前文件路径将包路径纳入，在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from chat_robot.lib.vector_store import EmbeddedVectorStore, VectorCollection
+
+
+DIMENSION = 8
+
+
+def _random_vectors(count: int, seed: int = 0) -> np.ndarray:
+    """
+    生成随机向量
+    """
+    return np.random.RandomState(seed).rand(count, DIMENSION).astype(np.float32)
+
+
+def _hit_ids(hits: list) -> list:
+    """
+    获取检索结果的id清单
+    """
+    return [_hit.id for _hit in hits]
+
+
+def test_reload_keeps_id_sequence(tmp_path):
+    """
+    重新装载持久化目录后数据保持不变，新分配的id接着已有的最大id
+    """
+    _store = EmbeddedVectorStore(path=str(tmp_path))
+    _store.create_collection('c1', DIMENSION)
+    _store.create_collection('c2', DIMENSION)
+    _store.create_partition('c1', 'p1')
+    assert _store.insert('c1', _random_vectors(3), partition='p1') == [1, 2, 3]
+    assert _store.insert('c2', _random_vectors(2, seed=1)) == [4, 5]
+    _expect = _store.search('c1', _random_vectors(1, seed=2), 3)
+
+    _reload = EmbeddedVectorStore(path=str(tmp_path))
+    assert {_name: _c.size for _name, _c in _reload.collections.items()} == {'c1': 3, 'c2': 2}
+    assert _reload.has_partition('c1', 'p1')
+    assert _reload.search('c1', _random_vectors(1, seed=2), 3) == _expect
+    assert _reload.insert('c1', _random_vectors(2, seed=3), partition='p1') == [6, 7]
+
+    # 再次装载时包含追加的记录
+    _reload = EmbeddedVectorStore(path=str(tmp_path))
+    assert _reload.collections['c1'].size == 5
+    assert _reload.insert('c2', _random_vectors(1, seed=4)) == [8]
+
+
+def test_load_truncates_partial_tail(tmp_path):
+    """
+    写入中断留下的不完整记录在装载时被截断，后续追加的记录保持对齐
+    """
+    _path = str(tmp_path / 'c1')
+    _collection = VectorCollection('c1', DIMENSION, path=_path)
+    _vectors = _random_vectors(3)
+    _collection.insert(_vectors, [1, 2, 3])
+
+    # 模拟最后一条记录写入中断: 向量及场景只写入一部分
+    with open(os.path.join(_path, 'vectors.f32'), 'ab') as _file:
+        _file.write(_random_vectors(1, seed=1).tobytes()[0: 10])
+    with open(os.path.join(_path, 'ids.i64'), 'ab') as _file:
+        _file.write(np.asarray([4], dtype=np.int64).tobytes())
+    with open(os.path.join(_path, 'tags.txt'), 'a', encoding='utf-8') as _file:
+        _file.write('nu')
+
+    _reload = VectorCollection('c1', 0, path=_path)
+    assert _reload.size == 3 and _reload.max_id == 3
+    assert os.path.getsize(os.path.join(_path, 'vectors.f32')) == 3 * 4 * DIMENSION
+    assert os.path.getsize(os.path.join(_path, 'ids.i64')) == 3 * 8
+
+    _new_vector = _random_vectors(1, seed=2)
+    _reload.insert(_new_vector, [5])
+    _reload = VectorCollection('c1', 0, path=_path)
+    _matrix, _ids, _tags = _reload._get_matrix()
+    assert _ids.tolist() == [1, 2, 3, 5]
+    assert _tags.tolist() == [None] * 4
+    np.testing.assert_array_equal(_matrix, np.concatenate([_vectors, _new_vector]))
+
+
+def test_partition_filter():
+    """
+    指定场景时只返回对应场景的记录
+    """
+    _store = EmbeddedVectorStore()
+    _store.create_collection('c1', DIMENSION)
+    for _partition in ('p1', 'p2'):
+        _store.create_partition('c1', _partition)
+
+    _p1_ids = _store.insert('c1', _random_vectors(5), partition='p1')
+    _p2_ids = _store.insert('c1', _random_vectors(5, seed=1), partition='p2')
+    _none_ids = _store.insert('c1', _random_vectors(5, seed=2))
+    _query = _random_vectors(2, seed=3)
+
+    for _hits in _store.search('c1', _query, 10, partitions='p1'):
+        assert sorted(_hit_ids(_hits)) == _p1_ids
+    for _hits in _store.search('c1', _query, 20, partitions=['p1', 'p2']):
+        assert sorted(_hit_ids(_hits)) == _p1_ids + _p2_ids
+    for _hits in _store.search('c1', _query, 20):
+        assert sorted(_hit_ids(_hits)) == _p1_ids + _p2_ids + _none_ids
+    assert _store.search('c1', _query, 3, partitions='not exists') == [[], []]
+
+    with pytest.raises(KeyError):
+        _store.insert('c1', _random_vectors(1), partition='not exists')
+
+
+@pytest.mark.parametrize('metric_type', ['IP', 'L2'])
+def test_metric_ordering(metric_type):
+    """
+    IP按内积从大到小排序，L2按欧氏距离平方从小到大排序
+    """
+    _store = EmbeddedVectorStore()
+    _store.create_collection('c1', DIMENSION, metric_type=metric_type)
+    _vectors = _random_vectors(30)
+    _ids = np.asarray(_store.insert('c1', _vectors))
+    _query = _random_vectors(1, seed=1)[0]
+
+    if metric_type == 'IP':
+        _distances = _vectors @ _query
+        _order = np.argsort(-_distances)
+    else:
+        _distances = ((_vectors - _query) ** 2).sum(axis=1)
+        _order = np.argsort(_distances)
+
+    _hits = _store.search('c1', [_query], 5)[0]
+    assert _hit_ids(_hits) == _ids[_order[0: 5]].tolist()
+    np.testing.assert_allclose([_hit.distance for _hit in _hits], _distances[_order[0: 5]], rtol=1e-5)
+
+
+@pytest.mark.parametrize('metric_type', ['IP', 'L2'])
+def test_ivf_recall(metric_type):
+    """
+    IVF索引在后台建立，建立完成前精确检索；索引检索的召回率与暴力检索相比在合理范围，检索所有分桶时结果一致
+    """
+    _vectors = _random_vectors(2000)
+    _queries = _random_vectors(50, seed=1)
+    _ids = list(range(1, _vectors.shape[0] + 1))
+
+    _exact = VectorCollection('exact', DIMENSION, metric_type=metric_type)
+    _exact.insert(_vectors, _ids)
+    _expect = _exact.search(_queries, 10)
+    assert _exact._ivf is None and _exact._ivf_thread is None
+
+    _ivf = VectorCollection('ivf', DIMENSION, metric_type=metric_type, ivf_threshold=1000, ivf_nlist=16)
+    _ivf.insert(_vectors[0: 500], _ids[0: 500])
+    assert _ivf._ivf_thread is None
+
+    # 阻塞索引建立，检查建立过程中使用暴力检索，插入及检索不被阻塞
+    _event = threading.Event()
+    _build_ivf = _ivf._build_ivf
+
+    def build_ivf(matrix):
+        assert _event.wait(10)
+        return _build_ivf(matrix)
+
+    _ivf._build_ivf = build_ivf
+    _ivf.insert(_vectors[500:], _ids[500:])
+    assert _ivf._ivf_thread is not None and _ivf._ivf is None
+    assert _ivf.search(_queries, 10) == _expect
+
+    _event.set()
+    assert _ivf.wait_ivf(10)
+    assert _ivf._ivf is not None and _ivf._ivf_thread is None
+
+    _recall = np.mean([
+        len(set(_hit_ids(_hits)) & set(_hit_ids(_expect_hits))) / 10.0
+        for _hits, _expect_hits in zip(_ivf.search(_queries, 10, nprobe=4), _expect)
+    ])
+    assert _recall >= 0.7
+    assert [_hit_ids(_hits) for _hits in _ivf.search(_queries, 10, nprobe=16)] == [
+        _hit_ids(_hits) for _hits in _expect
+    ]
+
+    # 数据变更后在后台重建索引
+    _ivf.insert(_random_vectors(10, seed=2), list(range(3001, 3011)))
+    assert _ivf.wait_ivf(10)
+    assert sum([len(_rows) for _rows in _ivf._ivf[1]]) == 2010